@@ -0,0 +1,186 @@
+"""
+Latency of unrelated requests during a burst of logins and password resets,
+with bcrypt and SMTP run inline in the handlers (the old code) and offloaded
+(PasswordHasher thread pool + EmailService background queue).
+
+A probe stands in for any other endpoint: it starts a trivial request every
+``--probe-ms`` on the same event loop and records how late it completes.
+Resets send their email to a local SMTP stand-in running in another thread,
+which adds ``--smtp-connect-ms`` per session (TLS handshake + login to a
+real provider) and ``--smtp-send-ms`` per message.
+
+Usage (from the repository root):
+    python -m benchmarks.auth_load --logins 20 --resets 20 --rounds 12
+"""
+import os
+import argparse
+import asyncio
+import smtplib
+import threading
+import time
+
+import bcrypt
+import numpy as np
+
+# email_service builds its global instance from the environment at import time
+os.environ.setdefault("SMTP_USERNAME", "bench@example.com")
+os.environ.setdefault("SMTP_PASSWORD", "bench")
+
+from src.backend.database.email_service import EmailService
+from src.backend.passwords import PasswordHasher
+
+
+class LocalSMTPServer:
+    """Minimal SMTP server (EHLO, AUTH, MAIL, RCPT, DATA, RSET, NOOP, QUIT) on its own thread and event loop"""
+
+    def __init__(self, connect_delay=0.0, send_delay=0.0):
+        self.connect_delay = connect_delay
+        self.send_delay = send_delay
+        self.connections = 0
+        self.messages = 0
+        self.port = None
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def __exit__(self, *exc):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def _serve(self):
+        asyncio.set_event_loop(self._loop)
+        server = self._loop.run_until_complete(asyncio.start_server(self._session, "127.0.0.1", 0))
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _session(self, reader, writer):
+        self.connections += 1
+        await asyncio.sleep(self.connect_delay)
+        writer.write(b"220 localhost ESMTP stand-in\r\n")
+        while line := await reader.readline():
+            command = line.decode().strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                writer.write(b"250-localhost\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+            elif command.startswith("AUTH"):
+                writer.write(b"235 2.7.0 Authentication successful\r\n")
+            elif command == "DATA":
+                writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                await reader.readuntil(b"\r\n.\r\n")
+                await asyncio.sleep(self.send_delay)
+                self.messages += 1
+                writer.write(b"250 2.0.0 Ok: queued\r\n")
+            elif command == "QUIT":
+                writer.write(b"221 2.0.0 Bye\r\n")
+                break
+            else:
+                writer.write(b"250 2.0.0 Ok\r\n")  # MAIL, RCPT, RSET, NOOP
+            await writer.drain()
+        await writer.drain()
+        writer.close()
+
+
+def legacy_send(service, to_email, reset_code):
+    """What send_reset_code_email used to do inside the handler: a new blocking SMTP session per email"""
+    server = smtplib.SMTP(service.smtp_server, service.smtp_port)
+    server.login(service.smtp_username, service.smtp_password)
+    server.send_message(service._reset_code_message(to_email, reset_code))
+    server.quit()
+
+
+async def probe(interval, stop, latencies):
+    """
+    Start a trivial request every ``interval`` seconds and record how long after
+    its planned arrival each one finishes (ticks missed while the loop was
+    blocked still count, from the time they should have arrived)
+    """
+    async def request(scheduled):
+        await asyncio.sleep(0)
+        latencies.append(time.perf_counter() - scheduled)
+
+    tasks = []
+    next_at = time.perf_counter()
+    while not stop.is_set():
+        next_at += interval
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        tasks.append(asyncio.create_task(request(next_at)))
+    await asyncio.gather(*tasks)
+
+
+async def burst(mode, args, smtp):
+    hashed = bcrypt.hashpw(b"correct horse", bcrypt.gensalt(args.rounds)).decode()
+    hasher = PasswordHasher(max_workers=args.bcrypt_workers, rounds=args.rounds)
+    service = EmailService(smtp_server="127.0.0.1", smtp_port=smtp.port, starttls=False, retry_delay=0.1)
+    service.start()
+
+    async def login():
+        if mode == "inline":
+            return bcrypt.checkpw(b"correct horse", hashed.encode())
+        return await hasher.verify("correct horse", hashed)
+
+    async def reset(i):
+        if mode == "inline":
+            legacy_send(service, f"user{i}@example.com", "123456")
+            return True
+        return await service.send_reset_code_email(f"user{i}@example.com", "123456")
+
+    async def timed(coro, durations):
+        # All requests of the burst arrive at ``start``: time spent waiting for the loop counts
+        assert await coro
+        durations.append(time.perf_counter() - start)
+
+    async def delivered(count):
+        while smtp.messages - messages < count:
+            await asyncio.sleep(0.01)
+        return time.perf_counter() - start
+
+    latencies, login_times, reset_times = [], [], []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(args.probe_ms / 1000, stop, latencies))
+    await asyncio.sleep(0.2)  # baseline before the burst
+    connections, messages = smtp.connections, smtp.messages
+    start = time.perf_counter()
+    delivery = asyncio.create_task(delivered(args.resets))
+    requests = [timed(login(), login_times) for _ in range(args.logins)]
+    requests += [timed(reset(i), reset_times) for i in range(args.resets)]
+    await asyncio.gather(*requests)
+    answered = time.perf_counter() - start
+    delivery_time = await delivery
+    await service.stop(timeout=60)
+    await asyncio.sleep(0.2)
+    stop.set()
+    await probe_task
+    hasher.shutdown()
+
+    ms = np.array(latencies) * 1000
+    print(f"{mode:<10} probe p50 {np.percentile(ms, 50):7.1f} ms  p99 {np.percentile(ms, 99):7.1f} ms  "
+          f"max {ms.max():7.1f} ms | login p99 {np.percentile(login_times, 99) * 1000:7.0f} ms  "
+          f"reset p99 {np.percentile(reset_times, 99) * 1000:6.0f} ms | burst answered {answered:5.2f} s, "
+          f"emails delivered {delivery_time:5.2f} s ({smtp.messages - messages} emails, "
+          f"{smtp.connections - connections} SMTP connections)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--resets", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument("--bcrypt-workers", type=int, default=2)
+    parser.add_argument("--probe-ms", type=float, default=5)
+    parser.add_argument("--smtp-connect-ms", type=float, default=300)
+    parser.add_argument("--smtp-send-ms", type=float, default=50)
+    parser.add_argument("--modes", nargs="+", default=["inline", "offloaded"], choices=["inline", "offloaded"])
+    args = parser.parse_args()
+
+    with LocalSMTPServer(args.smtp_connect_ms / 1000, args.smtp_send_ms / 1000) as smtp:
+        for mode in args.modes:
+            asyncio.run(burst(mode, args, smtp))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Micro-benchmark of the per-page box post-processing: the previous pure-Python
+loop (score filter, bbox, expansion/clipping, font geometry per box) vs. the
+vectorized ``box_layout``. Both are checked to produce the same boxes first.
+
+Usage (from the repository root):
+    python -m benchmarks.box_layout --boxes 50 200 1000
+"""
+import argparse
+import timeit
+
+import numpy as np
+
+from src.app.layout import box_layout
+
+WIDTH, HEIGHT = 1240, 1754
+EXPEND = 5
+
+
+def _legacy(dt_polys, dt_scores, img_width, img_height):
+    """Box handling of process_recognition before vectorization, geometry included"""
+    boxes = []
+    for poly in dt_polys:
+        xs = [point[0] for point in poly]
+        ys = [point[1] for point in poly]
+        boxes.append([[int(min(xs)), int(min(ys))], [int(max(xs)), int(max(ys))]])
+
+    valid = []
+    for box, score, poly in zip(boxes, dt_scores, dt_polys):
+        if score < 0.5:
+            continue
+        x1, y1 = max(0, box[0][0] - EXPEND), max(0, box[0][1] - EXPEND)
+        x2, y2 = min(img_width, box[1][0] + EXPEND), min(img_height, box[1][1] + EXPEND)
+        if x2 > x1 and y2 > y1:
+            valid.append(((x1, y1, x2, y2), score, poly))
+
+    out = []
+    for (x1, y1, x2, y2), score, poly in reversed(valid):
+        x_coords = [p[0] for p in poly]
+        y_coords = [p[1] for p in poly]
+        bbox_width = max(x_coords) - min(x_coords)
+        bbox_height = max(y_coords) - min(y_coords)
+        x = min(x_coords)
+        y = img_height - max(y_coords) + (bbox_height * 0.1)
+        out.append((x1, y1, x2, y2, score, x, y, bbox_height * 1.0, bbox_width))
+    return out
+
+
+def _detections(num_boxes, seed=0):
+    """Quad polygons like PaddleX returns (int16 array) with scores in [0.3, 1)"""
+    rng = np.random.default_rng(seed)
+    x = rng.integers(-3, WIDTH - 200, num_boxes)
+    y = rng.integers(-3, HEIGHT - 40, num_boxes)
+    w = rng.integers(20, 600, num_boxes)
+    h = rng.integers(15, 45, num_boxes)
+    polys = np.stack([np.stack([x, y], 1), np.stack([x + w, y], 1),
+                      np.stack([x + w, y + h], 1), np.stack([x, y + h], 1)], axis=1).astype(np.int16)
+    return polys, rng.uniform(0.3, 1.0, num_boxes).tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--boxes", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    for num_boxes in args.boxes:
+        polys, scores = _detections(num_boxes)
+        expected = np.array(_legacy(polys, scores, WIDTH, HEIGHT), dtype=np.float64).reshape(-1, 9)
+        boxes = box_layout(polys, scores, WIDTH, HEIGHT, expand=EXPEND)
+        fields = ["x1", "y1", "x2", "y2", "score", "x", "y", "font_size", "width"]
+        actual = np.stack([boxes[f].astype(np.float64) for f in fields], axis=1).reshape(-1, 9)
+        assert np.array_equal(expected, actual), "box_layout differs from the previous loop"
+
+        legacy = min(timeit.repeat(lambda: _legacy(polys, scores, WIDTH, HEIGHT), number=args.number, repeat=3))
+        vectorized = min(timeit.repeat(lambda: box_layout(polys, scores, WIDTH, HEIGHT, expand=EXPEND),
+                                       number=args.number, repeat=3))
+        print(f"{num_boxes:>5} boxes  loop {legacy / args.number * 1e6:9.1f} us  "
+              f"numpy {vectorized / args.number * 1e6:9.1f} us  (x{legacy / vectorized:.1f})")
+
+
+if __name__ == "__main__":
+    main()
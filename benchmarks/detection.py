@@ -0,0 +1,41 @@
+"""
+Per-page text detection latency at different detector batch sizes.
+
+Usage (from the repository root):
+    python -m benchmarks.detection --pages 16 --batch-sizes 1 2 4 8
+"""
+import argparse
+import time
+
+from src.app.process import Process
+from benchmarks.synthetic import make_page
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=16)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+
+    pages = [Process.load_image(make_page(seed=i)[0]) for i in range(args.pages)]
+    process = Process()
+    # Warm-up so model initialization is not counted
+    list(process.det_model.predict(pages[0], batch_size=1))
+
+    baseline = None
+    for batch_size in args.batch_sizes:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for i in range(0, len(pages), batch_size):
+                chunk = pages[i:i + batch_size]
+                list(process.det_model.predict(chunk if len(chunk) > 1 else chunk[0], batch_size=len(chunk)))
+            best = min(best, time.perf_counter() - start)
+        per_page = best / len(pages) * 1000
+        baseline = baseline or per_page
+        print(f"batch={batch_size:<3} {per_page:8.1f} ms/page  (x{baseline / per_page:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Output size and encoding time of the page image layer for each encoding mode
+(lossless, jpeg, bilevel, auto) on synthetic black-and-white, scanned gray and
+color pages.
+
+Usage (from the repository root):
+    python -m benchmarks.image_encoding --quality 80 --dpi 0 150
+"""
+import argparse
+import io
+import time
+
+import cv2
+import numpy as np
+from reportlab.pdfgen import canvas
+
+from src.app.image_layer import IMAGE_MODES, draw_page_image, encode_page_image
+from benchmarks.synthetic import make_page
+
+
+def _pages():
+    """Render at 200 DPI (A4 = 1654 x 2339) so downsampling has something to do"""
+    page, _ = make_page(width=1654, height=2339, font_size=36)
+    clean = cv2.cvtColor(np.asarray(page), cv2.COLOR_RGB2BGR)
+
+    rng = np.random.default_rng(0)
+    scanned = cv2.GaussianBlur(clean, (3, 3), 0).astype(np.int16)
+    scanned += rng.normal(0, 12, scanned.shape[:2]).astype(np.int16)[..., None]
+    scanned = np.clip(scanned - 20, 0, 255).astype(np.uint8)
+
+    color = clean.copy()
+    cv2.circle(color, (1300, 2000), 180, (40, 40, 220), 12)  # red stamp
+    cv2.rectangle(color, (100, 20), (700, 70), (200, 120, 30), -1)  # blue header bar
+    return {"black/white": clean, "scanned gray": scanned, "color": color}
+
+
+def _pdf_size(img, mode, quality, scale):
+    height, width = img.shape[:2]
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=(width, height))
+    image, used = encode_page_image(img, mode, quality, scale)
+    draw_page_image(c, image, width, height)
+    c.save()
+    return len(buffer.getvalue()), used
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--quality", type=int, default=80)
+    parser.add_argument("--dpi", type=int, nargs="+", default=[0, 150],
+                        help="target DPI of the image layer (0 = keep the 200 DPI render)")
+    args = parser.parse_args()
+
+    for name, img in _pages().items():
+        print(name)
+        for dpi in args.dpi:
+            scale = dpi / 200 if dpi else 1.0
+            for mode in IMAGE_MODES:
+                start = time.perf_counter()
+                size, used = _pdf_size(img, mode, args.quality, scale)
+                elapsed = time.perf_counter() - start
+                print(f"  {dpi or 200:>3} dpi  {mode:<8} -> {used:<8} {size / 1024:9.1f} KiB  {elapsed * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
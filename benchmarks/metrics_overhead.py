@@ -0,0 +1,64 @@
+"""
+Cost of the stage instrumentation in src/app/metrics.py, enabled (StageMetrics)
+vs. disabled (NULL_METRICS).
+
+Replays the metric calls Process makes for one OCR page (render, detection,
+crop, recognition per page and per line, normalization, pdf_write and merge
+timings plus the page/line counters) ``--pages`` times from ``--threads``
+threads sharing one recorder, as the pipeline does, and reports the cost per
+page. A page takes hundreds of milliseconds to OCR, so microseconds per page
+is noise.
+
+Usage (from the repository root):
+    python -m benchmarks.metrics_overhead --pages 100000 --threads 1 4
+"""
+import argparse
+import threading
+import time
+
+from src.app.metrics import NULL_METRICS, StageMetrics
+
+
+def _page(metrics, lines=40):
+    for stage in ("render", "detection", "crop", "normalization", "merge"):
+        with metrics.time(stage):
+            pass
+    metrics.inc("pages")
+    metrics.observe("recognition_page", 0.2)
+    metrics.observe("recognition_line", 0.2 / lines, count=lines)
+    metrics.inc("lines", lines)
+    metrics.observe("pdf_write", 0.01)
+
+
+def _run(metrics, pages, threads):
+    per_thread = pages // threads
+
+    def work():
+        for _ in range(per_thread):
+            _page(metrics)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=100000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    for threads in args.threads:
+        for name, factory in (("disabled", lambda: NULL_METRICS), ("enabled", StageMetrics)):
+            metrics = factory()
+            elapsed = _run(metrics, args.pages, threads)
+            pages = metrics.snapshot().get("counters", {}).get("pages", args.pages // threads * threads)
+            print(f"threads={threads:<2} {name:<8} {elapsed / args.pages * 1e6:6.2f} us/page  (pages recorded: {pages})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Detection / recognition model variants on CPU: server vs. mobile detector and
+the fp32 recognizer vs. its int8 (dynamic quantization) and TorchScript
+(traced + frozen CNN backbone) variants.
+
+Each ``--config`` is ``det_model:rec_model[:opts]`` where opts is ``int8``,
+``torchscript`` or ``int8+torchscript``. Every configuration runs in a fresh
+process so the reported peak RSS belongs to that configuration alone. For each
+one the script reports model load time, detection and recognition time per
+page, pages/s, peak RSS, the share of ground-truth lines found (IoU >= 0.5) and
+the character error rate of the recognized lines on synthetic A4 pages.
+
+Usage (from the repository root):
+    python -m benchmarks.models --pages 4 --threads 4 \\
+        --config PP-OCRv5_server_det:vgg_seq2seq PP-OCRv5_mobile_det:vgg_seq2seq:int8+torchscript
+"""
+import argparse
+import multiprocessing
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from benchmarks.synthetic import box_iou, edit_distance, make_page_lines
+
+DEFAULT_CONFIGS = [
+    "PP-OCRv5_server_det:vgg_seq2seq",
+    "PP-OCRv5_mobile_det:vgg_seq2seq",
+    "PP-OCRv5_mobile_det:vgg_seq2seq:int8",
+    "PP-OCRv5_mobile_det:vgg_seq2seq:torchscript",
+    "PP-OCRv5_mobile_det:vgg_seq2seq:int8+torchscript",
+]
+WIDTH, HEIGHT = 1240, 1754  # A4 at 150 DPI, the default render resolution
+
+
+def _detected_boxes(item):
+    boxes = []
+    for res in item["result"]:
+        for poly, score in zip(res["dt_polys"], res["dt_scores"]):
+            if score >= 0.5:
+                poly = np.asarray(poly)
+                boxes.append((*poly.min(axis=0), *poly.max(axis=0)))
+    return boxes
+
+
+def _run_config(config, num_pages, font_size, threads):
+    """Runs in a spawned worker: load the models, detect and recognize every page"""
+    from src.app.process import Process
+
+    det_model, rec_model, *opts = config.split(":")
+    opts = opts[0].split("+") if opts else []
+
+    start = time.perf_counter()
+    process = Process(cache_max_mb=0, det_model_name=det_model, rec_model_name=rec_model,
+                      rec_quantize="int8" in opts, rec_torchscript="torchscript" in opts,
+                      torch_threads=threads)
+    load_time = time.perf_counter() - start
+
+    pages = []
+    for i in range(num_pages):
+        page, lines = make_page_lines(num_lines=40, width=WIDTH, height=HEIGHT, font_size=font_size, seed=i)
+        pages.append((Process.load_image(page), lines))
+    items = [{"img": img, "result": None} for img, _ in pages]
+    # Warm-up so lazy initialization is not counted
+    process._detect_pages([{"img": pages[0][0], "result": None}])
+    process.recognize_lines([pages[0][0][:font_size * 3, :WIDTH // 2]])
+
+    start = time.perf_counter()
+    process._detect_pages(items)
+    det_time = time.perf_counter() - start
+
+    crops, texts, total_lines = [], [], 0
+    for item, (page, lines) in zip(items, pages):
+        detected = _detected_boxes(item)
+        total_lines += len(lines)
+        for box, text in lines:
+            best = max(detected, key=lambda d: box_iou(box, d), default=None)
+            if best is not None and box_iou(box, best) >= 0.5:
+                x1, y1, x2, y2 = best
+                crops.append(page[max(0, int(y1)):int(y2), max(0, int(x1)):int(x2)])
+                texts.append(text)
+
+    start = time.perf_counter()
+    predicted = process.recognize_lines(crops)
+    rec_time = time.perf_counter() - start
+
+    errors = sum(edit_distance(text, pred or "") for text, pred in zip(texts, predicted))
+    return {
+        "load": load_time,
+        "det": det_time,
+        "rec": rec_time,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "found": len(texts) / (total_lines or 1),
+        "cer": errors / (sum(len(text) for text in texts) or 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--config", nargs="+", default=DEFAULT_CONFIGS)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--font-size", type=int, default=20, help="text height in 150 DPI pixels")
+    parser.add_argument("--threads", type=int, default=0, help="torch intra-op threads (0 = torch default)")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    for config in args.config:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            r = executor.submit(_run_config, config, args.pages, args.font_size, args.threads).result()
+        total = r["det"] + r["rec"]
+        print(f"{config:<48} load {r['load']:6.1f}s  det {r['det'] / args.pages * 1000:7.1f} ms/page  "
+              f"rec {r['rec'] / args.pages * 1000:7.1f} ms/page  {args.pages / total:5.2f} pages/s  "
+              f"peak RSS {r['rss_mb']:7.1f} MiB  lines found {r['found']:6.1%}  CER {r['cer']:6.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Time and peak Python memory of assembling the output PDF: per-page PDFs merged
+with PdfMerger (previous approach) vs. the single-pass StreamingPdfWriter.
+
+Also copies a source PDF of text pages sharing one embedded font (pages kept
+as they are by OCR_SKIP_TEXT_PAGES) and compares the output sizes: the shared
+font and resources must be written once, not once per page.
+
+Usage (from the repository root):
+    python -m benchmarks.pdf_assembly --pages 10 100 500
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+
+from PyPDF2 import PdfMerger, PdfReader
+from reportlab.pdfgen import canvas
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+from src.app.pdf_writer import StreamingPdfWriter
+from benchmarks.synthetic import FONT_PATH, make_page
+
+
+def _page_pdf_bytes():
+    """One OCR-like page: scanned image plus an invisible text line per box"""
+    pdfmetrics.registerFont(TTFont("TimesNewRoman", FONT_PATH))
+    page, boxes = make_page()
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=page.size)
+    c.drawImage(ImageReader(page), 0, 0, width=page.width, height=page.height)
+    c.setFillAlpha(0)
+    for x1, y1, x2, y2 in boxes:
+        c.setFont("TimesNewRoman", y2 - y1)
+        c.drawString(x1, page.height - y2, "Hợp đồng dịch vụ số 12/2024")
+    c.save()
+    return buffer.getvalue()
+
+
+def _text_pdf_bytes(num_pages):
+    """A born-digital PDF: ``num_pages`` text pages sharing one embedded TrueType font"""
+    pdfmetrics.registerFont(TTFont("TimesNewRoman", FONT_PATH))
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=(595, 842))
+    for page in range(num_pages):
+        c.setFont("TimesNewRoman", 11)
+        for line in range(50):
+            c.drawString(50, 800 - line * 15, f"Trang {page + 1}, dòng {line + 1}: Hợp đồng dịch vụ số 12/2024")
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def _merge_source(source_bytes, num_pages, out_path):
+    merger = PdfMerger()
+    merger.append(io.BytesIO(source_bytes))
+    merger.write(out_path)
+    merger.close()
+
+
+def _stream_source(source_bytes, num_pages, out_path):
+    writer = StreamingPdfWriter(out_path)
+    reader = PdfReader(io.BytesIO(source_bytes))
+    for index in range(num_pages):
+        writer.add_source_page(reader, index)
+    writer.close()
+
+
+def _merge(page_bytes, num_pages, out_path):
+    pages = [io.BytesIO(page_bytes) for _ in range(num_pages)]
+    merger = PdfMerger()
+    for page in pages:
+        merger.append(page)
+    merger.write(out_path)
+    merger.close()
+
+
+def _stream(page_bytes, num_pages, out_path):
+    writer = StreamingPdfWriter(out_path)
+    for _ in range(num_pages):
+        writer.add_pdf(io.BytesIO(page_bytes))
+    writer.close()
+
+
+def _measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 500])
+    args = parser.parse_args()
+
+    page_bytes = _page_pdf_bytes()
+    with tempfile.TemporaryDirectory() as tmp:
+        out_path = os.path.join(tmp, "out.pdf")
+        for num_pages in args.pages:
+            merge_time, merge_mem = _measure(_merge, page_bytes, num_pages, out_path)
+            stream_time, stream_mem = _measure(_stream, page_bytes, num_pages, out_path)
+            print(f"{num_pages:>4} pages  merger {merge_time:6.2f}s {merge_mem:8.1f} MiB   "
+                  f"streaming {stream_time:6.2f}s {stream_mem:8.1f} MiB")
+
+        print("kept text pages (shared font):")
+        for num_pages in args.pages:
+            source_bytes = _text_pdf_bytes(num_pages)
+            results = []
+            for fn in (_merge_source, _stream_source):
+                elapsed, peak = _measure(fn, source_bytes, num_pages, out_path)
+                results.append((elapsed, peak, os.path.getsize(out_path)))
+            (merge_time, merge_mem, merge_size), (stream_time, stream_mem, stream_size) = results
+            print(f"{num_pages:>4} pages  source {len(source_bytes) / 1024:8.1f} KiB   "
+                  f"merger {merge_time:6.2f}s {merge_mem:8.1f} MiB {merge_size / 1024:8.1f} KiB   "
+                  f"streaming {stream_time:6.2f}s {stream_mem:8.1f} MiB {stream_size / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
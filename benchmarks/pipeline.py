@@ -0,0 +1,53 @@
+"""
+Wall-clock time of sequential vs. pipelined PDF processing on a synthetic scan.
+
+Each configuration pins torch to ``--threads`` intra-op threads and runs the
+recognition stage with ``w`` workers, so the rows show how the pipeline scales
+with the cores it is given.
+
+Usage (from the repository root):
+    python -m benchmarks.pipeline --pages 50 --workers 1 2 4
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import torch
+
+from src.app.process import Process
+from benchmarks.synthetic import make_pdf
+
+
+def _run(process, pdf_path, out_path):
+    start = time.perf_counter()
+    process.process_file(pdf_path, final_output_name=out_path)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=1, help="torch threads per worker")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = make_pdf(os.path.join(tmp, "synthetic.pdf"), num_pages=args.pages)
+        out_path = os.path.join(tmp, "out.pdf")
+        process = Process()
+
+        for workers in args.workers:
+            torch.set_num_threads(args.threads * workers)
+            process.pipeline = False
+            sequential = _run(process, pdf_path, out_path)
+
+            process.pipeline, process.rec_workers = True, workers
+            pipelined = _run(process, pdf_path, out_path)
+            print(f"cores={args.threads * workers:<3} sequential {sequential:7.1f}s  "
+                  f"pipeline(rec_workers={workers}) {pipelined:7.1f}s  "
+                  f"{args.pages / pipelined:5.2f} pages/s  (x{sequential / pipelined:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Lines/sec of per-crop vs. batched VietOCR recognition on a synthetic page.
+
+Usage (from the repository root):
+    python -m benchmarks.recognition --lines 120 --batch-sizes 8 16 32 64
+"""
+import argparse
+import time
+
+from src.app.process import Process
+from benchmarks.synthetic import make_page, crop_lines
+
+
+def _lines_per_sec(fn, crops, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(crops)
+        best = min(best, time.perf_counter() - start)
+    return len(crops) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=120)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 16, 32, 64])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    page, boxes = make_page(num_lines=args.lines, height=max(1754, args.lines * 48 + 200))
+    crops = crop_lines(page, boxes)
+    process = Process()
+
+    baseline = _lines_per_sec(lambda imgs: [process.rec_model.predict(img) for img in imgs], crops, args.repeat)
+    print(f"per-crop      : {baseline:8.1f} lines/s")
+    for batch_size in args.batch_sizes:
+        rate = _lines_per_sec(lambda imgs: process.recognize_batch(imgs, batch_size=batch_size), crops, args.repeat)
+        print(f"batch={batch_size:<4}    : {rate:8.1f} lines/s  (x{rate / baseline:.2f})")
+
+
+if __name__ == "__main__":
+    main()
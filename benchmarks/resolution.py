@@ -0,0 +1,110 @@
+"""
+Speed / accuracy trade-off of the render DPI and of downscaling pages for text
+detection (boxes are mapped back to the full-resolution render for cropping).
+
+A synthetic A4 scan with small print is rendered at each ``--dpi`` and detected
+with each ``--det-max-side``. For every configuration the script reports
+detection and recognition time per page, the share of ground-truth lines found
+(IoU >= 0.5) and the character error rate of the recognized lines.
+
+Usage (from the repository root):
+    python -m benchmarks.resolution --pages 4 --dpi 72 150 200 --det-max-side 0 1600 1024
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pypdfium2
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from src.app.process import Process
+from benchmarks.synthetic import box_iou, edit_distance, make_page_lines
+
+SCAN_WIDTH, SCAN_HEIGHT = 2480, 3508  # A4 at 300 DPI
+
+
+def _make_scan(path, num_pages, font_size):
+    """Image-only A4 PDF; returns the ground-truth lines of every page in 300 DPI pixels"""
+    c = canvas.Canvas(path, pagesize=A4)
+    truth = []
+    for i in range(num_pages):
+        page, lines = make_page_lines(num_lines=80, width=SCAN_WIDTH, height=SCAN_HEIGHT,
+                                      font_size=font_size, seed=i)
+        c.drawImage(ImageReader(page), 0, 0, width=A4[0], height=A4[1])
+        c.showPage()
+        truth.append(lines)
+    c.save()
+    return truth
+
+
+def _match(item, lines):
+    """Pair each ground-truth line with the detected box overlapping it most"""
+    scale = item["img"].shape[1] / SCAN_WIDTH
+    detected = []
+    for res in item["result"]:
+        for poly, score in zip(res["dt_polys"], res["dt_scores"]):
+            if score >= 0.5:
+                poly = np.asarray(poly)
+                detected.append((*poly.min(axis=0), *poly.max(axis=0)))
+
+    pairs = []
+    for box, text in lines:
+        box = [v * scale for v in box]
+        best = max(detected, key=lambda d: box_iou(box, d), default=None)
+        if best is not None and box_iou(box, best) >= 0.5:
+            pairs.append((best, text))
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--font-size", type=int, default=33, help="text height in 300 DPI pixels (33 px ~ 8 pt)")
+    parser.add_argument("--dpi", type=int, nargs="+", default=[72, 150, 200])
+    parser.add_argument("--det-max-side", type=int, nargs="+", default=[0, 1600, 1024])
+    args = parser.parse_args()
+
+    process = Process(cache_max_mb=0)
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "scan.pdf")
+        truth = _make_scan(pdf_path, args.pages, args.font_size)
+        total_lines = sum(len(lines) for lines in truth)
+        pdf = pypdfium2.PdfDocument(pdf_path)
+        indexes = list(range(args.pages))
+        # Warm-up so model initialization is not counted
+        process._detect_pages(process._render_pages(pdf, indexes[:1]))
+
+        for dpi in args.dpi:
+            for det_max_side in args.det_max_side:
+                process.render_dpi, process.det_max_side = dpi, det_max_side
+                items = process._render_pages(pdf, indexes)
+
+                start = time.perf_counter()
+                process._detect_pages(items)
+                det_time = time.perf_counter() - start
+
+                crops, texts = [], []
+                for item, lines in zip(items, truth):
+                    for (x1, y1, x2, y2), text in _match(item, lines):
+                        crops.append(item["img"][max(0, int(y1)):int(y2), max(0, int(x1)):int(x2)])
+                        texts.append(text)
+
+                start = time.perf_counter()
+                predicted = process.recognize_lines(crops)
+                rec_time = time.perf_counter() - start
+
+                errors = sum(edit_distance(text, pred or "") for text, pred in zip(texts, predicted))
+                chars = sum(len(text) for text in texts) or 1
+                width, height = items[0]["img"].shape[1], items[0]["img"].shape[0]
+                print(f"dpi={dpi:<4} ({width}x{height})  det_max_side={det_max_side or 'off':<5}  "
+                      f"det {det_time / args.pages * 1000:7.1f} ms/page  rec {rec_time / args.pages * 1000:7.1f} ms/page  "
+                      f"lines found {len(texts) / total_lines:6.1%}  CER {errors / chars:6.2%}")
+        pdf.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+API startup time: seconds from launching uvicorn until ``/health`` first
+answers 200 and until ``/ready`` does (OCR models loaded).
+
+With OCR_PRELOAD=true the models load in the background, so ``/health``
+answers as soon as the server is up while ``/ready`` follows once the models
+are loaded. The ``/ready`` time is what ``/health`` used to take when the
+models were created at import time. Needs the same environment as the API
+(MongoDB reachable, .env in place).
+
+Usage (from the repository root):
+    python -m benchmarks.startup --port 8765 --runs 3
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+
+def _wait_for(url, start, timeout):
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError, TimeoutError):
+            pass
+        time.sleep(0.05)
+    return None
+
+
+def _run(port, preload, timeout):
+    env = {**os.environ, "OCR_PRELOAD": "true" if preload else "false"}
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.backend.main:app", "--port", str(port)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        health = _wait_for(f"http://127.0.0.1:{port}/health", start, timeout)
+        ready = _wait_for(f"http://127.0.0.1:{port}/ready", start, timeout)
+    finally:
+        server.terminate()
+        server.wait()
+    return health, ready
+
+
+def _fmt(seconds):
+    return f"{seconds:6.2f}s" if seconds is not None else "timeout"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    for preload in (False, True):
+        for run in range(args.runs):
+            health, ready = _run(args.port, preload, args.timeout)
+            print(f"OCR_PRELOAD={str(preload).lower():<5} run {run + 1}: "
+                  f"/health 200 after {_fmt(health)}  /ready 200 after {_fmt(ready)}")
+
+
+if __name__ == "__main__":
+    main()
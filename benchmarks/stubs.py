@@ -0,0 +1,70 @@
+"""
+Cheap stand-ins for the OCR models, so benchmarks can measure everything
+around them (rendering, batching, caching, layout, PDF writing, merging) in
+seconds and without downloading weights.
+
+StubProcess is the real Process with only the model calls replaced:
+StubDetector finds text lines with a horizontal ink projection and the
+recognizer returns sample text sized to each line crop.
+"""
+import numpy as np
+
+from src.app.process import Process
+from benchmarks.synthetic import SAMPLE_LINES
+
+
+def find_lines(img, threshold=128, max_gap=6, min_height=8):
+    """
+    Line boxes (x1, y1, x2, y2) of dark text on a light page, from row/column
+    ink projections. Row runs closer than ``max_gap`` pixels are joined so
+    diacritics stay with their line; runs shorter than ``min_height`` are dropped.
+    """
+    gray = img.mean(axis=2) if img.ndim == 3 else img
+    ink = gray < threshold
+    rows = ink.sum(axis=1) > max(2, img.shape[1] // 500)  # a few isolated noise pixels are not a line
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], rows.astype(np.int8), [0]])))
+    runs = []
+    for y1, y2 in zip(edges[::2], edges[1::2]):
+        if runs and y1 - runs[-1][1] <= max_gap:
+            runs[-1][1] = y2
+        else:
+            runs.append([y1, y2])
+
+    boxes = []
+    for y1, y2 in runs:
+        cols = np.flatnonzero(ink[y1:y2].any(axis=0))
+        if y2 - y1 >= min_height and len(cols):
+            boxes.append((int(cols[0]), int(y1), int(cols[-1]) + 1, int(y2)))
+    return boxes
+
+
+class StubDetector:
+    """Same predict() interface as a PaddleX text detection model"""
+
+    def predict(self, images, batch_size=1):
+        if isinstance(images, np.ndarray):
+            images = [images]
+        for img in images:
+            polys = [np.array([[x1, y1], [x2, y1], [x2, y2], [x1, y2]], dtype=np.float32)
+                     for x1, y1, x2, y2 in find_lines(img)]
+            yield {"dt_polys": polys, "dt_scores": [0.9] * len(polys)}
+
+
+class StubProcess(Process):
+    """Process running StubDetector and a stub recognizer instead of PaddleX / VietOCR"""
+
+    def _load_models(self, *args, **kwargs):
+        self.det_model = StubDetector()
+        self.rec_model = None
+
+    def _create_det_model(self):
+        return StubDetector()
+
+    def recognize_batch(self, images, batch_size=None):
+        texts = []
+        for i, image in enumerate(images):
+            # About two characters per line height of width, like printed text
+            length = max(1, round(2 * image.width / max(1, image.height)))
+            line = SAMPLE_LINES[i % len(SAMPLE_LINES)]
+            texts.append((line * (length // len(line) + 1))[:length])
+        return texts
@@ -0,0 +1,175 @@
+"""
+Reproducible end-to-end OCR benchmark on synthetic scanned documents.
+
+Builds image-only A4 PDFs of each ``--pages`` count (Vietnamese text in
+font/times.ttf with Gaussian noise and a small random rotation per page,
+deterministic for a given seed and kept in ``--data-dir``), then measures every
+document twice:
+
+- end to end: Process.process_file with stage metrics on; pages/s, wall time,
+  seconds per stage and output size;
+- stage by stage: each page rendered, detected, recognized and written on its
+  own; p50/p95 latency per stage and per page.
+
+Each document runs in a fresh process so peak RSS belongs to that document.
+``--backend stub`` swaps the detector and recognizer for the cheap stand-ins in
+benchmarks/stubs.py (fast, no weights); ``--backend real`` uses the configured
+models. Process settings can be overridden with ``--set key=value``. Results go
+to ``--output`` as JSON together with the commit and settings, so runs can be
+compared across commits.
+
+Usage (from the repository root):
+    python -m benchmarks.suite --backend stub --pages 1 10 100 --output bench.json
+    python -m benchmarks.suite --backend real --pages 10 --set pipeline=true --output bench-real.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+from src.app.metrics import StageMetrics
+from benchmarks.synthetic import make_scan_pdf
+
+
+def _percentiles(values):
+    values = np.asarray(values, dtype=np.float64)
+    return {"p50": float(np.percentile(values, 50)), "p95": float(np.percentile(values, 95)),
+            "mean": float(values.mean())}
+
+
+def _stage_by_stage(process, pdf_path):
+    """Latency of every stage for each page processed alone (no overlap between pages)"""
+    import pypdfium2
+
+    latencies = defaultdict(list)
+    pdf = pypdfium2.PdfDocument(pdf_path)
+    try:
+        num_pages = len(pdf)
+        for i in range(num_pages):
+            metrics = StageMetrics()
+            start = time.perf_counter()
+            items = process._detect_pages(process._render_pages(pdf, [i], metrics), metrics)
+            process._recognize_page(items[0], num_pages, metrics).close()
+            latencies["page"].append(time.perf_counter() - start)
+            for stage, hist in metrics.snapshot()["stages"].items():
+                if stage != "recognition_line":
+                    latencies[stage].append(hist["sum"])
+    finally:
+        pdf.close()
+    return {stage: _percentiles(values) for stage, values in latencies.items()}
+
+
+def _run_document(backend, pdf_path, process_kwargs):
+    """Runs in a spawned worker: load the backend, then the end-to-end and stage-by-stage passes"""
+    if backend == "stub":
+        from benchmarks.stubs import StubProcess as Process
+    else:
+        from src.app.process import Process
+
+    start = time.perf_counter()
+    process = Process(**process_kwargs)
+    load_time = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, "out.pdf")
+        metrics, report = StageMetrics(), {}
+        start = time.perf_counter()
+        process.process_file(pdf_path, final_output_name=output_path, report=report, metrics=metrics)
+        wall = time.perf_counter() - start
+        snapshot = metrics.snapshot()
+
+    pages = report["pages_total"]
+    return {
+        "pages": pages,
+        "load_seconds": load_time,
+        "end_to_end": {
+            "seconds": wall,
+            "pages_per_second": pages / wall,
+            "input_size": report["input_size"],
+            "output_size": report["output_size"],
+            "breakdown": StageMetrics.breakdown(snapshot),
+        },
+        "stage_by_stage": _stage_by_stage(process, pdf_path),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def _parse_value(value):
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backend", choices=["stub", "real"], default="stub")
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--noise", type=float, default=12.0, help="Gaussian noise standard deviation (0-255 scale)")
+    parser.add_argument("--rotation", type=float, default=0.5, help="maximum page rotation in degrees")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default="benchmarks/data", help="where the synthetic PDFs are kept")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="Process setting, e.g. pipeline=true or render_dpi=200 (value parsed as JSON)")
+    parser.add_argument("--output", default="benchmark.json")
+    args = parser.parse_args()
+
+    # Page/line cache off: every run must do the full work
+    process_kwargs = {"cache_max_mb": 0}
+    for setting in args.set:
+        key, _, value = setting.partition("=")
+        process_kwargs[key] = _parse_value(value)
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for num_pages in args.pages:
+        name = f"scan_{num_pages}p_seed{args.seed}_noise{args.noise:g}_rot{args.rotation:g}.pdf"
+        pdf_path = os.path.join(args.data_dir, name)
+        if not os.path.exists(pdf_path):
+            make_scan_pdf(pdf_path, num_pages, seed=args.seed, noise=args.noise, rotation=args.rotation)
+
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(_run_document, args.backend, pdf_path, process_kwargs).result()
+        result["document"] = name
+        results.append(result)
+
+        e2e, page = result["end_to_end"], result["stage_by_stage"]["page"]
+        print(f"{num_pages:>4} pages  {e2e['pages_per_second']:7.2f} pages/s  "
+              f"page p50 {page['p50'] * 1000:7.1f} ms  p95 {page['p95'] * 1000:7.1f} ms  "
+              f"peak RSS {result['peak_rss_mb']:7.1f} MiB  output {e2e['output_size'] / 1024:8.1f} KiB")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": _commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "backend": args.backend,
+            "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                        "cpus": os.cpu_count()},
+            "documents": {"noise": args.noise, "rotation": args.rotation, "seed": args.seed},
+            "process_kwargs": process_kwargs,
+            "results": results,
+        }, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
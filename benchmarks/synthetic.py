@@ -0,0 +1,135 @@
+"""Synthetic document generator and scoring helpers shared by the benchmark scripts."""
+import random
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+FONT_PATH = "font/times.ttf"
+
+SAMPLE_LINES = [
+    "Cộng hòa xã hội chủ nghĩa Việt Nam",
+    "Độc lập - Tự do - Hạnh phúc",
+    "Hợp đồng dịch vụ số 12/2024/HĐDV",
+    "Điều 1. Phạm vi và đối tượng áp dụng",
+    "1.1. Bên A đồng ý cung cấp dịch vụ cho Bên B theo các điều khoản sau",
+    "Thời hạn thanh toán: trong vòng 30 ngày kể từ ngày nhận hóa đơn",
+    "Mọi tranh chấp phát sinh sẽ được giải quyết thông qua thương lượng",
+    "Đại diện hợp pháp của các bên ký tên và đóng dấu dưới đây",
+]
+
+
+def make_page(num_lines=40, width=1240, height=1754, font_size=28, seed=0):
+    """
+    Render a white page with ``num_lines`` lines of Vietnamese text.
+
+    Returns:
+        tuple: (PIL.Image RGB page, list of (x1, y1, x2, y2) line boxes)
+    """
+    page, lines = make_page_lines(num_lines, width, height, font_size, seed)
+    return page, [box for box, _ in lines]
+
+
+def make_page_lines(num_lines=40, width=1240, height=1754, font_size=28, seed=0):
+    """
+    Same as ``make_page`` but also returns the text of every line.
+
+    Returns:
+        tuple: (PIL.Image RGB page, list of ((x1, y1, x2, y2), text))
+    """
+    rng = random.Random(seed)
+    font = ImageFont.truetype(FONT_PATH, font_size)
+    page = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(page)
+
+    lines = []
+    line_height = int(font_size * 1.6)
+    y = 80
+    for _ in range(num_lines):
+        if y + line_height > height - 80:
+            break
+        text = rng.choice(SAMPLE_LINES)
+        x = 100 + rng.randint(0, 40)
+        draw.text((x, y), text, fill="black", font=font)
+        x1, y1, x2, y2 = draw.textbbox((x, y), text, font=font)
+        lines.append(((x1 - 5, y1 - 5, x2 + 5, y2 + 5), text))
+        y += line_height
+    return page, lines
+
+
+def crop_lines(page, boxes):
+    """Crop every line box out of a rendered page."""
+    return [page.crop(box) for box in boxes]
+
+
+def make_pdf(path, num_pages=10, lines_per_page=40, seed=0):
+    """Write a ``num_pages`` image-only PDF made of synthetic pages, like a scan."""
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    c = None
+    for i in range(num_pages):
+        page, _ = make_page(num_lines=lines_per_page, seed=seed + i)
+        if c is None:
+            c = canvas.Canvas(path, pagesize=page.size)
+        c.setPageSize(page.size)
+        c.drawImage(ImageReader(page), 0, 0, width=page.width, height=page.height)
+        c.showPage()
+    c.save()
+    return path
+
+
+def make_scan_page(seed=0, noise=12.0, rotation=0.5, num_lines=40, width=1240, height=1754, font_size=28):
+    """
+    Synthetic scanned page: ``make_page`` text, rotated by a random angle in
+    [-rotation, rotation] degrees, slightly blurred and with Gaussian noise of
+    standard deviation ``noise``. Deterministic for a given seed.
+
+    Returns:
+        PIL.Image: RGB page.
+    """
+    page, _ = make_page(num_lines=num_lines, width=width, height=height, font_size=font_size, seed=seed)
+    rng = np.random.default_rng(seed)
+    if rotation:
+        page = page.rotate(rng.uniform(-rotation, rotation), resample=Image.BILINEAR, fillcolor="white")
+    pixels = np.asarray(page.filter(ImageFilter.GaussianBlur(0.6)), dtype=np.float32)
+    if noise:
+        pixels += rng.normal(0, noise, pixels.shape[:2]).astype(np.float32)[..., None]
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+
+def make_scan_pdf(path, num_pages=10, seed=0, noise=12.0, rotation=0.5):
+    """Write an image-only A4 PDF of JPEG ``make_scan_page`` pages (150 DPI), like a scanner would."""
+    import io
+
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(path, pagesize=A4)
+    for i in range(num_pages):
+        jpeg = io.BytesIO()
+        make_scan_page(seed=seed + i, noise=noise, rotation=rotation).save(jpeg, "JPEG", quality=85)
+        jpeg.seek(0)
+        c.drawImage(ImageReader(jpeg), 0, 0, width=A4[0], height=A4[1])
+        c.showPage()
+    c.save()
+    return path
+
+
+def box_iou(a, b):
+    """Intersection over union of two (x1, y1, x2, y2) boxes."""
+    ix = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union else 0.0
+
+
+def edit_distance(a, b):
+    """Levenshtein distance between two strings."""
+    row = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        prev, row[0] = row[0], i
+        for j, cb in enumerate(b, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (ca != cb))
+    return row[-1]
@@ -0,0 +1,78 @@
+"""
+Lines/sec of fix_text_spacing: the previous chain of ~20 re.sub calls vs. the
+precompiled single-pass version in src/app/text_spacing.py.
+
+The lines timed are the synthetic document lines mixed with the edge cases
+below. That both versions give the same output is checked by
+tests/test_text_spacing.py against stored expected outputs.
+
+Usage (from the repository root):
+    python -m benchmarks.text_spacing --lines 20000
+"""
+import argparse
+import random
+import re
+import timeit
+
+from src.app.text_spacing import fix_text_spacing
+from benchmarks.synthetic import SAMPLE_LINES
+
+EDGE_CASES = [
+    "", " ", "1.a", "12:b", "123.a", "1 .a", "1  :x", "1. a", "I.Mở đầu", "iv:abc", "IIII.x", "MMMMM.x",
+    "DD.x", "C.x", "a.b", "A:B", "(1)a", "(a)(b)c", "(iv)Điều", "1.2.3.a", "1.2.3. a", "12.3.a", "1.2.x(3)",
+    "Điều 1.Phạm vi", "a(b)c", "x,y,z", "1,2,3", "a.B.1", "a.1.b", "abc.Def", "ref[1]and", "]a[", "a[b[c",
+    "a:b:c", "a:b;c", "a;b;c", "well-known", "abc-def-ghi", "ab-cd", "Hợp đồng số 12/2024/HĐDV",
+    "Thời hạn:trong vòng 30 ngày", "(Ký tên)và đóng dấu", "V.Kết luận", "\t1.a", "١.a", "x.Y.z.W",
+]
+
+
+def _legacy_is_valid_roman_numeral(s):
+    pattern = r'^M{0,4}(CM|CD|D?C{0,3})(XC|XL|L?X{0,3})(IX|IV|V?I{0,3})$'
+    return bool(re.match(pattern, s.upper()))
+
+
+def _legacy_fix_text_spacing(text):
+    """Process.fix_text_spacing before it was precompiled, copied verbatim"""
+    if not text or not text.strip():
+        return text
+
+    text = re.sub(r'^(\d{1,2})(\.|:)([^\s])', r'\1\2 \3', text)
+    text = re.sub(r'^(\d{1,2})\s+(\.|:)([^\s])', r'\1\2 \3', text)
+
+    def roman_replacer(match):
+        roman, sep, next_char = match.groups()
+        return f"{roman}{sep} {next_char}" if _legacy_is_valid_roman_numeral(roman) else match.group(0)
+
+    text = re.sub(r'^([IVXLCDM]{1,10})(\.|:)([^\s])', roman_replacer, text, flags=re.IGNORECASE)
+    text = re.sub(r'^([a-zA-Z])(\.|:)([^\s])', r'\1\2 \3', text)
+    text = re.sub(r'^(\([0-9a-zA-Z]+\))([^\s])', r'\1 \2', text)
+    text = re.sub(r'^(\d+(?:\.\d+)*\.)([^\s])', r'\1 \2', text)
+    text = re.sub(r'(\([^)]+\))([a-zA-Z])', r'\1 \2', text)
+    text = re.sub(r'([a-zA-Z0-9])\(', r'\1 (', text)
+    text = re.sub(r'([a-zA-Z0-9]),([a-zA-Z0-9])', r'\1, \2', text)
+    text = re.sub(r'([a-zA-Z])\.(\d)', r'\1. \2', text)
+    text = re.sub(r'([a-z])\.([A-Z])', r'\1. \2', text)
+    text = re.sub(r'([a-zA-Z])\[', r'\1 [', text)
+    text = re.sub(r'\]([a-zA-Z])', r'] \1', text)
+    text = re.sub(r'([a-zA-Z]):([a-zA-Z])', r'\1: \2', text)
+    text = re.sub(r'([a-zA-Z]);([a-zA-Z])', r'\1; \2', text)
+    text = re.sub(r'([a-zA-Z]{3,})-([a-zA-Z]{3,})', r'\1 - \2', text)
+
+    return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=20000)
+    args = parser.parse_args()
+
+    # Recognized lines: mostly plain text, some with numbering and punctuation
+    rng = random.Random(1)
+    lines = [rng.choice(SAMPLE_LINES + EDGE_CASES) for _ in range(args.lines)]
+    for name, fn in (("re.sub chain", _legacy_fix_text_spacing), ("precompiled", fix_text_spacing)):
+        best = min(timeit.repeat(lambda: [fn(line) for line in lines], number=1, repeat=5))
+        print(f"{name:<13} {args.lines / best:12,.0f} lines/s")
+
+
+if __name__ == "__main__":
+    main()
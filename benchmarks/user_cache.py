@@ -0,0 +1,78 @@
+"""
+User resolution in get_current_user with and without UserCache, against a
+stand-in database that answers after ``--rtt-ms`` (an Atlas round trip).
+
+Checks that ``--concurrency`` simultaneous requests from one user cause a
+single database read, that an update_user invalidation forces a fresh read,
+then reports the mean latency per request and database reads for a client
+polling ``--requests`` times.
+
+Usage (from the repository root):
+    python -m benchmarks.user_cache --concurrency 50 --requests 200 --rtt-ms 40
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from src.backend.user_cache import UserCache
+
+
+class FakeUserStore:
+    """get_user_by_username with a fixed round-trip delay, counting reads"""
+
+    def __init__(self, rtt):
+        self.rtt = rtt
+        self.reads = 0
+        self.email = "user@example.com"
+
+    async def get_user_by_username(self, username):
+        self.reads += 1
+        await asyncio.sleep(self.rtt)
+        return SimpleNamespace(id="64b000000000000000000001", username=username, email=self.email)
+
+
+async def _check(concurrency, rtt):
+    store, cache = FakeUserStore(rtt), UserCache(ttl=30)
+    users = await asyncio.gather(*(cache.get("alice", store.get_user_by_username) for _ in range(concurrency)))
+    assert store.reads == 1, f"{concurrency} concurrent lookups made {store.reads} reads"
+    assert all(user is users[0] for user in users)
+    print(f"{concurrency} concurrent requests -> {store.reads} database read ({cache.stats})")
+
+    await cache.get("alice", store.get_user_by_username)
+    assert store.reads == 1, "cached user was read again"
+
+    store.email = "new@example.com"
+    cache.invalidate(user_id="64b000000000000000000001")  # what UserRepository.update_user does
+    user = await cache.get("alice", store.get_user_by_username)
+    assert store.reads == 2 and user.email == "new@example.com", "update_user did not invalidate the entry"
+    print("update_user invalidation -> fresh read with the new email")
+
+
+async def _poll(requests, rtt, cache):
+    store = FakeUserStore(rtt)
+    start = time.perf_counter()
+    for _ in range(requests):
+        if cache is None:
+            await store.get_user_by_username("alice")
+        else:
+            await cache.get("alice", store.get_user_by_username)
+    return (time.perf_counter() - start) / requests, store.reads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--rtt-ms", type=float, default=40)
+    args = parser.parse_args()
+    rtt = args.rtt_ms / 1000
+
+    asyncio.run(_check(args.concurrency, rtt))
+    for name, cache in (("no cache", None), ("UserCache", UserCache(ttl=30))):
+        latency, reads = asyncio.run(_poll(args.requests, rtt, cache))
+        print(f"{name:<10} {latency * 1000:7.2f} ms/request  {reads:4d} database reads for {args.requests} requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import json
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict, defaultdict
+
+
+def image_key(img):
+    """Hash chính xác của ảnh (mảng numpy): kích thước + toàn bộ pixel"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(img.shape).encode())
+    digest.update(img.tobytes())
+    return digest.hexdigest()
+
+
+def settings_fingerprint(settings):
+    """Hash ngắn của các tham số (model, cấu hình) tạo ra một loại kết quả, dùng làm tiền tố của key cache"""
+    return hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+class LRUCache:
+    """
+    Cache LRU giới hạn theo dung lượng, dùng chung được giữa nhiều luồng.
+
+    Giá trị được lưu dưới dạng pickle nên dung lượng tính theo số byte thực tế.
+    Khi có disk_path, cache dùng thêm LMDB làm tầng lưu trữ thứ hai (dùng chung
+    giữa các process và giữ lại sau khi khởi động lại). Key được chia theo
+    namespace (ví dụ "det", "rec") để thống kê hit rate riêng cho từng loại.
+    Vì LMDB còn lại qua các lần khởi động, key nên chứa fingerprint của model và
+    tham số tạo ra giá trị (settings_fingerprint) để đổi model không trả về kết quả cũ.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, disk_path=None, disk_max_bytes=2 * 1024 ** 3):
+        """
+        Args:
+            max_bytes (int): Dung lượng bộ nhớ tối đa của cache.
+            disk_path (str, optional): Thư mục LMDB để lưu cache xuống đĩa.
+            disk_max_bytes (int): Dung lượng tối đa của LMDB, đầy thì xóa toàn bộ và ghi lại từ đầu.
+        """
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self._env = None
+        if disk_path:
+            import lmdb
+            self._env = lmdb.open(disk_path, map_size=disk_max_bytes, subdir=True, lock=True)
+
+    def _put_memory(self, key, blob):
+        if len(blob) > self.max_bytes:
+            return
+        if key in self._data:
+            self._size -= len(self._data.pop(key))
+        self._data[key] = blob
+        self._size += len(blob)
+        while self._size > self.max_bytes:
+            _, old = self._data.popitem(last=False)
+            self._size -= len(old)
+
+    def get(self, namespace, key):
+        """Trả về giá trị đã cache hoặc None"""
+        full_key = f"{namespace}:{key}"
+        with self._lock:
+            blob = self._data.get(full_key)
+            if blob is not None:
+                self._data.move_to_end(full_key)
+
+        if blob is None and self._env is not None:
+            with self._env.begin() as txn:
+                blob = txn.get(full_key.encode())
+            if blob is not None:
+                with self._lock:
+                    self._put_memory(full_key, blob)
+
+        with self._lock:
+            self._stats[namespace]["hits" if blob is not None else "misses"] += 1
+        return pickle.loads(blob) if blob is not None else None
+
+    def put(self, namespace, key, value):
+        full_key = f"{namespace}:{key}"
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._put_memory(full_key, blob)
+
+        if self._env is not None:
+            try:
+                with self._env.begin(write=True) as txn:
+                    txn.put(full_key.encode(), blob)
+            except Exception as e:
+                # LMDB đầy: xóa dữ liệu cũ rồi ghi lại
+                print(f"Cache LMDB đầy, xóa dữ liệu cũ: {e}")
+                with self._env.begin(write=True) as txn:
+                    txn.drop(self._env.open_db(), delete=False)
+                    txn.put(full_key.encode(), blob)
+
+    @property
+    def stats(self):
+        """Số lần hit/miss và hit rate theo namespace, cùng dung lượng bộ nhớ đang dùng"""
+        with self._lock:
+            stats = {}
+            for namespace, counts in self._stats.items():
+                lookups = counts["hits"] + counts["misses"]
+                stats[namespace] = {**counts, "hit_rate": counts["hits"] / lookups if lookups else 0.0}
+            stats["memory_bytes"] = self._size
+            return stats
@@ -0,0 +1,160 @@
+import io
+import zlib
+import hashlib
+import cv2
+import numpy as np
+from PIL import Image, features
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfdoc
+
+# Các chế độ mã hóa lớp ảnh trong PDF đầu ra
+IMAGE_MODES = ("auto", "lossless", "jpeg", "bilevel")
+
+
+class BilevelImage(pdfdoc.PDFImageXObject):
+    """
+    Ảnh đen trắng 1 bit/pixel (DeviceGray, BitsPerComponent 1) cho lớp ảnh của trang.
+
+    reportlab luôn ghi ảnh 8 bit nên ảnh này tự tạo Image XObject: nén CCITT G4 (như máy scan,
+    cần Pillow có libtiff) hoặc Flate trên các bit đã đóng gói nếu không có libtiff.
+    """
+
+    def __init__(self, bw):
+        """
+        Args:
+            bw (np.ndarray): Ảnh đã ngưỡng (uint8, 0 = đen, 255 = trắng).
+        """
+        self.height, self.width = bw.shape
+        if features.check("libtiff"):
+            self.streamContent, self.filter = self._group4(bw), "CCITTFaxDecode"
+        else:
+            self.streamContent, self.filter = zlib.compress(np.packbits(bw > 127, axis=1).tobytes()), "FlateDecode"
+        self.name = "bilevel" + hashlib.md5(self.streamContent).hexdigest()
+
+    @staticmethod
+    def _group4(bw):
+        """Dữ liệu CCITT G4 của ảnh: TIFF một strip do libtiff nén, lấy phần strip"""
+        # libtiff mã hóa bit 1 thành điểm đen nên truyền mặt nạ điểm đen
+        image = Image.fromarray(bw < 128)
+        buffer = io.BytesIO()
+        image.save(buffer, "TIFF", compression="group4", tiffinfo={278: image.height})  # RowsPerStrip
+        tiff = Image.open(buffer)
+        offset, = tiff.tag_v2[273]  # StripOffsets
+        length, = tiff.tag_v2[279]  # StripByteCounts
+        return buffer.getvalue()[offset:offset + length]
+
+    def format(self, document):
+        stream = pdfdoc.PDFStream(content=self.streamContent)
+        stream.dictionary = pdfdoc.PDFDictionary({
+            "Type": pdfdoc.PDFName("XObject"),
+            "Subtype": pdfdoc.PDFName("Image"),
+            "Width": self.width,
+            "Height": self.height,
+            "BitsPerComponent": 1,
+            "ColorSpace": pdfdoc.PDFName("DeviceGray"),
+            "Filter": pdfdoc.PDFName(self.filter),
+            "Length": len(self.streamContent),
+        })
+        if self.filter == "CCITTFaxDecode":
+            # K -1 = G4, kích thước ảnh; BlackIs1 mặc định false: điểm đen giải mã thành 0 như DeviceGray
+            stream.dictionary["DecodeParms"] = pdfdoc.PDFDictionary(
+                {"K": -1, "Columns": self.width, "Rows": self.height})
+        return stream.format(document)
+
+
+def draw_page_image(c, image, width, height):
+    """
+    Vẽ ảnh trang (kết quả của encode_page_image) vào canvas tại (0, 0) với kích thước width x height.
+    ImageReader đi qua drawImage; BilevelImage được đăng ký thẳng làm XObject như drawImage vẫn làm.
+    """
+    if isinstance(image, ImageReader):
+        c.drawImage(image, 0, 0, width=width, height=height)
+        return
+    c._currentPageHasImages = 1
+    reg_name = c._doc.getXObjectName(image.name)
+    if reg_name not in c._doc.idToObject:
+        c._setXObjects(image)
+        c._doc.Reference(image, reg_name)
+        c._doc.addForm(image.name, image)
+    c.saveState()
+    c.scale(width, height)
+    c._code.append(f"/{reg_name} Do")
+    c.restoreState()
+    c._formsinuse.append(image.name)
+
+
+def analyze_page(img, max_side=512):
+    """
+    Thống kê màu của trang trên bản thu nhỏ.
+
+    Args:
+        img (np.ndarray): Ảnh trang (BGR).
+        max_side (int): Cạnh lớn nhất của bản thu nhỏ dùng để thống kê.
+
+    Returns:
+        tuple: (tỉ lệ pixel có màu, tỉ lệ pixel xám trung gian)
+    """
+    # Lấy mẫu cách đều (không nội suy) để không sinh thêm pixel xám ở viền chữ
+    step = max(1, -(-max(img.shape[:2]) // max_side))
+    img = img[::step, ::step]
+    channels = img.astype(np.int16)
+    chroma = channels.max(axis=2) - channels.min(axis=2)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    colorful = float(np.mean(chroma > 40))
+    midtone = float(np.mean((gray > 64) & (gray < 192)))
+    return colorful, midtone
+
+
+def choose_image_mode(img):
+    """
+    Chọn cách mã hóa theo nội dung trang.
+
+    Returns:
+        tuple: (chế độ, ảnh xám hay không). Trang chỉ có chữ đen trắng -> "bilevel",
+        còn lại -> "jpeg" (xám nếu trang gần như không có màu).
+    """
+    colorful, midtone = analyze_page(img)
+    grayscale = colorful < 0.01
+    if grayscale and midtone < 0.1:
+        return "bilevel", True
+    return "jpeg", grayscale
+
+
+def encode_page_image(img, mode="auto", jpeg_quality=80, scale=1.0):
+    """
+    Mã hóa ảnh trang để chèn vào canvas reportlab.
+
+    Args:
+        img (np.ndarray): Ảnh trang (BGR).
+        mode (str): "auto", "lossless" (Flate RGB như trước), "jpeg" hoặc "bilevel"
+            (ngưỡng Otsu, lưu ảnh 1 bit/pixel nén CCITT G4, xem BilevelImage).
+        jpeg_quality (int): Chất lượng JPEG (1-100).
+        scale (float): Hệ số thu nhỏ ảnh trước khi mã hóa (< 1 để giảm DPI).
+
+    Returns:
+        tuple: (ImageReader hoặc BilevelImage, chế độ đã dùng), vẽ bằng draw_page_image
+    """
+    grayscale = False
+    if mode == "auto":
+        mode, grayscale = choose_image_mode(img)
+    elif mode == "jpeg":
+        grayscale = analyze_page(img)[0] < 0.01
+
+    if scale < 1:
+        height, width = img.shape[:2]
+        img = cv2.resize(img, (max(1, round(width * scale)), max(1, round(height * scale))),
+                         interpolation=cv2.INTER_AREA)
+
+    if mode == "bilevel":
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        _, bw = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return BilevelImage(bw), mode
+
+    if mode == "jpeg":
+        data = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if grayscale else img
+        ok, encoded = cv2.imencode(".jpg", data, [cv2.IMWRITE_JPEG_QUALITY, int(jpeg_quality)])
+        if ok:
+            # ImageReader nhận file JPEG nên reportlab nhúng thẳng (DCTDecode), không giải nén lại
+            return ImageReader(io.BytesIO(encoded.tobytes())), mode
+
+    return ImageReader(Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))), "lossless"
@@ -0,0 +1,188 @@
+import numpy as np
+from reportlab.pdfbase import pdfmetrics
+
+# Một dòng text sau detection: vùng cắt (đã nới và cắt theo biên ảnh) + vị trí/cỡ chữ khi ghi lớp text
+BOX_DTYPE = np.dtype([
+    ("index", np.int32),       # vị trí polygon trong dt_polys
+    ("x1", np.int32), ("y1", np.int32), ("x2", np.int32), ("y2", np.int32),
+    ("score", np.float64),
+    ("x", np.float64), ("y", np.float64),  # điểm bắt đầu drawString (gốc toạ độ PDF ở góc dưới)
+    ("font_size", np.float64),
+    ("width", np.float64),     # chiều rộng polygon, dùng để co giãn cỡ chữ theo text
+])
+
+_GLYPH_WIDTHS = {}  # tên font -> (độ rộng glyph theo code point, độ rộng mặc định)
+
+
+def _glyph_widths(font_name):
+    """Bảng độ rộng glyph (1/1000 cỡ chữ) của font TrueType đã đăng ký, dựng một lần cho mỗi font"""
+    table = _GLYPH_WIDTHS.get(font_name)
+    if table is None:
+        face = pdfmetrics.getFont(font_name).face
+        widths = np.full(max(face.charWidths, default=0) + 1, face.defaultWidth, dtype=np.float64)
+        codes = np.fromiter(face.charWidths.keys(), dtype=np.int64, count=len(face.charWidths))
+        widths[codes] = np.fromiter(face.charWidths.values(), dtype=np.float64, count=len(face.charWidths))
+        table = _GLYPH_WIDTHS[font_name] = (widths, float(face.defaultWidth))
+    return table
+
+
+def text_widths(texts, font_name, font_sizes):
+    """
+    Độ rộng (point) của nhiều dòng text trong một lượt, cùng kết quả với stringWidth từng dòng:
+    code point của mọi dòng được tra trong bảng độ rộng glyph của font rồi cộng theo dòng.
+
+    Args:
+        texts (list): Các dòng text (None được tính là rộng 0).
+        font_name (str): Tên font TrueType đã đăng ký với reportlab.
+        font_sizes (np.ndarray): Cỡ chữ của từng dòng.
+
+    Returns:
+        np.ndarray: Độ rộng của từng dòng.
+    """
+    texts = [text or "" for text in texts]
+    widths, default_width = _glyph_widths(font_name)
+    codes = np.frombuffer("".join(texts).encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    glyphs = np.where(codes < len(widths), widths[np.minimum(codes, len(widths) - 1)], default_width)
+    lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+    ends = np.cumsum(lengths)
+    totals = np.concatenate(([0.0], np.cumsum(glyphs)))
+    return (totals[ends] - totals[ends - lengths]) * np.asarray(font_sizes, dtype=np.float64) / 1000
+
+
+def _poly_bounds(dt_polys):
+    """Toạ độ min/max (N, 2) của các polygon; hỗ trợ cả polygon có số đỉnh khác nhau"""
+    try:
+        polys = np.asarray(dt_polys, dtype=np.float64)
+    except ValueError:
+        polys = None
+    if polys is not None and polys.ndim == 3:
+        return polys.min(axis=1), polys.max(axis=1)
+    polys = [np.asarray(poly, dtype=np.float64) for poly in dt_polys]
+    return np.array([p.min(axis=0) for p in polys]), np.array([p.max(axis=0) for p in polys])
+
+
+def box_layout(dt_polys, dt_scores, img_width, img_height, min_score=0.5, expand=5):
+    """
+    Xử lý toàn bộ box của một trang bằng phép toán mảng NumPy.
+
+    Lọc theo score, lấy bbox của polygon, nới thêm ``expand`` pixel và cắt theo
+    biên ảnh, bỏ box rỗng, đảo thứ tự và tính vị trí/cỡ chữ cho lớp text.
+
+    Args:
+        dt_polys (list | np.ndarray): Polygon kết quả detection (toạ độ pixel).
+        dt_scores (list | np.ndarray): Điểm tin cậy của từng polygon.
+        img_width (int): Chiều rộng ảnh.
+        img_height (int): Chiều cao ảnh.
+        min_score (float): Bỏ các box có score nhỏ hơn ngưỡng này.
+        expand (int): Số pixel nới thêm mỗi phía khi cắt dòng.
+
+    Returns:
+        np.ndarray: Mảng có cấu trúc kiểu BOX_DTYPE, theo thứ tự ghi vào PDF.
+    """
+    if len(dt_polys) == 0:
+        return np.zeros(0, dtype=BOX_DTYPE)
+
+    mins, maxs = _poly_bounds(dt_polys)
+    scores = np.asarray(dt_scores, dtype=np.float64)
+
+    # Vùng cắt: bbox nguyên (cắt phần thập phân như int()), nới rồi kẹp theo biên ảnh
+    x1 = np.maximum(0, np.trunc(mins[:, 0]).astype(np.int64) - expand)
+    y1 = np.maximum(0, np.trunc(mins[:, 1]).astype(np.int64) - expand)
+    x2 = np.minimum(img_width, np.trunc(maxs[:, 0]).astype(np.int64) + expand)
+    y2 = np.minimum(img_height, np.trunc(maxs[:, 1]).astype(np.int64) + expand)
+
+    keep = np.flatnonzero((scores >= min_score) & (x2 > x1) & (y2 > y1))[::-1]
+
+    boxes = np.zeros(len(keep), dtype=BOX_DTYPE)
+    boxes["index"] = keep
+    boxes["x1"], boxes["y1"] = x1[keep], y1[keep]
+    boxes["x2"], boxes["y2"] = x2[keep], y2[keep]
+    boxes["score"] = scores[keep]
+
+    # Vị trí chữ tính theo polygon gốc (chưa nới): chữ cao bằng box, baseline cách đáy 10% chiều cao
+    height = maxs[keep, 1] - mins[keep, 1]
+    boxes["x"] = mins[keep, 0]
+    boxes["y"] = img_height - maxs[keep, 1] + height * 0.1
+    boxes["font_size"] = height
+    boxes["width"] = maxs[keep, 0] - mins[keep, 0]
+    return boxes
+
+
+def _split(starts, ends, min_gap):
+    """
+    Quét các khoảng [start, end) theo thứ tự start, chia nhóm tại các khe trống.
+
+    Returns:
+        tuple: (nhãn nhóm của từng khoảng, khe trống rộng nhất). Nhãn tăng dần theo vị trí,
+        chỉ cắt tại các khe >= min_gap và >= 80% khe rộng nhất.
+    """
+    order = np.argsort(starts, kind="stable")
+    reach = np.maximum.accumulate(ends[order])
+    gaps = starts[order][1:] - reach[:-1]
+    widest = gaps.max() if len(gaps) else 0
+    if widest < min_gap:
+        return None, widest
+    cuts = gaps >= max(min_gap, widest * 0.8)
+    labels = np.empty(len(order), dtype=np.int64)
+    labels[order] = np.concatenate([[0], np.cumsum(cuts)])
+    return labels, widest
+
+
+def _group_lines(idx, y1, y2, x1):
+    """Gom các box của một khối thành dòng (quét theo tâm y), trong dòng sắp theo x"""
+    centers = (y1[idx] + y2[idx]) / 2
+    order = idx[np.argsort(centers, kind="stable")]
+    result, line, bottom = [], [], None
+    for i in order:
+        center = (y1[i] + y2[i]) / 2
+        if line and center > bottom:
+            result.extend(sorted(line, key=lambda j: x1[j]))
+            line = []
+        bottom = y2[i] if not line else min(bottom, y2[i])
+        line.append(i)
+    result.extend(sorted(line, key=lambda j: x1[j]))
+    return result
+
+
+def reading_order(boxes, column_gap=1.5, line_gap=0.3):
+    """
+    Thứ tự đọc của các box trên trang: cột trước, dòng sau (recursive XY-cut).
+
+    Mỗi khối được cắt theo trục có khe trống rộng hơn: khe dọc (giữa các cột, tối thiểu
+    column_gap lần chiều cao dòng trung vị) hoặc khe ngang (giữa các đoạn/dòng, tối thiểu
+    line_gap lần). Khối không cắt được nữa được gom thành dòng, trong dòng đọc từ trái sang phải.
+
+    Args:
+        boxes (np.ndarray): Mảng BOX_DTYPE (dùng vùng x1, y1, x2, y2).
+        column_gap (float): Khe dọc tối thiểu để tách cột, theo chiều cao dòng.
+        line_gap (float): Khe ngang tối thiểu để tách khối, theo chiều cao dòng.
+
+    Returns:
+        np.ndarray: Chỉ số của boxes theo thứ tự đọc.
+    """
+    if len(boxes) < 2:
+        return np.arange(len(boxes))
+
+    x1, y1 = boxes["x1"].astype(np.float64), boxes["y1"].astype(np.float64)
+    x2, y2 = boxes["x2"].astype(np.float64), boxes["y2"].astype(np.float64)
+    height = float(np.median(y2 - y1)) or 1.0
+    min_x_gap, min_y_gap = column_gap * height, line_gap * height
+
+    result = []
+    stack = [np.arange(len(boxes))]
+    while stack:
+        idx = stack.pop()
+        if len(idx) > 1:
+            x_labels, x_gap = _split(x1[idx], x2[idx], min_x_gap)
+            y_labels, y_gap = _split(y1[idx], y2[idx], min_y_gap)
+            # Cắt theo khe trống rộng nhất: khe giữa hai cột thường rộng hơn khoảng cách giữa các dòng
+            if x_labels is not None and (y_labels is None or x_gap >= y_gap):
+                labels = x_labels
+            else:
+                labels = y_labels
+            if labels is not None:
+                # Stack LIFO: đẩy khối cuối vào trước để khối đầu (trên cùng / trái nhất) được xử lý trước
+                stack.extend(idx[labels == label] for label in range(labels.max(), -1, -1))
+                continue
+        result.extend(_group_lines(idx, y1, y2, x1))
+    return np.asarray(result, dtype=np.int64)
@@ -0,0 +1,119 @@
+import time
+import threading
+from bisect import bisect_left
+from contextlib import nullcontext
+
+# Ngưỡng trên (giây) của các bucket histogram, thêm một bucket +Inf ở cuối (theo quy ước Prometheus)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _Timer:
+    """Context manager đo thời gian một lần chạy stage và ghi vào histogram"""
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class StageMetrics:
+    """
+    Thời gian theo stage (histogram) và bộ đếm của quá trình OCR.
+
+    Dùng chung được giữa các luồng của pipeline. snapshot() trả về dict thường
+    (pickle được) để gửi từ worker về API, merge() cộng dồn snapshot của nhiều job.
+    """
+    enabled = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}    # tên stage -> {"count", "sum", "buckets"} (bucket không cộng dồn)
+        self.counters = {}  # tên -> giá trị
+
+    def time(self, stage):
+        """Context manager đo thời gian của ``stage``"""
+        return _Timer(self, stage)
+
+    def observe(self, stage, seconds, count=1):
+        """
+        Ghi nhận ``count`` lần chạy của ``stage``, mỗi lần ``seconds`` giây
+        (dùng cho stage chạy theo batch: thời gian cả batch chia đều cho từng phần tử).
+        """
+        bucket = bisect_left(BUCKETS, seconds)
+        with self._lock:
+            hist = self.stages.get(stage)
+            if hist is None:
+                hist = self.stages[stage] = {"count": 0, "sum": 0.0, "buckets": [0] * (len(BUCKETS) + 1)}
+            hist["count"] += count
+            hist["sum"] += seconds * count
+            hist["buckets"][bucket] += count
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "stages": {stage: {**hist, "buckets": list(hist["buckets"])} for stage, hist in self.stages.items()},
+                "counters": dict(self.counters),
+            }
+
+    def merge(self, snapshot):
+        """Cộng dồn một snapshot (ví dụ của một job vừa xong) vào thống kê này"""
+        if not snapshot:
+            return
+        with self._lock:
+            for stage, other in snapshot.get("stages", {}).items():
+                hist = self.stages.get(stage)
+                if hist is None:
+                    self.stages[stage] = {**other, "buckets": list(other["buckets"])}
+                    continue
+                hist["count"] += other["count"]
+                hist["sum"] += other["sum"]
+                hist["buckets"] = [a + b for a, b in zip(hist["buckets"], other["buckets"])]
+            for name, value in snapshot.get("counters", {}).items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    @staticmethod
+    def breakdown(snapshot):
+        """Bản tóm tắt gọn của một snapshot để lưu cùng kết quả job: tổng thời gian và số lần mỗi stage"""
+        if not snapshot:
+            return None
+        return {
+            "stages": {stage: {"count": hist["count"], "seconds": round(hist["sum"], 4)}
+                       for stage, hist in snapshot["stages"].items()},
+            "counters": dict(snapshot["counters"]),
+        }
+
+
+class _NullMetrics:
+    """Bản tắt của StageMetrics: mọi lệnh ghi đều bỏ qua"""
+    enabled = False
+    _timer = nullcontext()
+
+    def time(self, stage):
+        return self._timer
+
+    def observe(self, stage, seconds, count=1):
+        pass
+
+    def inc(self, name, value=1):
+        pass
+
+    def snapshot(self):
+        return {}
+
+    def merge(self, snapshot):
+        pass
+
+
+NULL_METRICS = _NullMetrics()
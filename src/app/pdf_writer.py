@@ -0,0 +1,227 @@
+import os
+import copy
+import shutil
+import subprocess
+from PyPDF2 import PdfReader
+from PyPDF2.generic import (ArrayObject, DictionaryObject, IndirectObject, NameObject,
+                            NullObject, NumberObject, StreamObject)
+
+
+class StreamingPdfWriter:
+    """
+    Ghi file PDF nhiều trang theo kiểu streaming (một lượt, không qua PdfMerger).
+
+    Mỗi trang được sao chép (cùng các object nó tham chiếu) vào file đầu ra ngay
+    khi được thêm vào rồi giải phóng khỏi bộ nhớ; chỉ vị trí các object được giữ
+    lại để ghi bảng xref ở cuối. Bộ nhớ vì vậy không tăng theo số trang.
+    """
+
+    def __init__(self, output_path):
+        """
+        Args:
+            output_path (str): Đường dẫn file PDF đầu ra.
+        """
+        self.output_path = output_path
+        self._f = open(output_path, "wb")
+        self._f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._offsets = [None]  # object id -> vị trí trong file (object 0 luôn free)
+        self._page_ids = []
+        self._pages_id = self._reserve()
+        # PdfReader gốc -> {(idnum, generation) -> object id đầu ra}, giữ suốt tài liệu để
+        # object dùng chung giữa các trang (font, /Resources, XObject) chỉ được ghi một lần
+        self._source_maps = {}
+
+    def _reserve(self):
+        self._offsets.append(None)
+        return len(self._offsets) - 1
+
+    def _write_object(self, obj_id, obj):
+        self._offsets[obj_id] = self._f.tell()
+        self._f.write(f"{obj_id} 0 obj\n".encode())
+        obj.write_to_stream(self._f, None)
+        self._f.write(b"\nendobj\n")
+
+    def _remap(self, obj, mapping, pending):
+        """Sao chép object, đổi các tham chiếu gián tiếp sang số object mới trong file đầu ra"""
+        if isinstance(obj, IndirectObject):
+            key = (obj.idnum, obj.generation)
+            if key not in mapping:
+                mapping[key] = self._reserve()
+                pending.append(obj)
+            return IndirectObject(mapping[key], 0, None)
+        if isinstance(obj, StreamObject):
+            # Giữ nguyên dữ liệu stream đã nén, chỉ sao chép phần dictionary
+            new = copy.copy(obj)
+            for key, value in list(obj.items()):
+                new[key] = self._remap(value, mapping, pending)
+            return new
+        if isinstance(obj, DictionaryObject):
+            new = DictionaryObject()
+            for key, value in obj.items():
+                new[key] = self._remap(value, mapping, pending)
+            return new
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(self._remap(value, mapping, pending) for value in obj)
+        return obj
+
+    def add_page(self, page, mapping=None):
+        """
+        Ghi ngay một trang (PageObject của PdfReader) vào file đầu ra.
+
+        Args:
+            page (PageObject): Trang cần ghi.
+            mapping (dict): Bảng tham chiếu gốc -> object đầu ra dùng chung cho các trang
+                của cùng một PdfReader; object đã có trong bảng không được ghi lại.
+        """
+        page_id = self._reserve()
+        mapping = {} if mapping is None else mapping
+        pending = []
+        own_ref = getattr(page, "indirect_reference", None)
+        if own_ref is not None:
+            mapping[(own_ref.idnum, own_ref.generation)] = page_id
+
+        page_dict = DictionaryObject({key: value for key, value in page.items() if key != "/Parent"})
+        new_page = self._remap(page_dict, mapping, pending)
+        new_page[NameObject("/Parent")] = IndirectObject(self._pages_id, 0, None)
+        self._write_object(page_id, new_page)
+
+        while pending:
+            ref = pending.pop()
+            new_id = mapping[(ref.idnum, ref.generation)]
+            obj = ref.get_object()
+            if obj is None or (isinstance(obj, DictionaryObject) and obj.get("/Type") in ("/Page", "/Pages")):
+                # Tham chiếu tới trang khác (ví dụ đích của link) không được sao chép kèm
+                self._write_object(new_id, NullObject())
+            else:
+                self._write_object(new_id, self._remap(obj, mapping, pending))
+        self._page_ids.append(page_id)
+
+    def add_pdf(self, source):
+        """Ghi toàn bộ các trang của một PDF (đường dẫn hoặc file object)"""
+        reader = PdfReader(source)
+        for page in reader.pages:
+            self.add_page(page)
+
+    def add_source_page(self, reader, index):
+        """
+        Ghi trang ``index`` của PdfReader gốc, rồi bỏ cache object để bộ nhớ không tăng dần.
+        Bảng tham chiếu của reader được giữ lại (chỉ gồm số object), nên font và tài nguyên
+        dùng chung đã ghi ở trang trước không bị ghi lại.
+        """
+        mapping = self._source_maps.setdefault(reader, {})
+        self.add_page(reader.pages[index], mapping)
+        reader.resolved_objects.clear()
+
+    def close(self):
+        """Ghi cây trang, catalog, bảng xref và đóng file"""
+        pages = DictionaryObject({
+            NameObject("/Type"): NameObject("/Pages"),
+            NameObject("/Kids"): ArrayObject(IndirectObject(page_id, 0, None) for page_id in self._page_ids),
+            NameObject("/Count"): NumberObject(len(self._page_ids)),
+        })
+        self._write_object(self._pages_id, pages)
+
+        catalog_id = self._reserve()
+        self._write_object(catalog_id, DictionaryObject({
+            NameObject("/Type"): NameObject("/Catalog"),
+            NameObject("/Pages"): IndirectObject(self._pages_id, 0, None),
+        }))
+
+        xref_offset = self._f.tell()
+        self._f.write(f"xref\n0 {len(self._offsets)}\n".encode())
+        self._f.write(b"0000000000 65535 f \n")
+        for offset in self._offsets[1:]:
+            self._f.write(f"{offset:010d} 00000 n \n".encode())
+        self._f.write(f"trailer\n<< /Size {len(self._offsets)} /Root {catalog_id} 0 R >>\n"
+                      f"startxref\n{xref_offset}\n%%EOF\n".encode())
+        self._f.close()
+        return self.output_path
+
+    def abort(self):
+        """Đóng và xóa file đang ghi dở khi có lỗi"""
+        self._f.close()
+        if os.path.exists(self.output_path):
+            os.remove(self.output_path)
+
+
+class DocumentAssembler:
+    """
+    Ghép PDF kết quả của một tài liệu khi các trang OCR xong lần lượt (theo đúng thứ tự trang).
+
+    Trang được giữ nguyên (đã có lớp text) được chép từ file gốc vào đúng vị trí,
+    tài liệu chỉ có một trang được ghi thẳng ra file không qua StreamingPdfWriter.
+    """
+
+    def __init__(self, input_path, output_path, num_pages, skipped=()):
+        """
+        Args:
+            input_path (str): File gốc, nguồn của các trang giữ nguyên.
+            output_path (str): Đường dẫn file PDF đầu ra.
+            num_pages (int): Tổng số trang của tài liệu.
+            skipped (set): Chỉ số (từ 0) các trang giữ nguyên, không OCR.
+        """
+        self.input_path = input_path
+        self.output_path = output_path
+        self.num_pages = num_pages
+        self.skipped = skipped
+        self._writer = None
+        self._source = None
+        self._next_page = 0
+
+    def _copy_source_pages(self, until):
+        while self._next_page < until:
+            if self._source is None:
+                self._source = PdfReader(self.input_path)
+            self._writer.add_source_page(self._source, self._next_page)
+            self._next_page += 1
+
+    def add(self, index, page_pdf):
+        """Thêm PDF một trang (file object) đã OCR của trang ``index``"""
+        if self.num_pages == 1:
+            with open(self.output_path, "wb") as f:
+                f.write(page_pdf.getvalue())
+            self._next_page = 1
+            return
+        if self._writer is None:
+            self._writer = StreamingPdfWriter(self.output_path)
+        self._copy_source_pages(index)
+        self._writer.add_pdf(page_pdf)
+        self._next_page = index + 1
+
+    def close(self):
+        """Chép các trang giữ nguyên còn lại và hoàn tất file"""
+        if self._writer is not None:
+            self._copy_source_pages(self.num_pages)
+            self._writer.close()
+        return self.output_path
+
+    def abort(self):
+        """Xóa file đang ghi dở khi có lỗi"""
+        if self._writer is not None:
+            self._writer.abort()
+        elif self.num_pages == 1 and os.path.exists(self.output_path):
+            os.remove(self.output_path)
+
+
+def linearize_pdf(path):
+    """
+    Linearize ("fast web view") file PDF tại chỗ bằng qpdf: trang đầu và bảng tra cứu được
+    đặt ở đầu file để trình xem hiển thị được trang đầu trước khi tải xong cả file.
+
+    Returns:
+        bool: False nếu không có qpdf (file giữ nguyên).
+    """
+    qpdf = shutil.which("qpdf")
+    if qpdf is None:
+        return False
+    tmp_path = f"{path}.linearized"
+    try:
+        # Mã thoát 3 = thành công nhưng có cảnh báo (file đầu vào có lỗi nhỏ đã được sửa)
+        result = subprocess.run([qpdf, "--linearize", path, tmp_path], capture_output=True)
+        if result.returncode not in (0, 3):
+            raise RuntimeError(result.stderr.decode(errors="replace").strip())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return True
@@ -0,0 +1,140 @@
+import queue
+import threading
+
+# Đánh dấu stage phía trước đã hết dữ liệu
+_DONE = object()
+
+
+class _Failure:
+    """Lỗi xảy ra ở một stage, được chuyển tiếp qua các stage sau đến nơi nhận kết quả"""
+
+    def __init__(self, error):
+        self.error = error
+
+
+class StagePipeline:
+    """
+    Pipeline producer/consumer gồm nhiều stage chạy chồng lên nhau.
+
+    Mỗi stage có một hoặc nhiều luồng worker, hai stage liên tiếp được nối bằng
+    queue có giới hạn để bộ nhớ không tăng theo số trang. Kết quả luôn được trả
+    về đúng thứ tự đầu vào; số phần tử đang xử lý (kể cả kết quả xong trước đang
+    chờ phần tử cũ hơn để sắp xếp lại) không vượt quá ``window``.
+    """
+
+    def __init__(self, stages, queue_size=4, window=None):
+        """
+        Args:
+            stages (list): Danh sách (tên, hàm, số worker). Hàm nhận đầu ra của stage trước.
+            queue_size (int): Số phần tử tối đa chờ giữa hai stage.
+            window (int): Số phần tử tối đa đã đưa vào pipeline mà chưa được trả về, tính từ phần
+                tử cũ nhất chưa xong. Mặc định đủ để mọi worker bận và mọi queue đầy.
+        """
+        self.stages = [(name, fn, max(1, int(workers))) for name, fn, workers in stages]
+        self.queue_size = max(1, int(queue_size))
+        if window is None:
+            window = sum(workers for _, _, workers in self.stages) + self.queue_size * (len(self.stages) + 1)
+        self.window = max(1, int(window))
+
+    def run(self, items):
+        """
+        Chạy pipeline trên iterable ``items``.
+
+        Yields:
+            Kết quả của stage cuối, theo thứ tự đầu vào. Lỗi ở bất kỳ stage nào
+            được raise lại khi đến lượt phần tử đó.
+        """
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        # Một phần tử chậm không làm kết quả của các phần tử sau nó dồn lại không giới hạn:
+        # feed chỉ đưa phần tử mới vào khi phần tử cũ nhất đã được trả về
+        window = threading.Semaphore(self.window)
+        stop = threading.Event()
+        lock = threading.Lock()
+        remaining = [workers for _, _, workers in self.stages]
+
+        def put(q, entry):
+            while not stop.is_set():
+                try:
+                    q.put(entry, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def get(q):
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            return None
+
+        def feed():
+            try:
+                for idx, item in enumerate(items):
+                    while not window.acquire(timeout=0.1):
+                        if stop.is_set():
+                            return
+                    if not put(queues[0], (idx, item)):
+                        return
+            except Exception as e:
+                put(queues[-1], (-1, _Failure(e)))
+            for _ in range(self.stages[0][2]):
+                put(queues[0], _DONE)
+
+        def work(stage_idx, fn):
+            in_q, out_q = queues[stage_idx], queues[stage_idx + 1]
+            while True:
+                entry = get(in_q)
+                if entry is None:
+                    return
+                if entry is _DONE:
+                    break
+                idx, value = entry
+                if not isinstance(value, _Failure):
+                    try:
+                        value = fn(value)
+                    except Exception as e:
+                        value = _Failure(e)
+                if not put(out_q, (idx, value)):
+                    return
+
+            # Worker cuối cùng của stage báo cho stage sau là đã hết dữ liệu
+            with lock:
+                remaining[stage_idx] -= 1
+                last = remaining[stage_idx] == 0
+            if last:
+                next_workers = self.stages[stage_idx + 1][2] if stage_idx + 1 < len(self.stages) else 1
+                for _ in range(next_workers):
+                    put(out_q, _DONE)
+
+        threads = [threading.Thread(target=feed, name="pipeline-feed", daemon=True)]
+        for stage_idx, (name, fn, workers) in enumerate(self.stages):
+            for n in range(workers):
+                threads.append(threading.Thread(target=work, args=(stage_idx, fn),
+                                                name=f"pipeline-{name}-{n}", daemon=True))
+        for thread in threads:
+            thread.start()
+
+        try:
+            pending, next_idx = {}, 0
+            while True:
+                entry = queues[-1].get()
+                if entry is _DONE:
+                    break
+                idx, value = entry
+                if idx < 0:
+                    raise value.error
+                pending[idx] = value
+                # Sắp xếp lại kết quả theo thứ tự đầu vào
+                while next_idx in pending:
+                    value = pending.pop(next_idx)
+                    window.release()
+                    if isinstance(value, _Failure):
+                        raise value.error
+                    yield value
+                    next_idx += 1
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
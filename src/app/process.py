@@ -1,21 +1,31 @@
+import io
 import os
+import shutil
 import numpy as np
 import cv2
 import torch
-import shutil
 import pypdfium2
 import re
+import math
 import time
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
 from PIL import Image
 from paddlex import create_model
 from vietocr.tool.predictor import Predictor
 from vietocr.tool.config import Cfg
-from PyPDF2 import PdfMerger
+from vietocr.tool.translate import process_image, translate
+from src.app.pipeline import StagePipeline
+from src.app.cache import LRUCache, image_key, settings_fingerprint
+from src.app.pdf_writer import DocumentAssembler, linearize_pdf
+from src.app.image_layer import IMAGE_MODES, draw_page_image, encode_page_image
+from src.app.layout import box_layout, reading_order, text_widths
+from src.app.text_spacing import fix_text_spacing, is_valid_roman_numeral
+from src.app.metrics import NULL_METRICS
 from reportlab.pdfgen import canvas
-from reportlab.lib.colors import Color
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfbase.pdfmetrics import stringWidth
 
 
 def get_available_device():
@@ -42,31 +52,121 @@ def get_available_device():
 
 
 class Process:
-    def __init__(self, weights_url=None):
+    def __init__(self, weights_url=None, rec_batch_size=32, rec_bucket_width=10,
+                 pipeline=False, det_workers=1, rec_workers=1, pipeline_queue_size=4, det_batch_size=4,
+                 cache_max_mb=256, cache_dir=None, skip_text_pages=True, min_text_chars=50,
+                 image_mode="auto", jpeg_quality=80, image_dpi=None,
+                 render_dpi=150, render_max_side=4000, det_max_side=1600, weights_dir=None,
+                 det_model_name="PP-OCRv5_server_det", rec_model_name="vgg_seq2seq",
+                 rec_quantize=False, rec_torchscript=False, torch_threads=0, linearize=False):
         """
         Khởi tạo class Det_Rec
 
         Args:
             weights_url (str): URL weights cho VietOCR (mặc định: sử dụng weights online)
+            rec_batch_size (int): Số dòng text tối đa mỗi batch nhận dạng (1 = nhận dạng từng dòng)
+            rec_bucket_width (int): Độ rộng mỗi nhóm (bucket) khi gom các dòng theo chiều rộng
+            pipeline (bool): Xử lý PDF theo pipeline render -> detection -> recognition chạy chồng lên nhau
+            det_workers (int): Số luồng cho stage detection khi bật pipeline. Mỗi luồng dùng một
+                predictor detection riêng (nạp thêm khi cần) nên tốn thêm bộ nhớ cho mỗi luồng
+            rec_workers (int): Số luồng cho stage recognition + ghi PDF khi bật pipeline
+            pipeline_queue_size (int): Số nhóm trang tối đa chờ giữa hai stage của pipeline
+            det_batch_size (int): Số trang PDF đưa vào model detection trong một lần gọi
+            cache_max_mb (int): Dung lượng bộ nhớ tối đa của cache kết quả detection/recognition (0 = tắt)
+            cache_dir (str, optional): Thư mục LMDB để lưu cache xuống đĩa
+            skip_text_pages (bool): Giữ nguyên (không OCR) các trang PDF đã có lớp text
+            min_text_chars (int): Số ký tự chữ/số tối thiểu để coi một trang là đã có lớp text
+            image_mode (str): Cách mã hóa lớp ảnh trong PDF đầu ra: "auto" (chọn theo màu của trang),
+                "lossless", "jpeg" hoặc "bilevel"
+            jpeg_quality (int): Chất lượng JPEG (1-100) khi lớp ảnh được mã hóa JPEG
+            image_dpi (int, optional): Thu nhỏ lớp ảnh xuống DPI này nếu ảnh trang có độ phân giải cao hơn
+            render_dpi (int): Độ phân giải render trang PDF (ảnh này được dùng để cắt dòng cho recognition)
+            render_max_side (int): Cạnh dài tối đa (pixel) của ảnh render, trang khổ lớn được render ở DPI thấp hơn (0 = không giới hạn)
+            det_max_side (int): Ảnh có cạnh dài hơn ngưỡng này được thu nhỏ trước khi đưa vào detection,
+                box được quy đổi lại về ảnh gốc (0 = detection trên ảnh gốc)
+            weights_dir (str, optional): Chỉ nạp model từ thư mục này, không tải gì qua mạng. Thư mục chứa
+                <rec_model_name>.pth (VietOCR) và thư mục <det_model_name> (model PaddleX đã export)
+            det_model_name (str): Model detection của PaddleX, ví dụ "PP-OCRv5_server_det" hoặc "PP-OCRv5_mobile_det"
+            rec_model_name (str): Cấu hình VietOCR, ví dụ "vgg_seq2seq" hoặc "vgg_transformer"
+            rec_quantize (bool): Lượng tử hóa động int8 các lớp Linear/LSTM/GRU của model nhận dạng (chỉ CPU)
+            rec_torchscript (bool): Trace + freeze backbone CNN của model nhận dạng bằng TorchScript (chỉ CPU)
+            torch_threads (int): Số luồng torch.set_num_threads cho inference trên CPU (0 = mặc định của torch)
+            linearize (bool): Linearize PDF đầu ra ("fast web view", cần qpdf) để trình xem hiển thị
+                trang đầu trước khi tải xong
         """
+        if image_mode not in IMAGE_MODES:
+            raise ValueError(f"image_mode không hợp lệ: {image_mode} (hỗ trợ: {', '.join(IMAGE_MODES)})")
+        self.rec_batch_size = max(1, int(rec_batch_size))
+        self.rec_bucket_width = max(1, int(rec_bucket_width))
+        self.pipeline = pipeline
+        self.det_workers = max(1, int(det_workers))
+        self.rec_workers = max(1, int(rec_workers))
+        self.pipeline_queue_size = max(1, int(pipeline_queue_size))
+        self.det_batch_size = max(1, int(det_batch_size))
+        self.skip_text_pages = skip_text_pages
+        self.min_text_chars = max(1, int(min_text_chars))
+        self.image_mode = image_mode
+        self.jpeg_quality = min(100, max(1, int(jpeg_quality)))
+        self.image_dpi = int(image_dpi) if image_dpi else None
+        self.render_dpi = max(1, int(render_dpi))
+        self.render_max_side = max(0, int(render_max_side))
+        self.det_max_side = max(0, int(det_max_side))
+        self.linearize = linearize
+        # Cache theo hash ảnh: trang giống nhau bỏ qua detection, dòng giống nhau bỏ qua recognition
+        self.cache = LRUCache(cache_max_mb * 1024 * 1024, disk_path=cache_dir) if cache_max_mb > 0 else None
+        # Cache LMDB còn lại sau khi khởi động lại: key chứa fingerprint của model và tham số tạo ra kết quả
+        self._cache_fingerprints = {
+            "det": settings_fingerprint({"model": det_model_name, "weights_dir": weights_dir,
+                                         "det_max_side": self.det_max_side}),
+            "rec": settings_fingerprint({"model": rec_model_name, "weights_url": weights_url,
+                                         "weights_dir": weights_dir, "quantize": rec_quantize,
+                                         "torchscript": rec_torchscript}),
+        }
+
         # Đăng ký font
         font_path = "font/times.ttf"
         pdfmetrics.registerFont(TTFont('TimesNewRoman', font_path))
 
+        if torch_threads and int(torch_threads) > 0:
+            torch.set_num_threads(int(torch_threads))
+
+        self._load_models(weights_url, weights_dir, det_model_name, rec_model_name, rec_quantize, rec_torchscript)
+        # Predictor detection rảnh, mượn qua _det_predictor (predictor PaddleX không thread-safe)
+        self._det_models = [self.det_model]
+        self._det_lock = threading.Lock()
+        print("Đã khởi tạo Det_Rec thành công!")
+
+    def _load_models(self, weights_url, weights_dir, det_model_name, rec_model_name,
+                     rec_quantize=False, rec_torchscript=False):
+        """
+        Nạp model nhận dạng (VietOCR, self.rec_model) và detection (PaddleX, self.det_model).
+        Tham số giống các tham số cùng tên của __init__.
+        """
         # Tự động phát hiện thiết bị
         device = get_available_device()
         print(f"Thiết bị sử dụng: {device}")
 
         # Cấu hình VietOCR
-        config = Cfg.load_config_from_name('vgg_seq2seq')
+        config = Cfg.load_config_from_name(rec_model_name)
         config['device'] = device
 
-        if weights_url:
+        det_model_dir = None
+        if weights_dir:
+            weights_path = os.path.join(weights_dir, f"{rec_model_name}.pth")
+            det_model_dir = os.path.join(weights_dir, det_model_name)
+            for path in (weights_path, det_model_dir):
+                if not os.path.exists(path):
+                    raise FileNotFoundError(f"Không tìm thấy weights: {path}")
+            config['weights'] = weights_path
+            config['pretrain'] = weights_path
+            # Không tải weights ImageNet của backbone, toàn bộ weights lấy từ file trên
+            config['cnn']['pretrained'] = False
+        elif weights_url:
             config['weights'] = weights_url
             config['pretrain'] = weights_url
         else:
-            config['weights'] = 'https://vocr.vn/data/vietocr/vgg_seq2seq.pth'
-            config['pretrain'] = 'https://vocr.vn/data/vietocr/vgg_seq2seq.pth'
+            config['weights'] = f'https://vocr.vn/data/vietocr/{rec_model_name}.pth'
+            config['pretrain'] = f'https://vocr.vn/data/vietocr/{rec_model_name}.pth'
 
         # Khởi tạo models với error handling
         try:
@@ -83,172 +183,348 @@ class Process:
             else:
                 raise e
 
+        if rec_quantize or rec_torchscript:
+            self.optimize_rec_model(quantize=rec_quantize, torchscript=rec_torchscript)
+
+        self._det_model_args = {"model_name": det_model_name, "model_dir": det_model_dir}
         try:
             # Khởi tạo PaddleOCR detection model
-            self.det_model = create_model(model_name="PP-OCRv5_server_det")
+            self.det_model = self._create_det_model()
             print("PaddleOCR detection model khởi tạo thành công")
         except Exception as e:
             print(f"Error initializing PaddleOCR: {e}")
             raise e
 
-        print("Đã khởi tạo Det_Rec thành công!")
+    def _create_det_model(self):
+        """Tạo một predictor detection (PaddleX) mới theo model đã chọn khi khởi tạo"""
+        return create_model(**self._det_model_args)
+
+    @contextmanager
+    def _det_predictor(self):
+        """
+        Mượn một predictor detection để dùng riêng trong luồng hiện tại.
+
+        Predictor PaddleX không thread-safe: predict() đổi batch size của batch sampler dùng chung
+        và handle inference của Paddle không cho gọi đồng thời. Vì vậy mỗi lần detection chạy song
+        song (nhiều luồng detect của pipeline, nhiều job trong thread mode) dùng một predictor
+        riêng: predictor rảnh được dùng lại, hết thì tạo thêm và giữ lại cho lần sau.
+        """
+        with self._det_lock:
+            model = self._det_models.pop() if self._det_models else None
+        if model is None:
+            model = self._create_det_model()
+        try:
+            yield model
+        finally:
+            with self._det_lock:
+                self._det_models.append(model)
+
+    def optimize_rec_model(self, quantize=False, torchscript=False):
+        """
+        Tối ưu model nhận dạng cho inference trên CPU.
+
+        Args:
+            quantize (bool): Lượng tử hóa động int8 (torch.quantization.quantize_dynamic) các lớp
+                Linear/LSTM/GRU của encoder/decoder.
+            torchscript (bool): Trace backbone CNN (phần tốn nhiều thời gian nhất) với một ảnh mẫu,
+                freeze và gộp conv + batchnorm. Vòng giải mã phụ thuộc dữ liệu nên vẫn chạy eager.
+        """
+        config = self.rec_model.config
+        if config['device'] != 'cpu':
+            print("Bỏ qua tối ưu int8/TorchScript: chỉ hỗ trợ khi chạy trên CPU")
+            return
+
+        model = self.rec_model.model.eval()
+        if quantize:
+            # Lượng tử hóa trước khi trace: quantize_dynamic chỉ thay được các module Python thường
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear, torch.nn.LSTM, torch.nn.GRU},
+                                                        dtype=torch.qint8)
+            print("Đã lượng tử hóa int8 model nhận dạng")
+        if torchscript:
+            height = config['dataset']['image_height']
+            example = torch.ones(1, 3, height, config['dataset']['image_max_width'])
+            with torch.no_grad():
+                traced = torch.jit.trace(model.cnn, example, check_trace=False)
+                model.cnn = torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+            print("Đã trace backbone CNN bằng TorchScript")
+        self.rec_model.model = model
 
     def is_valid_roman_numeral(self, s):
         """Kiểm tra xem chuỗi có phải số La Mã hợp lệ không"""
-        pattern = r'^M{0,4}(CM|CD|D?C{0,3})(XC|XL|L?X{0,3})(IX|IV|V?I{0,3})$'
-        return bool(re.match(pattern, s.upper()))
+        return is_valid_roman_numeral(s)
 
     def fix_text_spacing(self, text):
         """Sửa khoảng cách trong text"""
-        if not text or not text.strip():
-            return text
-
-        # Các quy tắc sửa khoảng cách
-        text = re.sub(r'^(\d{1,2})(\.|:)([^\s])', r'\1\2 \3', text)
-        text = re.sub(r'^(\d{1,2})\s+(\.|:)([^\s])', r'\1\2 \3', text)
-
-        def roman_replacer(match):
-            roman, sep, next_char = match.groups()
-            return f"{roman}{sep} {next_char}" if self.is_valid_roman_numeral(roman) else match.group(0)
-
-        text = re.sub(r'^([IVXLCDM]{1,10})(\.|:)([^\s])', roman_replacer, text, flags=re.IGNORECASE)
-        text = re.sub(r'^([a-zA-Z])(\.|:)([^\s])', r'\1\2 \3', text)
-        text = re.sub(r'^(\([0-9a-zA-Z]+\))([^\s])', r'\1 \2', text)
-        text = re.sub(r'^(\d+(?:\.\d+)*\.)([^\s])', r'\1 \2', text)
-        text = re.sub(r'(\([^)]+\))([a-zA-Z])', r'\1 \2', text)
-        text = re.sub(r'([a-zA-Z0-9])\(', r'\1 (', text)
-        text = re.sub(r'([a-zA-Z0-9]),([a-zA-Z0-9])', r'\1, \2', text)
-        text = re.sub(r'([a-zA-Z])\.(\d)', r'\1. \2', text)
-        text = re.sub(r'([a-z])\.([A-Z])', r'\1. \2', text)
-        text = re.sub(r'([a-zA-Z])\[', r'\1 [', text)
-        text = re.sub(r'\]([a-zA-Z])', r'] \1', text)
-        text = re.sub(r'([a-zA-Z]):([a-zA-Z])', r'\1: \2', text)
-        text = re.sub(r'([a-zA-Z]);([a-zA-Z])', r'\1; \2', text)
-        text = re.sub(r'([a-zA-Z]{3,})-([a-zA-Z]{3,})', r'\1 - \2', text)
-
-        return text
-
-    def calculate_font_size_and_position(self, coord, text, img_height):
-        """Tính toán kích thước font và vị trí"""
-        x_coords = [p[0] for p in coord]
-        y_coords = [p[1] for p in coord]
-        bbox_width = max(x_coords) - min(x_coords)
-        bbox_height = max(y_coords) - min(y_coords)
-        font_size = bbox_height * 1.0
-        x = min(x_coords)
-        y = img_height - max(y_coords) + (bbox_height * 0.1)
-        return x, y, font_size, bbox_width, bbox_height
-
-    def adjust_font_size_to_fit_width(self, text, bbox_width, font_size, font_name="TimesNewRoman"):
-        """Điều chỉnh kích thước font để phù hợp với chiều rộng"""
+        return fix_text_spacing(text)
+
+    def horizontal_scales_to_fit_width(self, texts, bbox_widths, font_sizes, font_name="TimesNewRoman"):
+        """
+        Tỉ lệ co giãn ngang (%) của mọi dòng một trang trong một lượt: độ rộng text được tính từ
+        bảng độ rộng glyph của font (text_widths) thay vì gọi stringWidth cho từng dòng.
+        Dòng rộng 0 (rỗng hoặc None) giữ tỉ lệ 100.
+        """
+        widths = text_widths(texts, font_name, font_sizes)
+        fits = np.divide(100 * np.asarray(bbox_widths, dtype=np.float64), widths,
+                         out=np.full(len(widths), 100.0), where=widths > 0)
+        return np.round(fits, 1)
+
+    def _predict_single(self, image):
+        """Nhận dạng một ảnh dòng text, trả về None nếu lỗi"""
         try:
-            text_width = stringWidth(text, font_name, font_size)
-            if text_width == 0:
-                return font_size
-            return font_size * bbox_width / text_width
-        except:
-            return font_size
+            return self.rec_model.predict(image)
+        except Exception as e:
+            print(f"Error in text recognition: {e}")
+            return None
 
-    def process_recognition(self, img_path, result, output_pdf_path, output_img_debug=None):
+    def recognize_batch(self, images, batch_size=None):
+        """
+        Nhận dạng text cho nhiều ảnh dòng cùng lúc (batch inference).
+
+        Các ảnh được resize về chiều cao chuẩn của VietOCR, gom nhóm theo chiều rộng
+        (bucket) để giảm padding, sau đó chạy model theo từng batch.
+
+        Args:
+            images (list): Danh sách ảnh dòng text (PIL.Image), có thể lấy từ nhiều trang.
+            batch_size (int, optional): Số ảnh tối đa mỗi batch (mặc định: self.rec_batch_size).
+
+        Returns:
+            list: Text nhận dạng theo đúng thứ tự đầu vào (None nếu nhận dạng lỗi).
+        """
+        batch_size = batch_size or self.rec_batch_size
+        config = self.rec_model.config
+        if batch_size <= 1 or config['predictor']['beamsearch']:
+            return [self._predict_single(image) for image in images]
+
+        image_height = config['dataset']['image_height']
+        texts = [None] * len(images)
+
+        # Gom ảnh theo bucket chiều rộng sau khi resize
+        buckets = defaultdict(list)
+        for i, image in enumerate(images):
+            try:
+                arr = process_image(image, image_height,
+                                    config['dataset']['image_min_width'], config['dataset']['image_max_width'])
+            except Exception as e:
+                print(f"Error in text recognition: {e}")
+                continue
+            width = math.ceil(arr.shape[-1] / self.rec_bucket_width) * self.rec_bucket_width
+            buckets[width].append((i, arr))
+
+        for width, items in buckets.items():
+            for start in range(0, len(items), batch_size):
+                chunk = items[start:start + batch_size]
+                # Padding màu trắng (1.0 sau khi chuẩn hóa) bên phải cho các ảnh hẹp hơn bucket
+                batch = np.ones((len(chunk), 3, image_height, width), dtype=np.float32)
+                for j, (_, arr) in enumerate(chunk):
+                    batch[j, :, :, :arr.shape[-1]] = arr
+
+                try:
+                    with torch.no_grad():
+                        sents, _ = translate(torch.from_numpy(batch).to(config['device']), self.rec_model.model)
+                    for (i, _), sent in zip(chunk, sents.tolist()):
+                        texts[i] = self.rec_model.vocab.decode(sent)
+                except Exception as e:
+                    print(f"Lỗi nhận dạng batch, chuyển sang nhận dạng từng dòng: {e}")
+                    for i, _ in chunk:
+                        texts[i] = self._predict_single(images[i])
+
+        return texts
+
+    def _cache_key(self, namespace, img):
+        """Key cache của ảnh: fingerprint model/tham số của namespace + hash ảnh"""
+        return f"{self._cache_fingerprints[namespace]}_{image_key(img)}"
+
+    def recognize_lines(self, crops):
+        """
+        Nhận dạng các ảnh dòng text, bỏ qua model với những dòng đã có trong cache.
+
+        Args:
+            crops (list): Danh sách ảnh dòng (mảng numpy cắt từ trang).
+
+        Returns:
+            list: Text nhận dạng theo đúng thứ tự đầu vào (None nếu nhận dạng lỗi).
+        """
+        texts = [None] * len(crops)
+        keys = [None] * len(crops)
+        missing = []
+        for i, crop in enumerate(crops):
+            if self.cache is not None:
+                keys[i] = self._cache_key("rec", crop)
+                texts[i] = self.cache.get("rec", keys[i])
+            if texts[i] is None:
+                missing.append(i)
+
+        results = self.recognize_batch([Image.fromarray(crops[i]) for i in missing])
+        for i, text in zip(missing, results):
+            texts[i] = text
+            if text is not None and self.cache is not None:
+                self.cache.put("rec", keys[i], text)
+        return texts
+
+    def cache_stats(self):
+        """Thống kê hit/miss của cache detection ("det") và recognition ("rec")"""
+        return self.cache.stats if self.cache is not None else {}
+
+    @staticmethod
+    def load_image(image):
+        """Chuyển ảnh đầu vào (đường dẫn, PIL.Image hoặc mảng BGR) thành mảng BGR trong bộ nhớ"""
+        if isinstance(image, str):
+            img = cv2.imread(image)
+            if img is None:
+                raise ValueError(f"Không đọc được ảnh: {image}")
+            return img
+        if isinstance(image, Image.Image):
+            return cv2.cvtColor(np.asarray(image.convert('RGB')), cv2.COLOR_RGB2BGR)
+        return image
+
+    def new_page_canvas(self, img, output_pdf, page_size=None):
+        """
+        Tạo canvas một trang và vẽ lớp ảnh đã mã hóa theo image_mode / image_dpi.
+
+        Canvas được scale để các thao tác vẽ sau đó dùng toạ độ pixel của ảnh,
+        còn trang PDF giữ đúng kích thước page_size (point).
+
+        Args:
+            img (np.ndarray): Ảnh trang (BGR).
+            output_pdf (str | file-like): Đường dẫn hoặc file object để ghi PDF.
+            page_size (tuple, optional): Kích thước trang (width, height) theo point,
+                mặc định bằng kích thước ảnh (1 pixel = 1 point).
+
+        Returns:
+            canvas.Canvas: Canvas đã vẽ ảnh, chưa save.
+        """
+        img_height, img_width = img.shape[:2]
+        page_width, page_height = page_size or (img_width, img_height)
+        scale = 1.0
+        if self.image_dpi:
+            current_dpi = img_width * 72.0 / page_width
+            scale = min(1.0, self.image_dpi / current_dpi)
+
+        c = canvas.Canvas(output_pdf, pagesize=(page_width, page_height))
+        c.scale(page_width / img_width, page_height / img_height)
+        image, _ = encode_page_image(img, self.image_mode, self.jpeg_quality, scale)
+        draw_page_image(c, image, img_width, img_height)
+        return c
+
+    def write_image_only_pdf(self, image, output_pdf, page_size=None):
+        """Tạo PDF chỉ chứa ảnh (không có lớp text), dùng khi OCR thất bại"""
+        c = self.new_page_canvas(self.load_image(image), output_pdf, page_size)
+        c.save()
+        return output_pdf
+
+    def process_recognition(self, image, result, output_pdf_path, output_img_debug=None, page_size=None,
+                            metrics=NULL_METRICS):
         """
         Xử lý ảnh OCR + tạo file PDF với text ẩn. Có thể thêm ảnh debug.
 
         Args:
-            img_path (str): Đường dẫn ảnh đầu vào.
+            image (str | np.ndarray | PIL.Image): Ảnh đầu vào (đường dẫn hoặc ảnh trong bộ nhớ, mảng theo thứ tự BGR).
             result (dict): Kết quả detection từ PaddleOCR.
-            output_pdf_path (str): Đường dẫn file PDF đầu ra.
+            output_pdf_path (str | file-like): Đường dẫn hoặc file object để ghi PDF đầu ra.
             output_img_debug (str, optional): Nếu cung cấp, sẽ lưu ảnh có bounding boxes để debug.
+            page_size (tuple, optional): Kích thước trang PDF (width, height) theo point, mặc định bằng kích thước ảnh.
+            metrics (StageMetrics, optional): Ghi thời gian các stage crop, recognition, normalization, pdf_write.
 
         Returns:
-            str: Đường dẫn file PDF đã sinh.
+            str | file-like: PDF đã sinh (giá trị output_pdf_path).
         """
-        img = cv2.imread(img_path)
-        img_with_boxes = img.copy()
+        img = self.load_image(image)
         img_height, img_width = img.shape[:2]
-        c = canvas.Canvas(output_pdf_path, pagesize=(img_width, img_height))
-        c.drawImage(img_path, 0, 0, width=img_width, height=img_height)
+        img_with_boxes = img.copy() if output_img_debug else None
+        start = time.perf_counter()
+        c = self.new_page_canvas(img, output_pdf_path, page_size)
+        write_time = time.perf_counter() - start
 
         EXPEND = 5
         for res in result:
             dt_polys = res['dt_polys']
-            dt_scores = res['dt_scores']
-            boxes = []
-
-            for poly in dt_polys:
-                xs = [point[0] for point in poly]
-                ys = [point[1] for point in poly]
-                xmin, xmax = min(xs), max(xs)
-                ymin, ymax = min(ys), max(ys)
-                boxes.append([[int(xmin), int(ymin)], [int(xmax), int(ymax)]])
-
-            valid_boxes, valid_scores, valid_polys = [], [], []
-
-            for i, (box, score, poly) in enumerate(zip(boxes, dt_scores, dt_polys)):
-                if score < 0.5:
-                    continue
-                x1, y1 = box[0]
-                x2, y2 = box[1]
-                x1 = max(0, x1 - EXPEND)
-                y1 = max(0, y1 - EXPEND)
-                x2 = min(img_width, x2 + EXPEND)
-                y2 = min(img_height, y2 + EXPEND)
-                if x2 > x1 and y2 > y1:
-                    valid_boxes.append([[x1, y1], [x2, y2]])
-                    valid_scores.append(score)
-                    valid_polys.append(poly)
-
-            for idx, (box, score, poly) in enumerate(
-                    zip(reversed(valid_boxes), reversed(valid_scores), reversed(valid_polys))):
-                x1, y1 = box[0]
-                x2, y2 = box[1]
-                if x1 >= x2 or y1 >= y2:
-                    continue
-
-                cropped_image = img[y1:y2, x1:x2]
-                if cropped_image.shape[0] == 0 or cropped_image.shape[1] == 0:
+            # Lọc, nới box và tính vị trí chữ cho cả trang trong một lượt, rồi sắp theo thứ tự đọc
+            boxes = box_layout(dt_polys, res['dt_scores'], img_width, img_height, expand=EXPEND)
+            boxes = boxes[reading_order(boxes)]
+
+            # Nhận dạng toàn bộ dòng của trang theo batch
+            with metrics.time("crop"):
+                crops = [img[box["y1"]:box["y2"], box["x1"]:box["x2"]] for box in boxes]
+            start = time.perf_counter()
+            texts = self.recognize_lines(crops)
+            elapsed = time.perf_counter() - start
+            metrics.observe("recognition_page", elapsed)
+            if crops:
+                metrics.observe("recognition_line", elapsed / len(crops), count=len(crops))
+                metrics.inc("lines", len(crops))
+
+            with metrics.time("normalization"):
+                texts = [self._normalize_text(text) for text in texts]
+
+            # Cả lớp text của trang nằm trong một text object, chế độ render 3 (ẩn) chỉ đặt một lần.
+            # Chữ cao bằng box, co giãn ngang (Tz) cho vừa chiều rộng: các dòng cùng chiều cao dùng chung
+            # một lệnh đặt font, cỡ chữ / tỉ lệ chỉ được ghi lại khi thay đổi
+            start = time.perf_counter()
+            text_layer = c.beginText()
+            text_layer.setTextRenderMode(3)
+            current_size, current_scale = None, None
+            font_sizes = np.maximum(1, np.round(boxes["font_size"])).astype(int)
+            scales = self.horizontal_scales_to_fit_width(texts, boxes["width"], font_sizes)
+            for idx, (box, text) in enumerate(zip(boxes, texts)):
+                if text is None:
                     continue
-
+                font_size = int(font_sizes[idx])
+                if font_size != current_size:
+                    text_layer.setFont("TimesNewRoman", font_size)
+                    current_size = font_size
+                scale = float(scales[idx])
+                if scale != current_scale:
+                    text_layer.setHorizScale(scale)
+                    current_scale = scale
+                text_layer.setTextOrigin(float(box["x"]), float(box["y"]))
                 try:
-                    cropped_image_pil = Image.fromarray(cropped_image)
-                    if cropped_image_pil.size[0] == 0 or cropped_image_pil.size[1] == 0:
-                        continue
-                    text = self.rec_model.predict(cropped_image_pil)
-                    text = self.fix_text_spacing(text)
-                except Exception as e:
-                    print(f"Error in text recognition: {e}")
-                    continue
-
-                x, y, font_size, bbox_width, bbox_height = self.calculate_font_size_and_position(poly, text, img_height)
-                font_size = self.adjust_font_size_to_fit_width(text, bbox_width, font_size)
-                c.setFont("TimesNewRoman", font_size)
-                c.setFillColor(Color(0, 0, 1, alpha=0))
-                try:
-                    c.drawString(x, y, text)
+                    text_layer.textLine(text)
                 except:
                     clean_text = ''.join(char if ord(char) < 128 else '?' for char in text)
-                    c.drawString(x, y, clean_text)
+                    text_layer.textLine(clean_text)
 
                 if output_img_debug:
+                    poly = dt_polys[box["index"]]
                     pts = np.array(poly, dtype=np.int32)
                     cv2.polylines(img_with_boxes, [pts], True, (0, 255, 0), 2)
                     cv2.putText(img_with_boxes, str(idx),
                                 (int(min([p[0] for p in poly])), int(min([p[1] for p in poly])) - 5),
                                 cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 1)
+            c.drawText(text_layer)
+            write_time += time.perf_counter() - start
 
         if output_img_debug:
             cv2.imwrite(output_img_debug, img_with_boxes)
 
+        start = time.perf_counter()
         c.save()
+        metrics.observe("pdf_write", write_time + time.perf_counter() - start)
         return output_pdf_path
 
-    def process_file(self, input_path, output_dir="./pdf_pages", final_output_name=None):
+    def _normalize_text(self, text):
+        """Chuẩn hóa khoảng trắng của một dòng đã nhận dạng, None nếu không có text hoặc lỗi"""
+        if text is None:
+            return None
+        try:
+            return self.fix_text_spacing(text)
+        except Exception as e:
+            print(f"Error in text recognition: {e}")
+            return None
+
+    def process_file(self, input_path, final_output_name=None, progress_callback=None, report=None, metrics=None):
         """
-        Xử lý file PDF hoặc ảnh
+        Xử lý file PDF hoặc ảnh. Các trang được xử lý hoàn toàn trong bộ nhớ, không dùng thư mục tạm.
 
         Args:
             input_path (str): Đường dẫn file đầu vào (PDF hoặc ảnh)
-            output_dir (str): Thư mục tạm để lưu các trang PDF
             final_output_name (str): Tên file PDF cuối cùng (mặc định: dựa trên tên file đầu vào)
+            progress_callback (callable, optional): Hàm progress_callback(pages_done, pages_total)
+                được gọi sau mỗi trang đã xử lý
+            report (dict, optional): Nếu cung cấp, được điền thông tin xử lý: pages_total,
+                skipped_pages (số thứ tự các trang giữ nguyên vì đã có lớp text, bắt đầu từ 1),
+                input_size / output_size (dung lượng file đầu vào / đầu ra, byte)
+            metrics (StageMetrics, optional): Nếu cung cấp, ghi thời gian từng stage (render, detection,
+                crop, recognition, normalization, pdf_write, merge) và các bộ đếm pages, lines, errors, fallbacks
 
         Returns:
             str: Đường dẫn file PDF đã tạo
@@ -257,97 +533,457 @@ class Process:
         start_time = time.time()
         print(f"Bắt đầu xử lý file: {input_path}")
 
-        # Tạo thư mục output nếu chưa có
-        os.makedirs(output_dir, exist_ok=True)
-
         # Xác định tên file output
         if final_output_name is None:
             base_name = os.path.splitext(os.path.basename(input_path))[0]
             final_output_name = f"{base_name}_ocr.pdf"
 
+        if report is None:
+            report = {}
+        if metrics is None:
+            metrics = NULL_METRICS
+        report.update(pages_total=1, skipped_pages=[], input_size=os.path.getsize(input_path))
+
         result_path = None
         if input_path.lower().endswith(".pdf"):
-            result_path = self._process_pdf(input_path, output_dir, final_output_name)
+            result_path = self._process_pdf(input_path, final_output_name, progress_callback, report, metrics)
         elif input_path.lower().endswith(('.png', '.jpg', '.jpeg')):
-            result_path = self._process_image(input_path, final_output_name)
+            result_path = self._process_image(input_path, final_output_name, progress_callback, metrics)
         else:
             raise ValueError("Định dạng file không hỗ trợ. Hãy dùng PDF hoặc ảnh PNG/JPG.")
 
+        if self.linearize:
+            with metrics.time("linearize"):
+                if not linearize_pdf(result_path):
+                    print("Không tìm thấy qpdf, bỏ qua linearize PDF")
+
         # Kết thúc tính thời gian và hiển thị kết quả
         end_time = time.time()
         processing_time = end_time - start_time
 
+        report["output_size"] = os.path.getsize(result_path)
         print(f"Hoàn thành xử lý file: {final_output_name}")
         print(f"Thời gian xử lý: {processing_time:.2f} giây ({processing_time / 60:.2f} phút)")
+        print(f"Dung lượng: {report['input_size'] / 1024:.1f} KB -> {report['output_size'] / 1024:.1f} KB "
+              f"({report['output_size'] / max(1, report['input_size']):.2f}x)")
 
         return result_path
 
-    def _process_pdf(self, input_path, output_dir, final_output_name):
-        pdf = pypdfium2.PdfDocument(input_path)
-        num_pages = len(pdf)
-        print(f"PDF có {num_pages} trang")
-        page_pdf_paths = []
+    def process_files(self, files, progress_callback=None, reports=None, metrics=None):
+        """
+        Xử lý nhiều file (PDF hoặc ảnh) cùng lúc: trang của các file được đưa vào chung một luồng
+        render -> detection -> recognition, nên một batch detection có thể gồm trang của nhiều tài liệu
+        (nhiều ảnh scan một trang vẫn lấp đầy det_batch_size). Mỗi file vẫn có PDF kết quả riêng.
 
-        for i, page in enumerate(pdf):
-            page_start_time = time.time()
+        Lỗi của một file (không mở được, không đọc được ảnh...) không làm dừng các file khác.
 
-            pil_image = page.render().to_pil()
-            img_path = os.path.join(output_dir, f"page_{i + 1}.png")
-            pil_image.save(img_path)
+        Args:
+            files (list): Danh sách (input_path, output_path)
+            progress_callback (callable, optional): Hàm progress_callback(file_index, pages_done, pages_total)
+            reports (list, optional): Danh sách dict (cùng độ dài với files), mỗi dict được điền như report
+                của process_file, thêm "error" (thông báo lỗi) nếu file đó thất bại
+            metrics (StageMetrics, optional): Ghi thời gian các stage và bộ đếm, chung cho cả nhóm file
 
-            pdf_path = os.path.join(output_dir, f"page_{i + 1}_ocr.pdf")
+        Returns:
+            list: Đường dẫn PDF đã tạo của từng file, None với file thất bại
+        """
+        start_time = time.time()
+        if metrics is None:
+            metrics = NULL_METRICS
+        if reports is None:
+            reports = [{} for _ in files]
+        print(f"Bắt đầu xử lý {len(files)} file")
+
+        docs, pages = [], []
+        for n, (input_path, output_path) in enumerate(files):
+            doc = {"input_path": input_path, "output_path": output_path, "report": reports[n], "pdf": None,
+                   "num_pages": 1, "pages_done": 0, "remaining": 0, "last_page": None, "assembler": None,
+                   "error": None, "done": False}
+            docs.append(doc)
+            doc["report"].update(pages_total=1, skipped_pages=[])
             try:
-                result = self.det_model.predict(img_path, batch_size=1)
-                self.process_recognition(img_path, result, output_pdf_path=pdf_path)
-                page_pdf_paths.append(pdf_path)
+                doc["report"]["input_size"] = os.path.getsize(input_path)
+                if input_path.lower().endswith(".pdf"):
+                    doc["pdf"] = pypdfium2.PdfDocument(input_path)
+                    doc["num_pages"] = len(doc["pdf"])
+                    skipped = self._find_text_pages(doc["pdf"]) if self.skip_text_pages else set()
+                    doc["report"].update(pages_total=doc["num_pages"], skipped_pages=sorted(i + 1 for i in skipped))
+                    metrics.inc("pages_skipped", len(skipped))
+                    doc["pages_done"] = len(skipped)
+                    ocr_indexes = [i for i in range(doc["num_pages"]) if i not in skipped]
+                elif input_path.lower().endswith(('.png', '.jpg', '.jpeg')):
+                    skipped, ocr_indexes = set(), [0]
+                else:
+                    raise ValueError("Định dạng file không hỗ trợ. Hãy dùng PDF hoặc ảnh PNG/JPG.")
+                if progress_callback:
+                    progress_callback(n, doc["pages_done"], doc["num_pages"])
+                if not ocr_indexes:
+                    # Toàn bộ tài liệu đã có lớp text
+                    shutil.copyfile(input_path, output_path)
+                    self._finish_document(doc, metrics)
+                    continue
+                doc["assembler"] = DocumentAssembler(input_path, output_path, doc["num_pages"], skipped)
+                doc["remaining"] = len(ocr_indexes)
+                doc["last_page"] = ocr_indexes[-1]
+                pages.extend((n, i) for i in ocr_indexes)
+            except Exception as e:
+                doc["error"] = e
+                self._finish_document(doc, metrics)
 
-                page_end_time = time.time()
-                page_processing_time = page_end_time - page_start_time
-                print(f"Đã xử lý trang {i + 1}/{num_pages} - Thời gian: {page_processing_time:.2f}s")
+        def render(chunk):
+            items = []
+            for n, i in chunk:
+                doc = docs[n]
+                try:
+                    if doc["error"] is not None:
+                        continue
+                    with metrics.time("render"):
+                        try:
+                            if doc["pdf"] is not None:
+                                item = self._render_page(doc["pdf"], i)
+                            else:
+                                item = {"index": 0, "start": time.time(), "img": self.load_image(doc["input_path"]),
+                                        "page_size": None, "result": None, "error": None}
+                        except Exception as e:
+                            # Không có ảnh để tạo trang thay thế: cả file thất bại
+                            doc["error"] = e
+                            continue
+                    item["doc"] = n
+                    items.append(item)
+                finally:
+                    # Pdfium không thread-safe: PDF gốc được đóng ngay trên luồng render sau trang cuối,
+                    # không phải ở luồng nhận kết quả trong lúc luồng render đang render tài liệu tiếp theo
+                    if i == doc["last_page"] and doc["pdf"] is not None:
+                        doc["pdf"].close()
+                        doc["pdf"] = None
+            return items
+
+        def recognize(items):
+            return [(item["doc"], item["index"], self._recognize_page(item, docs[item["doc"]]["num_pages"], metrics))
+                    for item in items]
+
+        page_iter = self._iter_pages(pages, render, recognize, metrics)
+        try:
+            for n, i, page_pdf in page_iter:
+                doc = docs[n]
+                if doc["error"] is None:
+                    try:
+                        with metrics.time("merge"):
+                            doc["assembler"].add(i, page_pdf)
+                    except Exception as e:
+                        doc["error"] = e
+                page_pdf.close()
+                doc["pages_done"] += 1
+                doc["remaining"] -= 1
+                if progress_callback:
+                    progress_callback(n, doc["pages_done"], doc["num_pages"])
+                if doc["remaining"] == 0:
+                    self._finish_document(doc, metrics)
+        finally:
+            # Dừng pipeline (chờ luồng render kết thúc) trước khi đóng các PDF gốc còn mở
+            page_iter.close()
+            # File lỗi giữa chừng (trang còn lại bị bỏ qua) hoặc dừng vì exception: đóng / xóa file dở
+            for doc in docs:
+                if not doc["done"]:
+                    if doc["error"] is None:
+                        doc["error"] = RuntimeError("Xử lý bị dừng giữa chừng")
+                    self._finish_document(doc, metrics)
+
+        processing_time = time.time() - start_time
+        failed = sum(doc["error"] is not None for doc in docs)
+        print(f"Hoàn thành xử lý {len(files)} file ({failed} lỗi) - Thời gian: {processing_time:.2f} giây")
+        return [doc["output_path"] if doc["error"] is None else None for doc in docs]
+
+    def _finish_document(self, doc, metrics=NULL_METRICS):
+        """
+        Hoàn tất (hoặc hủy nếu có lỗi) PDF kết quả của một file trong process_files.
+        PDF gốc chỉ còn mở ở đây khi không có luồng render nào chạy (trước khi pipeline bắt đầu
+        hoặc sau khi đã dừng), trang cuối đã render thì luồng render đã đóng nó.
+        """
+        doc["done"] = True
+        try:
+            if doc["error"] is None:
+                if doc["assembler"] is not None:
+                    with metrics.time("merge"):
+                        doc["assembler"].close()
+                if self.linearize:
+                    with metrics.time("linearize"):
+                        linearize_pdf(doc["output_path"])
+                doc["report"]["output_size"] = os.path.getsize(doc["output_path"])
+                print(f"Hoàn thành xử lý file: {doc['output_path']}")
+        except Exception as e:
+            doc["error"] = e
+        finally:
+            if doc["pdf"] is not None:
+                doc["pdf"].close()
+                doc["pdf"] = None
+        if doc["error"] is not None:
+            if doc["assembler"] is not None:
+                doc["assembler"].abort()
+            print(f"Lỗi xử lý file {doc['input_path']}: {doc['error']}")
+            doc["report"]["error"] = str(doc["error"])
+
+    def _render_scale(self, page_size):
+        """Hệ số render (pixel / point) theo render_dpi, giảm xuống nếu cạnh dài vượt render_max_side"""
+        scale = self.render_dpi / 72.0
+        if self.render_max_side:
+            scale = min(scale, self.render_max_side / max(page_size))
+        return scale
+
+    def _render_page(self, pdf, index):
+        """Stage 1: render trang thành mảng BGR trong bộ nhớ"""
+        page = pdf[index]
+        try:
+            page_size = page.get_size()
+            img = self.load_image(page.render(scale=self._render_scale(page_size)).to_pil())
+        finally:
+            page.close()
+        return {"index": index, "start": time.time(), "img": img, "page_size": page_size,
+                "result": None, "error": None}
+
+    def _render_pages(self, pdf, indexes, metrics=NULL_METRICS):
+        """Stage 1: render một nhóm trang"""
+        items = []
+        for i in indexes:
+            with metrics.time("render"):
+                items.append(self._render_page(pdf, i))
+        return items
+
+    @staticmethod
+    def _det_result(res, factor=1.0):
+        """
+        Giữ lại phần kết quả detection cần dùng (dạng dict thường, pickle được để cache).
+        Box trên ảnh đã thu nhỏ theo hệ số factor được quy đổi về toạ độ ảnh gốc.
+        """
+        polys = res["dt_polys"]
+        if factor != 1.0:
+            polys = [np.asarray(poly, dtype=np.float32) / factor for poly in polys]
+        return {"dt_polys": polys, "dt_scores": res["dt_scores"]}
+
+    def _detection_input(self, img):
+        """Ảnh đưa vào detection: thu nhỏ để cạnh dài không vượt det_max_side. Trả về (ảnh, hệ số thu nhỏ)"""
+        height, width = img.shape[:2]
+        factor = self.det_max_side / max(height, width) if self.det_max_side else 1.0
+        if factor >= 1.0:
+            return img, 1.0
+        size = (max(1, round(width * factor)), max(1, round(height * factor)))
+        return cv2.resize(img, size, interpolation=cv2.INTER_AREA), factor
+
+    def _detect_page(self, item, model):
+        """Phát hiện vùng text cho một trang, lỗi được giữ lại để stage sau tạo trang chỉ có ảnh"""
+        try:
+            item["result"] = [self._det_result(res, item["det_factor"])
+                              for res in model.predict(item["det_img"], batch_size=1)]
+        except Exception as e:
+            item["error"] = e
+        return item
 
+    def _detect_pages(self, items, metrics=NULL_METRICS):
+        """
+        Stage 2: phát hiện vùng text cho một nhóm trang theo batch.
+
+        Các trang được gom theo kích thước ảnh (model chỉ ghép batch được các ảnh cùng kích thước),
+        kết quả được gán lại đúng trang. Nếu cả batch lỗi thì thử lại từng trang.
+        Trang đã có trong cache (cùng hash ảnh, cùng model và det_max_side) không cần chạy model. Ảnh lớn được thu nhỏ
+        trước khi detection (det_max_side), box trả về luôn theo toạ độ ảnh gốc.
+        Model được mượn qua _det_predictor nên nhiều luồng gọi hàm này cùng lúc được.
+        Thời gian cả nhóm được chia đều cho từng trang khi ghi vào metrics.
+        """
+        start = time.perf_counter()
+        pending = []
+        for item in items:
+            if self.cache is not None:
+                item["page_key"] = self._cache_key("det", item["img"])
+                item["result"] = self.cache.get("det", item["page_key"])
+            if item["result"] is None:
+                pending.append(item)
+
+        groups = defaultdict(list)
+        for item in pending:
+            item["det_img"], item["det_factor"] = self._detection_input(item["img"])
+            groups[item["det_img"].shape].append(item)
+
+        if groups:
+            with self._det_predictor() as model:
+                self._detect_groups(groups, model)
+
+        for item in pending:
+            del item["det_img"]
+            if self.cache is not None and item["error"] is None:
+                self.cache.put("det", item["page_key"], item["result"])
+        if items:
+            metrics.observe("detection", (time.perf_counter() - start) / len(items), count=len(items))
+        return items
+
+    def _detect_groups(self, groups, model):
+        """Chạy detection cho các nhóm trang cùng kích thước ảnh, theo batch det_batch_size trang"""
+        for group in groups.values():
+            for start in range(0, len(group), self.det_batch_size):
+                chunk = group[start:start + self.det_batch_size]
+                if len(chunk) == 1:
+                    self._detect_page(chunk[0], model)
+                    continue
+                try:
+                    results = list(model.predict([item["det_img"] for item in chunk], batch_size=len(chunk)))
+                    for item, res in zip(chunk, results):
+                        item["result"] = [self._det_result(res, item["det_factor"])]
+                except Exception as e:
+                    print(f"Lỗi detection theo batch, chuyển sang từng trang: {e}")
+                    for item in chunk:
+                        self._detect_page(item, model)
+
+    def detect(self, img, metrics=NULL_METRICS):
+        """Phát hiện vùng text trên một ảnh BGR (có dùng cache), raise lỗi nếu detection thất bại"""
+        item = self._detect_pages([{"img": img, "result": None, "error": None}], metrics)[0]
+        if item["error"] is not None:
+            raise item["error"]
+        return item["result"]
+
+    def _recognize_page(self, item, num_pages, metrics=NULL_METRICS):
+        """Nhận dạng text và ghi PDF của trang vào bộ nhớ"""
+        i = item["index"]
+        page_pdf = io.BytesIO()
+        error = item["error"]
+        metrics.inc("pages")
+        if error is None:
+            try:
+                self.process_recognition(item["img"], item["result"], output_pdf_path=page_pdf,
+                                         page_size=item["page_size"], metrics=metrics)
             except Exception as e:
-                print(f"Lỗi xử lý trang {i + 1}: {e}")
-                # Tạo PDF trống nếu có lỗi
-                c = canvas.Canvas(pdf_path, pagesize=(pil_image.width, pil_image.height))
-                temp_img_path = img_path.replace('.png', '_temp.png')
-                pil_image.save(temp_img_path)
-                c.drawImage(temp_img_path, 0, 0, width=pil_image.width, height=pil_image.height)
-                c.save()
-                os.remove(temp_img_path)
-                page_pdf_paths.append(pdf_path)
-
-                page_end_time = time.time()
-                page_processing_time = page_end_time - page_start_time
-                print(f"Trang {i + 1}/{num_pages} xử lý với lỗi - Thời gian: {page_processing_time:.2f}s")
-
-        if num_pages == 1:
-            shutil.copy(page_pdf_paths[0], final_output_name)
+                error = e
+
+        if error is None:
+            print(f"Đã xử lý trang {i + 1}/{num_pages} - Thời gian: {time.time() - item['start']:.2f}s")
         else:
-            merger = PdfMerger()
-            for pdf_file in page_pdf_paths:
-                merger.append(pdf_file)
-            merger.write(final_output_name)
-            merger.close()
-
-        pdf.close()
-        shutil.rmtree(output_dir)
-        print(f"Đã xóa folder trung gian")
+            print(f"Lỗi xử lý trang {i + 1}: {error}")
+            metrics.inc("errors")
+            metrics.inc("fallbacks")
+            # Tạo PDF chỉ có ảnh nếu có lỗi
+            page_pdf = io.BytesIO()
+            with metrics.time("pdf_write"):
+                self.write_image_only_pdf(item["img"], page_pdf, item["page_size"])
+            print(f"Trang {i + 1}/{num_pages} xử lý với lỗi - Thời gian: {time.time() - item['start']:.2f}s")
+
+        page_pdf.seek(0)
+        return page_pdf
+
+    def _recognize_pages(self, items, num_pages, metrics=NULL_METRICS):
+        """Stage 3: nhận dạng và ghi PDF cho một nhóm trang, trả về danh sách (chỉ số trang, PDF)"""
+        return [(item["index"], self._recognize_page(item, num_pages, metrics)) for item in items]
+
+    def _find_text_pages(self, pdf):
+        """
+        Pre-pass: tìm các trang đã có lớp text thật (PDF sinh từ máy hoặc đã được OCR).
+
+        Returns:
+            set: Chỉ số (từ 0) các trang có ít nhất min_text_chars ký tự chữ/số.
+        """
+        text_pages = set()
+        for i in range(len(pdf)):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            try:
+                text = textpage.get_text_bounded()
+            finally:
+                textpage.close()
+                page.close()
+            if sum(ch.isalnum() for ch in text) >= self.min_text_chars:
+                text_pages.add(i)
+        return text_pages
+
+    def _iter_pages(self, pages, render, recognize, metrics=NULL_METRICS):
+        """
+        Xử lý danh sách trang theo nhóm det_batch_size trang: render(nhóm) -> detection -> recognize(items).
+        Yield từng phần tử kết quả của recognize theo đúng thứ tự trang. Với pipeline, ba stage chạy chồng lên nhau.
+        """
+        chunks = [pages[start:start + self.det_batch_size]
+                  for start in range(0, len(pages), self.det_batch_size)]
+
+        if not self.pipeline:
+            for chunk in chunks:
+                items = self._detect_pages(render(chunk), metrics)
+                yield from recognize(items)
+            return
+
+        # Pdfium không thread-safe nên stage render luôn chỉ có một luồng
+        pipeline = StagePipeline([
+            ("render", render, 1),
+            ("detect", lambda items: self._detect_pages(items, metrics), self.det_workers),
+            ("recognize", recognize, self.rec_workers),
+        ], queue_size=self.pipeline_queue_size)
+        for results in pipeline.run(chunks):
+            yield from results
+
+    def _iter_page_pdfs(self, pdf, indexes, num_pages, metrics=NULL_METRICS):
+        """Xử lý các trang của một PDF, yield (chỉ số trang, PDF của trang) theo đúng thứ tự"""
+        return self._iter_pages(indexes,
+                                lambda chunk: self._render_pages(pdf, chunk, metrics),
+                                lambda items: self._recognize_pages(items, num_pages, metrics),
+                                metrics)
+
+    def _process_pdf(self, input_path, final_output_name, progress_callback=None, report=None,
+                     metrics=NULL_METRICS):
+        pdf = pypdfium2.PdfDocument(input_path)
+        num_pages = len(pdf)
+        print(f"PDF có {num_pages} trang")
+        assembler = None
+
+        try:
+            skipped = self._find_text_pages(pdf) if self.skip_text_pages else set()
+            if skipped:
+                print(f"Giữ nguyên {len(skipped)} trang đã có lớp text: {sorted(i + 1 for i in skipped)}")
+            if report is not None:
+                report.update(pages_total=num_pages, skipped_pages=sorted(i + 1 for i in skipped))
+            metrics.inc("pages_skipped", len(skipped))
+            if progress_callback:
+                progress_callback(len(skipped), num_pages)
+
+            ocr_indexes = [i for i in range(num_pages) if i not in skipped]
+            if not ocr_indexes:
+                # Toàn bộ tài liệu đã có lớp text
+                shutil.copyfile(input_path, final_output_name)
+                return final_output_name
+
+            # Mỗi trang được ghi thẳng vào file kết quả ngay khi xử lý xong, theo đúng thứ tự trang;
+            # trang được giữ nguyên lấy trực tiếp từ file gốc
+            assembler = DocumentAssembler(input_path, final_output_name, num_pages, skipped)
+            pages_done = len(skipped)
+            for i, page_pdf in self._iter_page_pdfs(pdf, ocr_indexes, num_pages, metrics):
+                with metrics.time("merge"):
+                    assembler.add(i, page_pdf)
+                page_pdf.close()
+                pages_done += 1
+                if progress_callback:
+                    progress_callback(pages_done, num_pages)
+            with metrics.time("merge"):
+                assembler.close()
+        except Exception:
+            if assembler is not None:
+                assembler.abort()
+            raise
+        finally:
+            pdf.close()
         return final_output_name
 
-    def _process_image(self, input_path, final_output_name):
-        """Xử lý file ảnh"""
+    def _process_image(self, input_path, final_output_name, progress_callback=None, metrics=NULL_METRICS):
+        """Xử lý file ảnh (đọc ảnh được tính vào stage render)"""
         image_start_time = time.time()
+        if progress_callback:
+            progress_callback(0, 1)
+        metrics.inc("pages")
 
         try:
             print("Đang phát hiện text trong ảnh...")
             detection_start = time.time()
-            result = self.det_model.predict(input_path, batch_size=1)
+            with metrics.time("render"):
+                img = self.load_image(input_path)
+            result = self.detect(img, metrics)
             detection_end = time.time()
             print(f"Phát hiện text hoàn thành - Thời gian: {detection_end - detection_start:.2f}s")
 
             print("Đang nhận dạng text và tạo PDF...")
             recognition_start = time.time()
-            self.process_recognition(input_path, result, output_pdf_path=final_output_name)
+            self.process_recognition(img, result, output_pdf_path=final_output_name, metrics=metrics)
             recognition_end = time.time()
             print(f"Nhận dạng text hoàn thành - Thời gian: {recognition_end - recognition_start:.2f}s")
 
@@ -355,19 +991,23 @@ class Process:
             total_image_time = image_end_time - image_start_time
             print(f"Tạo PDF từ ảnh hoàn thành - Tổng thời gian: {total_image_time:.2f}s")
 
+            if progress_callback:
+                progress_callback(1, 1)
             return final_output_name
 
         except Exception as e:
             print(f"Lỗi xử lý ảnh: {e}")
             print("Đang tạo PDF đơn giản...")
+            metrics.inc("errors")
+            metrics.inc("fallbacks")
 
             # Tạo PDF đơn giản nếu OCR thất bại
             fallback_start = time.time()
-            img = Image.open(input_path)
-            c = canvas.Canvas(final_output_name, pagesize=(img.width, img.height))
-            c.drawImage(input_path, 0, 0, width=img.width, height=img.height)
-            c.save()
+            with metrics.time("pdf_write"):
+                self.write_image_only_pdf(Image.open(input_path), final_output_name)
             fallback_end = time.time()
 
             print(f"Tạo PDF hoàn thành - Thời gian: {fallback_end - fallback_start:.2f}s")
+            if progress_callback:
+                progress_callback(1, 1)
             return final_output_name
\ No newline at end of file
@@ -0,0 +1,57 @@
+import re
+
+# Các quy tắc sửa khoảng cách được biên dịch một lần khi nạp module.
+# Quy tắc ở đầu dòng gộp thành một alternation, thử theo đúng thứ tự cũ: sau khi một quy tắc
+# áp dụng, ký tự sau dấu đã là khoảng trắng nên không quy tắc đầu dòng nào khác khớp được nữa.
+# (?=\S): chỉ thêm khoảng trắng khi ngay sau dấu chưa có khoảng trắng.
+_ROMAN_NUMERAL = re.compile(r'^M{0,4}(CM|CD|D?C{0,3})(XC|XL|L?X{0,3})(IX|IV|V?I{0,3})$')
+_LEADING_RULE = re.compile(
+    r'(?:(?P<num>\d{1,2})\s*(?P<num_sep>\.|:)'            # "1.a", "1 .a" -> "1. a"
+    r'|(?P<roman>(?i:[IVXLCDM]{1,10}))(?:\.|:)'           # "II.a" -> "II. a" (nếu là số La Mã hợp lệ)
+    r'|[a-zA-Z](?:\.|:)'                                  # "a.b" -> "a. b"
+    r'|\([0-9a-zA-Z]+\)'                                  # "(1)a" -> "(1) a"
+    r'|\d+(?:\.\d+)*\.'                                   # "1.2.3.a" -> "1.2.3. a"
+    r')(?=\S)'
+)
+# Quy tắc trong dòng giữ nguyên thứ tự cũ (các quy tắc ảnh hưởng lẫn nhau qua phần đã khớp nên
+# không gộp được), mỗi quy tắc chỉ chạy khi dòng có ký tự kích hoạt của nó
+_INLINE_RULES = (
+    ("(", re.compile(r'(\([^)]+\))([a-zA-Z])'), r'\1 \2'),
+    ("(", re.compile(r'([a-zA-Z0-9])\('), r'\1 ('),
+    (",", re.compile(r'([a-zA-Z0-9]),([a-zA-Z0-9])'), r'\1, \2'),
+    (".", re.compile(r'([a-zA-Z])\.(\d)'), r'\1. \2'),
+    (".", re.compile(r'([a-z])\.([A-Z])'), r'\1. \2'),
+    ("[", re.compile(r'([a-zA-Z])\['), r'\1 ['),
+    ("]", re.compile(r'\]([a-zA-Z])'), r'] \1'),
+    (":", re.compile(r'([a-zA-Z]):([a-zA-Z])'), r'\1: \2'),
+    (";", re.compile(r'([a-zA-Z]);([a-zA-Z])'), r'\1; \2'),
+    ("-", re.compile(r'([a-zA-Z]{3,})-([a-zA-Z]{3,})'), r'\1 - \2'),
+)
+# Dòng không chứa ký tự nào trong số này không thể khớp quy tắc nào
+_TRIGGERS = re.compile(r'[.:,;()\[\]\-]')
+
+
+def is_valid_roman_numeral(s):
+    """Kiểm tra xem chuỗi có phải số La Mã hợp lệ không"""
+    return _ROMAN_NUMERAL.match(s.upper()) is not None
+
+
+def fix_text_spacing(text):
+    """Sửa khoảng cách trong text (sau dấu câu, số thứ tự đầu dòng, ngoặc...)"""
+    if not text or not text.strip():
+        return text
+    if _TRIGGERS.search(text) is None:
+        return text
+
+    match = _LEADING_RULE.match(text)
+    if match:
+        rest = text[match.end():]
+        if match.group("num") is not None:
+            text = f"{match.group('num')}{match.group('num_sep')} {rest}"
+        elif match.group("roman") is None or is_valid_roman_numeral(match.group("roman")):
+            text = f"{match.group(0)} {rest}"
+
+    for trigger, pattern, replacement in _INLINE_RULES:
+        if trigger in text:
+            text = pattern.sub(replacement, text)
+    return text
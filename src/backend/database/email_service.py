@@ -1,5 +1,7 @@
 import os
+import asyncio
 import smtplib
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv
@@ -8,65 +10,194 @@ load_dotenv()
 
 
 class EmailService:
-    def __init__(self):
-        self.smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-        self.smtp_port = int(os.getenv("SMTP_PORT", "587"))
-        self.smtp_username = os.getenv("SMTP_USERNAME")
-        self.smtp_password = os.getenv("SMTP_PASSWORD")
-        self.from_email = os.getenv("FROM_EMAIL", self.smtp_username)
+    """
+    Sends emails from a background queue, so request handlers never wait on SMTP.
+
+    A single worker keeps one SMTP connection open and reuses it for every
+    message (one TLS handshake and login per burst instead of per email); the
+    blocking smtplib calls run in its own thread. Failed sends are retried
+    with exponential backoff, a dropped connection is reopened, and the
+    connection is closed after ``idle_timeout`` seconds without mail.
+    """
+
+    def __init__(self, smtp_server=None, smtp_port=None, smtp_username=None, smtp_password=None,
+                 from_email=None, starttls=None, max_queue=None, max_retries=3, retry_delay=2.0,
+                 idle_timeout=60.0, timeout=30.0):
+        self.smtp_server = smtp_server or os.getenv("SMTP_SERVER", "smtp.gmail.com")
+        self.smtp_port = smtp_port or int(os.getenv("SMTP_PORT", "587"))
+        self.smtp_username = smtp_username or os.getenv("SMTP_USERNAME")
+        self.smtp_password = smtp_password or os.getenv("SMTP_PASSWORD")
+        self.from_email = from_email or os.getenv("FROM_EMAIL", self.smtp_username)
+        if starttls is None:
+            starttls = os.getenv("SMTP_STARTTLS", "true").lower() in ("1", "true", "yes")
+        self.starttls = starttls
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("EMAIL_MAX_QUEUE", "1000"))
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
 
         if not all([self.smtp_username, self.smtp_password]):
             raise ValueError("SMTP credentials not configured")
 
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self._queue = None
+        self._worker = None
+        self._server = None
+        self._executor = None
+
+    def start(self):
+        """Start the send worker (must be called from the event loop)"""
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        # One thread: it owns the SMTP connection, so messages go out one after another on it
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="smtp")
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0):
+        """Give queued emails ``timeout`` seconds to go out, then stop the worker and close the connection"""
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"Email queue stopped with {self._queue.qsize()} unsent emails")
+        self._worker.cancel()
+        self._worker = None
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._disconnect)
+        self._executor.shutdown(wait=False)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def stats(self) -> dict:
+        return {"queued": self.queue_depth, "sent": self.sent, "failed": self.failed, "retries": self.retries}
+
     async def send_reset_code_email(self, to_email: str, reset_code: str) -> bool:
-        """Send password reset code via email"""
+        """Queue the password reset code email; False if it could not be queued"""
+        return self.enqueue(self._reset_code_message(to_email, reset_code))
+
+    def enqueue(self, msg) -> bool:
+        if self._queue is None:
+            print("Failed to send email: email service is not started")
+            return False
         try:
-            msg = MIMEMultipart()
-            msg['From'] = self.from_email
-            msg['To'] = to_email
-            msg['Subject'] = "Mã khôi phục mật khẩu - OCR PDF Service"
-
-            # Email body
-            body = f"""
-            <html>
-            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-                <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                    <h2 style="color: #2c3e50;">Khôi phục mật khẩu</h2>
-                    <p>Bạn đã yêu cầu khôi phục mật khẩu cho tài khoản của mình.</p>
-                    <p>Mã khôi phục của bạn là:</p>
-                    <div style="background-color: #f8f9fa; border: 2px solid #007bff; border-radius: 8px; padding: 20px; text-align: center; margin: 20px 0;">
-                        <h1 style="color: #007bff; font-size: 32px; margin: 0; letter-spacing: 8px;">{reset_code}</h1>
-                    </div>
-                    <p><strong>Lưu ý:</strong></p>
-                    <ul>
-                        <li>Mã này có hiệu lực trong <strong>5 phút</strong></li>
-                        <li>Không chia sẻ mã này với bất kỳ ai</li>
-                        <li>Nếu bạn không yêu cầu khôi phục mật khẩu, hãy bỏ qua email này</li>
-                    </ul>
-                    <hr style="border: none; border-top: 1px solid #eee; margin: 30px 0;">
-                    <p style="color: #666; font-size: 14px;">
-                        Email này được gửi từ OCR PDF Service<br>
-                        Nếu bạn cần hỗ trợ, vui lòng liên hệ với chúng tôi.
-                    </p>
+            self._queue.put_nowait(msg)
+            return True
+        except asyncio.QueueFull:
+            print(f"Failed to send email: queue is full ({self.max_queue} emails)")
+            return False
+
+    def _reset_code_message(self, to_email: str, reset_code: str):
+        msg = MIMEMultipart()
+        msg['From'] = self.from_email
+        msg['To'] = to_email
+        msg['Subject'] = "Mã khôi phục mật khẩu - OCR PDF Service"
+
+        # Email body
+        body = f"""
+        <html>
+        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+                <h2 style="color: #2c3e50;">Khôi phục mật khẩu</h2>
+                <p>Bạn đã yêu cầu khôi phục mật khẩu cho tài khoản của mình.</p>
+                <p>Mã khôi phục của bạn là:</p>
+                <div style="background-color: #f8f9fa; border: 2px solid #007bff; border-radius: 8px; padding: 20px; text-align: center; margin: 20px 0;">
+                    <h1 style="color: #007bff; font-size: 32px; margin: 0; letter-spacing: 8px;">{reset_code}</h1>
                 </div>
-            </body>
-            </html>
-            """
+                <p><strong>Lưu ý:</strong></p>
+                <ul>
+                    <li>Mã này có hiệu lực trong <strong>5 phút</strong></li>
+                    <li>Không chia sẻ mã này với bất kỳ ai</li>
+                    <li>Nếu bạn không yêu cầu khôi phục mật khẩu, hãy bỏ qua email này</li>
+                </ul>
+                <hr style="border: none; border-top: 1px solid #eee; margin: 30px 0;">
+                <p style="color: #666; font-size: 14px;">
+                    Email này được gửi từ OCR PDF Service<br>
+                    Nếu bạn cần hỗ trợ, vui lòng liên hệ với chúng tôi.
+                </p>
+            </div>
+        </body>
+        </html>
+        """
 
-            msg.attach(MIMEText(body, 'html', 'utf-8'))
+        msg.attach(MIMEText(body, 'html', 'utf-8'))
+        return msg
 
-            # Send email
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                msg = await asyncio.wait_for(self._queue.get(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                await loop.run_in_executor(self._executor, self._disconnect)
+                continue
+            try:
+                await self._deliver(loop, msg)
+            except Exception as e:
+                # Not an SMTP/network error (e.g. a malformed message): drop this email, keep the worker
+                self.failed += 1
+                print(f"Failed to send email to {msg['To']}: {e!r}")
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, loop, msg):
+        for attempt in range(self.max_retries + 1):
+            try:
+                await loop.run_in_executor(self._executor, self._send, msg)
+                self.sent += 1
+                return
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPNotSupportedError) as e:
+                error = e
+                break  # will not succeed on a retry
+            except (smtplib.SMTPException, OSError) as e:
+                error = e
+                if attempt < self.max_retries:
+                    self.retries += 1
+                    await asyncio.sleep(self.retry_delay * 2 ** attempt)
+        self.failed += 1
+        print(f"Failed to send email to {msg['To']}: {error}")
+
+    def _connect(self):
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                server.starttls()
             server.login(self.smtp_username, self.smtp_password)
-            server.send_message(msg)
-            server.quit()
+        except BaseException:
+            server.close()
+            raise
+        return server
 
-            return True
-        except Exception as e:
-            print(f"Failed to send email: {str(e)}")
-            return False
+    def _send(self, msg):
+        """Send on the open connection; reopen it once if the server dropped it while idle"""
+        try:
+            if self._server is None:
+                self._server = self._connect()
+            try:
+                self._server.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                self._server = None
+                self._server = self._connect()
+                self._server.send_message(msg)
+        except smtplib.SMTPRecipientsRefused:
+            raise  # the session is still usable
+        except Exception:
+            self._disconnect()  # session state is unknown, start clean on the next send
+            raise
+
+    def _disconnect(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            self._server.close()
+        self._server = None
 
 
 # Global instance
-email_service = EmailService()
\ No newline at end of file
+email_service = EmailService()
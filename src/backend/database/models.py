@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, Field, ConfigDict
 from pydantic.json_schema import JsonSchemaValue
 from pydantic_core import core_schema
@@ -65,12 +65,32 @@ class ProcessedFile(BaseModel):
     processed_filename: str
     file_size: int
     file_type: str
-    processing_status: str = "completed"
+    processing_status: str = "completed"  # queued, running, completed, failed
     processing_time: Optional[float] = None
+    error_message: Optional[str] = None
+    content_hash: Optional[str] = None  # SHA-256 of the uploaded file
+    output_size: Optional[int] = None  # size of the OCR'd PDF, compare with file_size
+    output_hash: Optional[str] = None  # SHA-256 of the OCR'd PDF, used as its download ETag
+    pages_total: Optional[int] = None
+    skipped_pages: List[int] = Field(default_factory=list)  # pages kept as-is because they already had text
+    # Seconds and run count per OCR stage plus page/line/error counters, see StageMetrics.breakdown
+    stage_breakdown: Optional[Dict[str, Any]] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     download_count: int = 0
 
 
+class CacheEntry(BaseModel):
+    model_config = BASE_CONFIG
+
+    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    cache_key: str
+    filename: str
+    file_size: int
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    last_used_at: datetime = Field(default_factory=datetime.utcnow)
+    hit_count: int = 0
+
+
 # Request models
 class UserSignUp(BaseModel):
     username: str = Field(..., min_length=3, max_length=50)
@@ -125,10 +145,56 @@ class ProcessedFileResponse(BaseModel):
     file_type: str
     processing_status: str
     processing_time: Optional[float]
+    output_size: Optional[int] = None
     created_at: datetime
     download_count: int
 
 
+class FileHistoryPage(BaseModel):
+    items: List[ProcessedFileResponse]
+    next_cursor: Optional[str] = None  # pass as ?before= for the next page, None on the last page
+
+
+class FileCountResponse(BaseModel):
+    total: int
+
+
+class FileIdsRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=500)
+
+
+class BatchDeleteResponse(BaseModel):
+    deleted: int
+    not_found: List[str] = Field(default_factory=list)  # ids that do not exist or belong to another user
+
+
+class DownloadLinkResponse(BaseModel):
+    url: str  # GET without Authorization header, valid for expires_in seconds
+    expires_in: int
+
+
+class JobCreatedResponse(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    original_filename: str
+    pages_done: Optional[int] = None
+    pages_total: Optional[int] = None
+    eta_seconds: Optional[float] = None
+    processing_time: Optional[float] = None
+    file_size: Optional[int] = None
+    output_size: Optional[int] = None
+    skipped_pages: List[int] = []
+    stage_breakdown: Optional[Dict[str, Any]] = None
+    download_url: Optional[str] = None
+    error: Optional[str] = None
+
+
 class SuccessResponse(BaseModel):
     message: str
 
@@ -1,11 +1,29 @@
+import time
 import motor
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from bson import ObjectId
-from pymongo import ASCENDING, DESCENDING
+from pymongo import ASCENDING, DESCENDING, UpdateOne
 from motor.motor_asyncio import AsyncIOMotorCollection
 from datetime import datetime
 from .connection import get_database
-from .models import User, ProcessedFile
+from .models import User, ProcessedFile, CacheEntry, ProcessedFileResponse
+
+# /history reads only what ProcessedFileResponse shows (+ user_id, required by ProcessedFile),
+# not the stage breakdowns, hashes and skipped page lists
+HISTORY_PROJECTION = {field: 1 for field in ProcessedFileResponse.model_fields if field != "id"} | {"user_id": 1}
+
+
+def encode_history_cursor(file: ProcessedFile) -> str:
+    """Keyset cursor "<created_at ISO>,<_id>" pointing just after ``file`` in newest-first order"""
+    return f"{file.created_at.isoformat()},{file.id}"
+
+
+def decode_history_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """Inverse of encode_history_cursor; raises ValueError for a malformed cursor"""
+    created_at, _, file_id = cursor.rpartition(",")
+    if not ObjectId.is_valid(file_id):
+        raise ValueError("Invalid cursor")
+    return datetime.fromisoformat(created_at), ObjectId(file_id)
 
 
 class BaseRepository:
@@ -34,8 +52,14 @@ class BaseRepository:
 
 
 class UserRepository(BaseRepository):
-    def __init__(self):
+    def __init__(self, cache=None):
         super().__init__("users")
+        # UserCache of get_current_user: every write below drops the user from it
+        self.cache = cache
+
+    def _invalidate(self, **keys):
+        if self.cache is not None:
+            self.cache.invalidate(**keys)
 
     async def create_user(self, user_data: dict) -> User:
         result = await self.collection.insert_one(user_data)
@@ -54,10 +78,14 @@ class UserRepository(BaseRepository):
         return await self.find_by_id(user_id, User)
 
     async def update_user(self, user_id: str, update_data: dict) -> bool:
-        return await self.update_by_id(user_id, update_data)
+        updated = await self.update_by_id(user_id, update_data)
+        self._invalidate(user_id=user_id)
+        return updated
 
     async def delete_user(self, user_id: str) -> bool:
-        return await self.delete_by_id(user_id)
+        deleted = await self.delete_by_id(user_id)
+        self._invalidate(user_id=user_id)
+        return deleted
 
     # NEW: Methods for password reset
     async def set_reset_code(self, email: str, reset_code: str, expiry: datetime) -> bool:
@@ -70,6 +98,7 @@ class UserRepository(BaseRepository):
                 "updated_at": datetime.utcnow()
             }}
         )
+        self._invalidate(email=email)
         return result.modified_count > 0
 
     async def verify_reset_code(self, email: str, reset_code: str) -> Optional[User]:
@@ -92,6 +121,7 @@ class UserRepository(BaseRepository):
                 "updated_at": datetime.utcnow()
             }}
         )
+        self._invalidate(email=email)
         return result.modified_count > 0
 
     async def create_indexes(self):
@@ -102,20 +132,41 @@ class UserRepository(BaseRepository):
 
 
 class ProcessedFileRepository(BaseRepository):
-    def __init__(self):
+    def __init__(self, count_ttl: float = 300.0):
         super().__init__("processed_files")
+        # Per-user file counts: kept up to date by the writes below, recounted after count_ttl
+        # seconds to pick up changes made by other API processes
+        self.count_ttl = count_ttl
+        self._counts = {}  # user_id -> (expires_at, count)
 
     async def create_processed_file(self, file_data: dict) -> ProcessedFile:
         result = await self.collection.insert_one(file_data)
         file_data["_id"] = result.inserted_id
+        self._adjust_count(file_data["user_id"], 1)
         return ProcessedFile(**file_data)
 
-    async def get_files_by_user(self, user_id: str, skip: int = 0, limit: int = 20) -> List[ProcessedFile]:
-        cursor = (self.collection.find({"user_id": ObjectId(user_id)})
-                  .sort("created_at", DESCENDING)
-                  .skip(skip).limit(limit))
+    async def get_files_by_user(self, user_id: str, before: Optional[str] = None,
+                                limit: int = 20) -> Tuple[List[ProcessedFile], Optional[str]]:
+        """
+        One page of the user's files, newest first, and the cursor of the next
+        page (None on the last one). ``before`` is a cursor from a previous
+        page; the (user_id, created_at, _id) index serves any page with a
+        seek instead of skipping over the newer files.
+        """
+        query = {"user_id": ObjectId(user_id)}
+        if before:
+            created_at, file_id = decode_history_cursor(before)
+            query["$or"] = [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": file_id}}
+            ]
+        cursor = (self.collection.find(query, HISTORY_PROJECTION)
+                  .sort([("created_at", DESCENDING), ("_id", DESCENDING)])
+                  .limit(limit + 1))
 
-        return [ProcessedFile(**data) async for data in cursor]
+        files = [ProcessedFile(**data) async for data in cursor]
+        next_cursor = encode_history_cursor(files[limit - 1]) if len(files) > limit else None
+        return files[:limit], next_cursor
 
     async def get_file_by_id(self, file_id: str) -> Optional[ProcessedFile]:
         return await self.find_by_id(file_id, ProcessedFile)
@@ -127,9 +178,37 @@ class ProcessedFileRepository(BaseRepository):
         })
         return ProcessedFile(**data) if data else None
 
+    async def get_files_by_ids(self, user_id: str, file_ids: List[str]) -> List[ProcessedFile]:
+        """The user's files among ``file_ids`` (ids of other users' files are ignored)"""
+        cursor = self.collection.find({"_id": {"$in": [ObjectId(file_id) for file_id in file_ids]},
+                                       "user_id": ObjectId(user_id)})
+        return [ProcessedFile(**data) async for data in cursor]
+
     async def update_file(self, file_id: str, update_data: dict) -> bool:
         return await self.update_by_id(file_id, update_data)
 
+    async def update_files(self, file_ids: List[str], update_data: dict) -> int:
+        result = await self.collection.update_many(
+            {"_id": {"$in": [ObjectId(file_id) for file_id in file_ids]}},
+            {"$set": update_data}
+        )
+        return result.modified_count
+
+    async def fail_unfinished_files(self, error_message: str) -> List[ProcessedFile]:
+        """
+        Mark every queued/running file failed with ``error_message`` and return
+        them. Jobs run inside the API process, so at startup these records
+        belong to jobs that died with the previous process.
+        """
+        query = {"processing_status": {"$in": ["queued", "running"]}}
+        files = [ProcessedFile(**data) async for data in self.collection.find(query)]
+        if files:
+            await self.collection.update_many(
+                {**query, "_id": {"$in": [f.id for f in files]}},
+                {"$set": {"processing_status": "failed", "error_message": error_message}}
+            )
+        return files
+
     async def increment_download_count(self, file_id: str) -> bool:
         result = await self.collection.update_one(
             {"_id": ObjectId(file_id)},
@@ -137,13 +216,99 @@ class ProcessedFileRepository(BaseRepository):
         )
         return result.modified_count > 0
 
+    async def increment_download_counts(self, counts: dict) -> int:
+        """Add buffered download counts (file id -> downloads) in a single bulk write"""
+        if not counts:
+            return 0
+        result = await self.collection.bulk_write(
+            [UpdateOne({"_id": ObjectId(file_id)}, {"$inc": {"download_count": count}})
+             for file_id, count in counts.items()],
+            ordered=False
+        )
+        return result.modified_count
+
     async def delete_file(self, file_id: str) -> bool:
-        return await self.delete_by_id(file_id)
+        data = await self.collection.find_one_and_delete({"_id": ObjectId(file_id)}, {"user_id": 1})
+        if data is None:
+            return False
+        self._adjust_count(data["user_id"], -1)
+        return True
+
+    async def delete_files(self, user_id: str, file_ids: List[str]) -> int:
+        """Delete the user's files among ``file_ids`` in one delete_many, returns how many were deleted"""
+        result = await self.collection.delete_many({"_id": {"$in": [ObjectId(file_id) for file_id in file_ids]},
+                                                    "user_id": ObjectId(user_id)})
+        self._adjust_count(user_id, -result.deleted_count)
+        return result.deleted_count
 
     async def get_user_file_count(self, user_id: str) -> int:
-        return await self.collection.count_documents({"user_id": ObjectId(user_id)})
+        """Number of files of the user, from the cached counter (count_documents only on a miss)"""
+        entry = self._counts.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        count = await self.collection.count_documents({"user_id": ObjectId(user_id)})
+        if len(self._counts) >= 10000:
+            now = time.monotonic()
+            self._counts = {key: value for key, value in self._counts.items() if value[0] > now}
+        self._counts[user_id] = (time.monotonic() + self.count_ttl, count)
+        return count
+
+    def _adjust_count(self, user_id, delta: int):
+        entry = self._counts.get(str(user_id))
+        if entry is not None:
+            self._counts[str(user_id)] = (entry[0], max(0, entry[1] + delta))
+
+    async def create_indexes(self):
+        # Serves the history query (equality on user_id, then the created_at/_id keyset in sort order);
+        # its user_id prefix also covers lookups by user, so no separate user_id/created_at indexes
+        await self.collection.create_index([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)])
+        await self.collection.create_index([("processed_filename", ASCENDING)])
+
+
+class CacheEntryRepository(BaseRepository):
+    def __init__(self):
+        super().__init__("ocr_cache")
+
+    async def get_entry(self, cache_key: str) -> Optional[CacheEntry]:
+        data = await self.collection.find_one({"cache_key": cache_key})
+        return CacheEntry(**data) if data else None
+
+    async def upsert_entry(self, cache_key: str, filename: str, file_size: int) -> bool:
+        now = datetime.utcnow()
+        result = await self.collection.update_one(
+            {"cache_key": cache_key},
+            {"$set": {"filename": filename, "file_size": file_size, "last_used_at": now},
+             "$setOnInsert": {"created_at": now, "hit_count": 0}},
+            upsert=True
+        )
+        return result.acknowledged
+
+    async def touch(self, cache_key: str) -> bool:
+        """Mark an entry as used by a cache hit"""
+        result = await self.collection.update_one(
+            {"cache_key": cache_key},
+            {"$set": {"last_used_at": datetime.utcnow()}, "$inc": {"hit_count": 1}}
+        )
+        return result.modified_count > 0
+
+    async def get_entries_unused_since(self, before: datetime) -> List[CacheEntry]:
+        cursor = self.collection.find({"last_used_at": {"$lt": before}})
+        return [CacheEntry(**data) async for data in cursor]
+
+    async def get_least_recently_used(self, limit: int = 100) -> List[CacheEntry]:
+        cursor = self.collection.find().sort("last_used_at", ASCENDING).limit(limit)
+        return [CacheEntry(**data) async for data in cursor]
+
+    async def get_total_size(self) -> int:
+        cursor = self.collection.aggregate([{"$group": {"_id": None, "total": {"$sum": "$file_size"}}}])
+        async for data in cursor:
+            return data["total"]
+        return 0
+
+    async def delete_entries(self, cache_keys: List[str]) -> int:
+        result = await self.collection.delete_many({"cache_key": {"$in": cache_keys}})
+        return result.deleted_count
 
     async def create_indexes(self):
-        await self.collection.create_index([("user_id", ASCENDING)])
-        await self.collection.create_index([("created_at", DESCENDING)])
-        await self.collection.create_index([("processed_filename", ASCENDING)])
\ No newline at end of file
+        await self.collection.create_index([("cache_key", ASCENDING)], unique=True)
+        await self.collection.create_index([("last_used_at", ASCENDING)])
@@ -0,0 +1,206 @@
+import os
+import asyncio
+import hashlib
+import zipfile
+from email.utils import formatdate
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+CHUNK_SIZE = 256 * 1024
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file, read in chunks (run it in a thread for large files)"""
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def make_etag(path: str, content_hash: Optional[str] = None) -> str:
+    """Strong ETag from the output's content hash; weak size/mtime ETag for records stored without one"""
+    if content_hash:
+        return f'"{content_hash}"'
+    stat = os.stat(path)
+    return f'W/"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak: a W/ prefix on either side is ignored)"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def parse_range(header: Optional[str], size: int):
+    """
+    Parse a ``Range: bytes=...`` header into an inclusive (start, end).
+
+    Returns None when the whole file should be sent: no header, another unit,
+    a malformed value (including a last byte before the first, which RFC 7233
+    says to ignore), or several ranges (answering those with the full file is
+    allowed). Raises ValueError when the range is not satisfiable.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, sep, last = header[len("bytes="):].strip().partition("-")
+    if not sep or not (first + last).isdigit():
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("unsatisfiable range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError("unsatisfiable range")
+    end = min(int(last), size - 1) if last else size - 1
+    return start, end
+
+
+def _read_range(path: str, start: int, end: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def conditional_file_response(request: Request, path: str, filename: str, etag: str,
+                              media_type: str = "application/pdf"):
+    """
+    Serve ``path`` honouring If-None-Match (304), Range (206, single range)
+    and If-Range. Returns (response, counted): ``counted`` is True when the
+    response starts at byte 0, so resumed ranges and 304s do not count as
+    new downloads.
+    """
+    stat = os.stat(path)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",  # revalidate with the ETag, never serve stale
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers), False
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    # A range is only valid against the representation the client already has
+    if if_range is None or (not etag.startswith("W/") and if_range.strip() == etag):
+        try:
+            byte_range = parse_range(request.headers.get("range"), stat.st_size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{stat.st_size}"}), False
+
+    if byte_range is None:
+        return FileResponse(path, filename=filename, media_type=media_type, headers=headers), True
+
+    start, end = byte_range
+    headers.update({
+        "Content-Range": f"bytes {start}-{end}/{stat.st_size}",
+        "Content-Length": str(end - start + 1),
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    })
+    return StreamingResponse(_read_range(path, start, end), status_code=206, media_type=media_type,
+                             headers=headers), start == 0
+
+
+class _ChunkSink:
+    """Write-only file object for ZipFile: collects the bytes written since the last drain()"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def stream_zip(entries, chunk_size: int = CHUNK_SIZE):
+    """
+    Generate a ZIP archive of ``entries`` ((name in the archive, path) pairs) chunk by chunk.
+
+    The archive is written to a non-seekable sink, so ZipFile puts sizes and
+    CRCs in data descriptors after each member and nothing but the current
+    chunk is held in memory. Members are stored, not deflated: OCR outputs
+    are PDFs of already compressed images. A sync generator: StreamingResponse
+    runs it in a worker thread.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+        for name, path in entries:
+            info = zipfile.ZipInfo.from_file(path, name)
+            info.compress_type = zipfile.ZIP_STORED
+            # file_size is known up front, so ZIP64 is chosen correctly for members over 4 GiB
+            with open(path, "rb") as src, archive.open(info, "w") as member:
+                while chunk := src.read(chunk_size):
+                    member.write(chunk)
+                    yield sink.drain()
+        yield sink.drain()
+    yield sink.drain()  # central directory, written on close
+
+
+class DownloadCounter:
+    """
+    Buffers download counts in memory and writes them in one bulk update
+    every ``flush_interval`` seconds, so a popular file costs one database
+    write per interval instead of one per request.
+    """
+
+    def __init__(self, flush_interval: float = 5.0):
+        self.flush_interval = flush_interval
+        self.repo = None
+        self._counts = {}
+        self._task = None
+
+    def start(self, repo):
+        """Bind the repository and start the periodic flush (must be called from the event loop)"""
+        self.repo = repo
+        self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    def record(self, file_id: str):
+        self._counts[file_id] = self._counts.get(file_id, 0) + 1
+
+    async def flush(self):
+        if not self._counts or self.repo is None:
+            return
+        counts, self._counts = self._counts, {}
+        try:
+            await self.repo.increment_download_counts(counts)
+        except Exception as e:
+            print(f"Failed to write download counts: {e}")
+            for file_id, count in counts.items():
+                self._counts[file_id] = self._counts.get(file_id, 0) + count
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def stop(self):
+        """Stop the periodic flush and write what is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
@@ -1,24 +1,31 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, status
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 import os
-import shutil
+import asyncio
 import jwt
-import bcrypt
 from typing import Optional, List
 import time
 from dotenv import load_dotenv
 import random
 import string
+from bson import ObjectId
 
 from src.backend.database.connection import connect_to_mongo, close_mongo_connection
 from src.backend.database.repositories import UserRepository, ProcessedFileRepository
 from src.backend.database.models import *
 from src.backend.database.email_service import email_service
-from src.app.process import Process
+from src.backend.ocr_executor import OCRExecutor, QueueFullError
+from src.backend.result_cache import ResultCache
+from src.backend.user_cache import UserCache
+from src.backend.passwords import PasswordHasher
+from src.backend.uploads import PART_OVERHEAD, UploadError, receive_files
+from src.backend.downloads import DownloadCounter, conditional_file_response, file_sha256, make_etag, stream_zip
+from src.backend.metrics import CONTENT_TYPE, render_prometheus
+from src.app.metrics import StageMetrics
 
 load_dotenv()
 
@@ -26,12 +33,97 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", "2"))
+OCR_REC_BATCH_SIZE = int(os.getenv("OCR_REC_BATCH_SIZE", "32"))
+OCR_DET_BATCH_SIZE = int(os.getenv("OCR_DET_BATCH_SIZE", "4"))
+OCR_PIPELINE = os.getenv("OCR_PIPELINE", "false").lower() in ("1", "true", "yes")
+OCR_DET_WORKERS = int(os.getenv("OCR_DET_WORKERS", "1"))
+OCR_REC_WORKERS = int(os.getenv("OCR_REC_WORKERS", "1"))
+OCR_SKIP_TEXT_PAGES = os.getenv("OCR_SKIP_TEXT_PAGES", "true").lower() in ("1", "true", "yes")
+OCR_MIN_TEXT_CHARS = int(os.getenv("OCR_MIN_TEXT_CHARS", "50"))
+OCR_RENDER_DPI = int(os.getenv("OCR_RENDER_DPI", "150"))
+OCR_RENDER_MAX_SIDE = int(os.getenv("OCR_RENDER_MAX_SIDE", "4000"))
+OCR_DET_MAX_SIDE = int(os.getenv("OCR_DET_MAX_SIDE", "1600"))
+OCR_IMAGE_MODE = os.getenv("OCR_IMAGE_MODE", "auto")
+OCR_DET_MODEL = os.getenv("OCR_DET_MODEL", "PP-OCRv5_server_det")
+OCR_REC_MODEL = os.getenv("OCR_REC_MODEL", "vgg_seq2seq")
+OCR_REC_QUANTIZE = os.getenv("OCR_REC_QUANTIZE", "false").lower() in ("1", "true", "yes")
+OCR_REC_TORCHSCRIPT = os.getenv("OCR_REC_TORCHSCRIPT", "false").lower() in ("1", "true", "yes")
+OCR_TORCH_THREADS = int(os.getenv("OCR_TORCH_THREADS", "0"))
+OCR_LINEARIZE = os.getenv("OCR_LINEARIZE", "false").lower() in ("1", "true", "yes")
+OCR_PRELOAD = os.getenv("OCR_PRELOAD", "true").lower() in ("1", "true", "yes")
+OCR_WEIGHTS_DIR = os.getenv("OCR_WEIGHTS_DIR") or None
+OCR_JPEG_QUALITY = int(os.getenv("OCR_JPEG_QUALITY", "80"))
+OCR_IMAGE_DPI = int(os.getenv("OCR_IMAGE_DPI", "0")) or None
+OCR_PAGE_CACHE_MB = int(os.getenv("OCR_PAGE_CACHE_MB", "256"))
+OCR_PAGE_CACHE_DIR = os.getenv("OCR_PAGE_CACHE_DIR") or None
+OCR_EXECUTOR = os.getenv("OCR_EXECUTOR", "process")
+OCR_MAX_WORKERS = int(os.getenv("OCR_MAX_WORKERS", "1"))
+OCR_MAX_QUEUE = int(os.getenv("OCR_MAX_QUEUE", "8"))
+OCR_METRICS = os.getenv("OCR_METRICS", "true").lower() in ("1", "true", "yes")
+OCR_CACHE_ENABLED = os.getenv("OCR_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+OCR_CACHE_MAX_MB = int(os.getenv("OCR_CACHE_MAX_MB", "5120"))
+OCR_CACHE_MAX_AGE_DAYS = int(os.getenv("OCR_CACHE_MAX_AGE_DAYS", "30"))
+OCR_MAX_UPLOAD_MB = int(os.getenv("OCR_MAX_UPLOAD_MB", "100"))
+OCR_MAX_PAGES = int(os.getenv("OCR_MAX_PAGES", "0"))
+OCR_MAX_BATCH_FILES = int(os.getenv("OCR_MAX_BATCH_FILES", "20"))
+DOWNLOAD_COUNT_FLUSH_SECONDS = float(os.getenv("DOWNLOAD_COUNT_FLUSH_SECONDS", "5"))
+DOWNLOAD_LINK_TTL_SECONDS = int(os.getenv("DOWNLOAD_LINK_TTL_SECONDS", "60"))
+ZIP_MAX_FILES = 100
+UPLOAD_PATHS = ("/process", "/process/batch", "/jobs")
+
+if OCR_WEIGHTS_DIR:
+    # Local weights only: stop PaddleX from probing model hosters when it is imported in the workers
+    os.environ.setdefault("PADDLE_PDX_DISABLE_MODEL_SOURCE_CHECK", "True")
 
 # Global instances
 user_repo = None
 file_repo = None
 security = HTTPBearer()
-process = Process()
+ocr_executor = OCRExecutor(
+    mode=OCR_EXECUTOR,
+    max_workers=OCR_MAX_WORKERS,
+    max_queue=OCR_MAX_QUEUE,
+    metrics=OCR_METRICS,
+    process_kwargs={
+        "rec_batch_size": OCR_REC_BATCH_SIZE,
+        "det_batch_size": OCR_DET_BATCH_SIZE,
+        "pipeline": OCR_PIPELINE,
+        "det_workers": OCR_DET_WORKERS,
+        "rec_workers": OCR_REC_WORKERS,
+        "cache_max_mb": OCR_PAGE_CACHE_MB,
+        "cache_dir": OCR_PAGE_CACHE_DIR,
+        "skip_text_pages": OCR_SKIP_TEXT_PAGES,
+        "min_text_chars": OCR_MIN_TEXT_CHARS,
+        "render_dpi": OCR_RENDER_DPI,
+        "render_max_side": OCR_RENDER_MAX_SIDE,
+        "det_max_side": OCR_DET_MAX_SIDE,
+        "image_mode": OCR_IMAGE_MODE,
+        "jpeg_quality": OCR_JPEG_QUALITY,
+        "image_dpi": OCR_IMAGE_DPI,
+        "weights_dir": OCR_WEIGHTS_DIR,
+        "det_model_name": OCR_DET_MODEL,
+        "rec_model_name": OCR_REC_MODEL,
+        "rec_quantize": OCR_REC_QUANTIZE,
+        "rec_torchscript": OCR_REC_TORCHSCRIPT,
+        "torch_threads": OCR_TORCH_THREADS,
+        "linearize": OCR_LINEARIZE
+    }
+)
+result_cache = ResultCache(
+    max_bytes=OCR_CACHE_MAX_MB * 1024 * 1024,
+    max_age_days=OCR_CACHE_MAX_AGE_DAYS,
+    settings=ocr_executor.process_kwargs,
+    enabled=OCR_CACHE_ENABLED
+)
+download_counter = DownloadCounter(flush_interval=DOWNLOAD_COUNT_FLUSH_SECONDS)
+user_cache = UserCache(ttl=USER_CACHE_TTL_SECONDS)
+password_hasher = PasswordHasher(max_workers=BCRYPT_WORKERS)
+
+# Background OCR jobs: running tasks (kept referenced) and start times used for ETA
+background_jobs = set()
+job_started_at = {}
 
 # Ensure directories
 os.makedirs("temp_files", exist_ok=True)
@@ -41,17 +133,49 @@ os.makedirs("output_files", exist_ok=True)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     global user_repo, file_repo
+    if OCR_PRELOAD:
+        # Load the OCR models in the background; the API answers right away and
+        # OCR requests arriving earlier wait until the models are ready
+        ocr_executor.start_warm_up()
     await connect_to_mongo()
-    user_repo = UserRepository()
+    user_repo = UserRepository(cache=user_cache)
     file_repo = ProcessedFileRepository()
+    result_cache.start()
     await user_repo.create_indexes()
     await file_repo.create_indexes()
+    await result_cache.repo.create_indexes()
+    await fail_interrupted_jobs()
+    download_counter.start(file_repo)
+    email_service.start()
     yield
+    await download_counter.stop()
+    await email_service.stop()
+    password_hasher.shutdown()
+    ocr_executor.shutdown(wait=False)
     await close_mongo_connection()
 
 
 app = FastAPI(lifespan=lifespan)
 
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """
+    Refuse uploads whose Content-Length is already over the limit, before reading anything.
+    Bodies without Content-Length (chunked) are limited by receive_files as they stream in.
+    """
+    if request.method == "POST" and request.url.path in UPLOAD_PATHS and OCR_MAX_UPLOAD_MB:
+        files = OCR_MAX_BATCH_FILES if request.url.path == "/process/batch" else 1
+        length = request.headers.get("content-length")
+        # Allowance for the multipart boundaries and part headers around each file
+        if length and length.isdigit() and int(length) > files * (OCR_MAX_UPLOAD_MB * 1024 * 1024 + PART_OVERHEAD):
+            detail = (f"File is larger than {OCR_MAX_UPLOAD_MB} MB" if files == 1
+                      else f"Batch is larger than {files} files of {OCR_MAX_UPLOAD_MB} MB")
+            return JSONResponse({"detail": detail}, status_code=413)
+    return await call_next(request)
+
+
+# Added after limit_upload_size so CORS headers are also set on its 413 responses
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000", "http://localhost:5173"],
@@ -61,13 +185,13 @@ app.add_middleware(
 )
 
 
-# Auth utilities
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+# Auth utilities (bcrypt runs in the hasher's thread pool, never on the event loop)
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
 
 
-def verify_password(plain: str, hashed: str) -> bool:
-    return bcrypt.checkpw(plain.encode(), hashed.encode())
+async def verify_password(plain: str, hashed: str) -> bool:
+    return await password_hasher.verify(plain, hashed)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -100,7 +224,8 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         if not username:
             raise HTTPException(status_code=401, detail="Invalid token")
 
-        user = await user_repo.get_user_by_username(username)
+        # Cached for a few seconds and shared by concurrent requests; dropped on any write to the user
+        user = await user_cache.get(username, user_repo.get_user_by_username)
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
 
@@ -121,7 +246,7 @@ async def sign_up(user_data: UserSignUp):
     # Create user
     user_dict = {
         **user_data.dict(),
-        "password": hash_password(user_data.password),
+        "password": await hash_password(user_data.password),
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow(),
         "is_active": True
@@ -145,7 +270,7 @@ async def sign_up(user_data: UserSignUp):
 @app.post("/auth/login", response_model=TokenResponse)
 async def login(user_data: UserLogin):
     user = await user_repo.get_user_by_username(user_data.username)
-    if not user or not verify_password(user_data.password, user.password):
+    if not user or not await verify_password(user_data.password, user.password):
         raise HTTPException(400, "Invalid credentials")
 
     access_token = create_access_token(
@@ -177,11 +302,11 @@ async def change_password(
         current_user: User = Depends(get_current_user)
 ):
     # Verify old password
-    if len(password_data.old_password) < 6 or not verify_password(password_data.old_password, current_user.password):
+    if len(password_data.old_password) < 6 or not await verify_password(password_data.old_password, current_user.password):
         raise HTTPException(400, "Current password is incorrect")
 
     # Hash new password
-    hashed_new_password = hash_password(password_data.new_password)
+    hashed_new_password = await hash_password(password_data.new_password)
 
     # Update password in database
     success = await user_repo.update_user(str(current_user.id), {
@@ -235,7 +360,7 @@ async def forgot_password(request: ForgotPasswordRequest):
     # Save reset code to database using user email
     await user_repo.set_reset_code(user.email, reset_code, expiry)
 
-    # Send email to user's email
+    # Queue the email to the user's address; it is sent in the background
     email_sent = await email_service.send_reset_code_email(user.email, reset_code)
     if not email_sent:
         raise HTTPException(500, "Failed to send reset code email")
@@ -260,7 +385,7 @@ async def reset_password(request: ResetPasswordRequest):
         raise HTTPException(400, "Invalid or expired reset code")
 
     # Hash new password
-    hashed_password = hash_password(request.new_password)
+    hashed_password = await hash_password(request.new_password)
 
     # Update password and clear reset code
     success = await user_repo.update_user(str(user.id), {
@@ -277,39 +402,71 @@ async def reset_password(request: ResetPasswordRequest):
     return SuccessResponse(message="Password reset successfully")
 
 # File processing endpoints
-@app.post("/process")
-async def process_file_endpoint(
-        file: UploadFile = File(...),
-        current_user: User = Depends(get_current_user)
-):
-    if not file.filename.lower().endswith(('.pdf', '.png', '.jpg', '.jpeg')):
-        raise HTTPException(400, "Only PDF, PNG, JPG, JPEG files supported")
-
-    input_path = f"temp_files/{file.filename}"
-    output_filename = f"ocr_{int(time.time())}_{file.filename}"
+def make_output_filename(filename: str, index: Optional[int] = None) -> str:
+    """Name of the OCR output; files of one batch get their index too, so same-named uploads do not collide"""
+    prefix = f"ocr_{int(time.time())}" if index is None else f"ocr_{int(time.time())}_{index}"
+    output_filename = f"{prefix}_{filename}"
     if not output_filename.endswith('.pdf'):
         output_filename += '.pdf'
-    output_path = f"output_files/{output_filename}"
+    return output_filename
+
+
+def upload_body(field: str, multiple: bool = False) -> dict:
+    """OpenAPI request body of an endpoint reading its multipart upload itself (receive_uploads)"""
+    schema = {"type": "string", "format": "binary"}
+    if multiple:
+        schema = {"type": "array", "items": schema}
+    return {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object", "properties": {field: schema}, "required": [field]}}}}}
 
-    start_time = time.time()
 
+async def receive_uploads(request: Request, field: str = "file", max_files: int = 1):
+    """
+    Stream the uploaded files of the request body to unique temp files, applying the
+    size/page limits as the body arrives; a rejection is raised as an HTTPException
+    """
     try:
-        # Save and process file
-        with open(input_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        return await receive_files(request, "temp_files", field=field, max_files=max_files,
+                                   max_bytes=OCR_MAX_UPLOAD_MB * 1024 * 1024, max_pages=OCR_MAX_PAGES)
+    except UploadError as e:
+        detail = f"{e.filename}: {e.detail}" if e.filename and max_files > 1 else e.detail
+        raise HTTPException(e.status_code, detail)
 
-        file_size = os.path.getsize(input_path)
-        process.process_file(input_path, final_output_name=output_path)
+
+@app.post("/process", openapi_extra=upload_body("file"))
+async def process_file_endpoint(
+        request: Request,
+        current_user: User = Depends(get_current_user)
+):
+    start_time = time.time()
+    upload, = await receive_uploads(request)
+    input_path = upload.path
+    output_filename = make_output_filename(upload.filename)
+    output_path = f"output_files/{output_filename}"
+
+    try:
+        # Serve from the result cache or run OCR
+        cache_key = result_cache.make_key(upload.sha256)
+        report = {}
+        if not await result_cache.restore(cache_key, output_path):
+            report = await ocr_executor.process_file(input_path, output_path)
+            await result_cache.store(cache_key, output_path)
         processing_time = time.time() - start_time
 
         # Save to database
         file_data = {
             "user_id": current_user.id,
-            "original_filename": file.filename,
+            "original_filename": upload.filename,
             "processed_filename": output_filename,
-            "file_size": file_size,
-            "file_type": file.content_type,
+            "file_size": upload.size,
+            "file_type": upload.content_type,
             "processing_time": processing_time,
+            "content_hash": upload.sha256,
+            "output_size": os.path.getsize(output_path),
+            "output_hash": await asyncio.to_thread(file_sha256, output_path),
+            "pages_total": report.get("pages_total", upload.pages),
+            "skipped_pages": report.get("skipped_pages", []),
+            "stage_breakdown": StageMetrics.breakdown(report.get("metrics")),
             "created_at": datetime.utcnow()
         }
 
@@ -324,30 +481,314 @@ async def process_file_endpoint(
             "download_url": f"/download/{output_filename}",
             "filename": output_filename,
             "file_id": str(processed_file.id),
-            "processing_time": processing_time
+            "processing_time": processing_time,
+            "file_size": processed_file.file_size,
+            "output_size": processed_file.output_size,
+            "skipped_pages": processed_file.skipped_pages
         }
 
+    except QueueFullError:
+        if os.path.exists(input_path):
+            os.remove(input_path)
+        raise HTTPException(503, "Server is busy, please try again later", headers={"Retry-After": "30"})
     except Exception as e:
         if os.path.exists(input_path):
             os.remove(input_path)
         raise HTTPException(500, f"Processing failed: {str(e)}")
 
 
+async def fail_interrupted_jobs():
+    """
+    Startup: jobs only live in this process (background_jobs), so a record still queued or
+    running was interrupted by a restart. Mark it failed and remove its partial output,
+    which frees the output path; the client sees the failure on its next poll.
+    """
+    files = await file_repo.fail_unfinished_files("Interrupted by a server restart, please upload the file again")
+    for file in files:
+        output_path = f"output_files/{file.processed_filename}"
+        if os.path.exists(output_path):
+            os.remove(output_path)
+    if files:
+        print(f"Marked {len(files)} OCR jobs interrupted by the restart as failed")
+
+
+async def run_ocr_job(file_id: str, input_path: str, output_path: str, cache_key: str):
+    """Run a queued OCR job and keep its ProcessedFile status up to date"""
+    async def mark_running():
+        job_started_at[file_id] = time.time()
+        await file_repo.update_file(file_id, {"processing_status": "running"})
+
+    try:
+        report = await ocr_executor.process_file(input_path, output_path, job_id=file_id,
+                                                 reserved=True, on_start=mark_running)
+        await result_cache.store(cache_key, output_path)
+        await file_repo.update_file(file_id, {
+            "processing_status": "completed",
+            "processing_time": time.time() - job_started_at[file_id],
+            "output_size": report.get("output_size"),
+            "output_hash": await asyncio.to_thread(file_sha256, output_path),
+            "pages_total": report.get("pages_total"),
+            "skipped_pages": report.get("skipped_pages", []),
+            "stage_breakdown": StageMetrics.breakdown(report.get("metrics"))
+        })
+    except Exception as e:
+        print(f"OCR job {file_id} failed: {e}")
+        await file_repo.update_file(file_id, {"processing_status": "failed", "error_message": str(e)})
+    finally:
+        job_started_at.pop(file_id, None)
+        ocr_executor.clear_progress(file_id)
+        if os.path.exists(input_path):
+            os.remove(input_path)
+
+
+@app.post("/jobs", response_model=JobCreatedResponse, status_code=202, openapi_extra=upload_body("file"))
+async def create_job(
+        request: Request,
+        current_user: User = Depends(get_current_user)
+):
+    start_time = time.time()
+    reserved = False
+    upload, = await receive_uploads(request)
+    input_path = upload.path
+    output_filename = make_output_filename(upload.filename)
+    output_path = f"output_files/{output_filename}"
+
+    try:
+        cache_key = result_cache.make_key(upload.sha256)
+        file_data = {
+            "user_id": current_user.id,
+            "original_filename": upload.filename,
+            "processed_filename": output_filename,
+            "file_size": upload.size,
+            "file_type": upload.content_type,
+            "content_hash": upload.sha256,
+            "pages_total": upload.pages,
+            "created_at": datetime.utcnow()
+        }
+
+        # Same document already processed: the job is complete right away
+        if await result_cache.restore(cache_key, output_path):
+            os.remove(input_path)
+            processed_file = await file_repo.create_processed_file({
+                **file_data,
+                "processing_status": "completed",
+                "processing_time": time.time() - start_time,
+                "output_size": os.path.getsize(output_path),
+                "output_hash": await asyncio.to_thread(file_sha256, output_path)
+            })
+            job_id = str(processed_file.id)
+            return JobCreatedResponse(job_id=job_id, status="completed", status_url=f"/jobs/{job_id}")
+
+        ocr_executor.reserve()
+        reserved = True
+        processed_file = await file_repo.create_processed_file({**file_data, "processing_status": "queued"})
+    except QueueFullError:
+        if os.path.exists(input_path):
+            os.remove(input_path)
+        raise HTTPException(503, "Server is busy, please try again later", headers={"Retry-After": "30"})
+    except Exception as e:
+        if reserved:
+            ocr_executor.release()
+        if os.path.exists(input_path):
+            os.remove(input_path)
+        raise HTTPException(500, f"Failed to queue file: {str(e)}")
+
+    job_id = str(processed_file.id)
+    task = asyncio.create_task(run_ocr_job(job_id, input_path, output_path, cache_key))
+    background_jobs.add(task)
+    task.add_done_callback(background_jobs.discard)
+
+    return JobCreatedResponse(job_id=job_id, status="queued", status_url=f"/jobs/{job_id}")
+
+
+async def run_ocr_batch_job(jobs: list):
+    """
+    Run the files of a /process/batch request needing OCR as one executor job
+    (detection batches span documents) and update each ProcessedFile.
+    ``jobs`` is a list of (file_id, input_path, output_path, cache_key).
+    """
+    job_ids = [job[0] for job in jobs]
+    files = [(input_path, output_path) for _, input_path, output_path, _ in jobs]
+
+    async def mark_running():
+        now = time.time()
+        for job_id in job_ids:
+            job_started_at[job_id] = now
+        await file_repo.update_files(job_ids, {"processing_status": "running"})
+
+    try:
+        try:
+            reports = await ocr_executor.process_files(files, job_ids=job_ids, reserved=True, on_start=mark_running)
+        except Exception as e:
+            print(f"OCR batch {job_ids} failed: {e}")
+            await file_repo.update_files(job_ids, {"processing_status": "failed", "error_message": str(e)})
+            return
+
+        # Stage timings are for the whole batch, the files share the detection batches
+        breakdown = StageMetrics.breakdown(reports[0].get("metrics"))
+        if breakdown is not None:
+            breakdown["batch_files"] = len(jobs)
+        for (file_id, _, output_path, cache_key), report in zip(jobs, reports):
+            try:
+                if "error" in report:
+                    await file_repo.update_file(file_id, {"processing_status": "failed",
+                                                          "error_message": report["error"]})
+                    continue
+                await result_cache.store(cache_key, output_path)
+                await file_repo.update_file(file_id, {
+                    "processing_status": "completed",
+                    "processing_time": time.time() - job_started_at[file_id],
+                    "output_size": report.get("output_size"),
+                    "output_hash": await asyncio.to_thread(file_sha256, output_path),
+                    "pages_total": report.get("pages_total"),
+                    "skipped_pages": report.get("skipped_pages", []),
+                    "stage_breakdown": breakdown
+                })
+            except Exception as e:
+                print(f"OCR job {file_id} failed: {e}")
+                await file_repo.update_file(file_id, {"processing_status": "failed", "error_message": str(e)})
+    finally:
+        for file_id, input_path, _, _ in jobs:
+            job_started_at.pop(file_id, None)
+            ocr_executor.clear_progress(file_id)
+            if os.path.exists(input_path):
+                os.remove(input_path)
+
+
+@app.post("/process/batch", response_model=List[JobCreatedResponse], status_code=202,
+          openapi_extra=upload_body("files", multiple=True))
+async def create_batch(
+        request: Request,
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Queue several files (form field "files", at most OCR_MAX_BATCH_FILES) as one OCR job,
+    so their pages share detection batches.
+    Returns one job per file (in upload order), polled with GET /jobs/{job_id}.
+    """
+    start_time = time.time()
+    uploads = await receive_uploads(request, field="files", max_files=OCR_MAX_BATCH_FILES)
+    try:
+        # The whole batch is one OCR job: one admission slot, taken before anything is written
+        ocr_executor.reserve()
+    except QueueFullError:
+        for upload in uploads:
+            if os.path.exists(upload.path):
+                os.remove(upload.path)
+        raise HTTPException(503, "Server is busy, please try again later", headers={"Retry-After": "30"})
+
+    created, pending = [], []
+    try:
+        for index, upload in enumerate(uploads):
+            output_filename = make_output_filename(upload.filename, index)
+            output_path = f"output_files/{output_filename}"
+            cache_key = result_cache.make_key(upload.sha256)
+            file_data = {
+                "user_id": current_user.id,
+                "original_filename": upload.filename,
+                "processed_filename": output_filename,
+                "file_size": upload.size,
+                "file_type": upload.content_type,
+                "content_hash": upload.sha256,
+                "pages_total": upload.pages,
+                "created_at": datetime.utcnow()
+            }
+
+            # Same document already processed: this file is complete right away
+            if await result_cache.restore(cache_key, output_path):
+                os.remove(upload.path)
+                processed_file = await file_repo.create_processed_file({
+                    **file_data,
+                    "processing_status": "completed",
+                    "processing_time": time.time() - start_time,
+                    "output_size": os.path.getsize(output_path),
+                    "output_hash": await asyncio.to_thread(file_sha256, output_path)
+                })
+                created.append((str(processed_file.id), "completed"))
+                continue
+
+            processed_file = await file_repo.create_processed_file({**file_data, "processing_status": "queued"})
+            created.append((str(processed_file.id), "queued"))
+            pending.append((str(processed_file.id), upload.path, output_path, cache_key))
+    except Exception as e:
+        ocr_executor.release()
+        for upload in uploads:
+            if os.path.exists(upload.path):
+                os.remove(upload.path)
+        if pending:
+            await file_repo.update_files([job[0] for job in pending],
+                                         {"processing_status": "failed", "error_message": str(e)})
+        raise HTTPException(500, f"Failed to queue files: {str(e)}")
+
+    if pending:
+        task = asyncio.create_task(run_ocr_batch_job(pending))
+        background_jobs.add(task)
+        task.add_done_callback(background_jobs.discard)
+    else:
+        ocr_executor.release()
+
+    return [JobCreatedResponse(job_id=job_id, status=status, status_url=f"/jobs/{job_id}")
+            for job_id, status in created]
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(
+        job_id: str,
+        current_user: User = Depends(get_current_user)
+):
+    file_record = await file_repo.get_file_by_id(job_id) if ObjectId.is_valid(job_id) else None
+    if not file_record or str(file_record.user_id) != str(current_user.id):
+        raise HTTPException(404, "Job not found")
+
+    response = JobStatusResponse(
+        job_id=job_id,
+        status=file_record.processing_status,
+        original_filename=file_record.original_filename,
+        pages_total=file_record.pages_total,
+        processing_time=file_record.processing_time,
+        file_size=file_record.file_size,
+        output_size=file_record.output_size,
+        skipped_pages=file_record.skipped_pages,
+        stage_breakdown=file_record.stage_breakdown,
+        error=file_record.error_message
+    )
+
+    if file_record.processing_status == "running":
+        progress = ocr_executor.get_progress(job_id)
+        response.pages_done = progress.get("pages_done")
+        response.pages_total = progress.get("pages_total", response.pages_total)
+        started_at = job_started_at.get(job_id)
+        if started_at and response.pages_done and response.pages_total:
+            elapsed = time.time() - started_at
+            response.eta_seconds = elapsed / response.pages_done * (response.pages_total - response.pages_done)
+    elif file_record.processing_status == "completed":
+        response.download_url = f"/download/{file_record.processed_filename}"
+
+    return response
+
+
 @app.get("/download/{output_filename}")
 async def download_file(
         output_filename: str,
+        request: Request,
         current_user: User = Depends(get_current_user)
 ):
     file_record = await file_repo.get_file_by_filename(output_filename, str(current_user.id))
     if not file_record:
         raise HTTPException(404, "File not found")
+    if file_record.processing_status != "completed":
+        raise HTTPException(409, f"File is not ready (status: {file_record.processing_status})")
 
     output_path = f"output_files/{output_filename}"
     if not os.path.exists(output_path):
         raise HTTPException(404, "File not found on system")
 
-    await file_repo.increment_download_count(str(file_record.id))
-    return FileResponse(output_path, filename=output_filename, media_type="application/pdf")
+    # Range requests (progressive viewers, resumed downloads) and 304 revalidations are not new downloads
+    response, counted = conditional_file_response(request, output_path, output_filename,
+                                                  make_etag(output_path, file_record.output_hash))
+    if counted:
+        download_counter.record(str(file_record.id))
+    return response
 
 
 @app.delete("/file/{file_id}", response_model=SuccessResponse)
@@ -380,14 +821,116 @@ async def delete_file(
     return SuccessResponse(message="File deleted successfully")
 
 
-@app.get("/history", response_model=List[ProcessedFileResponse])
+def validate_file_ids(ids: List[str]) -> List[str]:
+    """Distinct ids in request order, 400 if any is not an ObjectId"""
+    invalid = [file_id for file_id in ids if not ObjectId.is_valid(file_id)]
+    if invalid:
+        raise HTTPException(400, f"Invalid file ids: {', '.join(invalid[:10])}")
+    return list(dict.fromkeys(ids))
+
+
+@app.delete("/files", response_model=BatchDeleteResponse)
+async def delete_files(
+        request: FileIdsRequest,
+        current_user: User = Depends(get_current_user)
+):
+    """Delete several files: one find for ownership and file names, one delete_many"""
+    ids = validate_file_ids(request.ids)
+    files = await file_repo.get_files_by_ids(str(current_user.id), ids)
+    found = {str(f.id) for f in files}
+
+    for f in files:
+        output_path = f"output_files/{f.processed_filename}"
+        if os.path.exists(output_path):
+            try:
+                os.remove(output_path)
+            except Exception as e:
+                print(f"Warning: Could not delete physical file {output_path}: {e}")
+
+    deleted = await file_repo.delete_files(str(current_user.id), list(found)) if found else 0
+    return BatchDeleteResponse(deleted=deleted, not_found=[file_id for file_id in ids if file_id not in found])
+
+
+async def completed_zip_entries(user_id: str, ids: List[str]) -> list:
+    """(archive name, path) of the user's completed outputs among ``ids``, in request order; 404 if none"""
+    files = {str(f.id): f for f in await file_repo.get_files_by_ids(user_id, ids)}
+    entries = []
+    for file_id in ids:
+        f = files.get(file_id)
+        output_path = f"output_files/{f.processed_filename}" if f else None
+        if f and f.processing_status == "completed" and os.path.exists(output_path):
+            entries.append((file_id, f.processed_filename, output_path))
+    if not entries:
+        raise HTTPException(404, "No completed files found")
+    return entries
+
+
+def zip_response(entries: list) -> StreamingResponse:
+    """Stream the outputs as one ZIP, without building the archive in memory"""
+    for file_id, _, _ in entries:
+        download_counter.record(file_id)
+    filename = f"ocr_files_{datetime.utcnow():%Y%m%d_%H%M%S}.zip"
+    return StreamingResponse(stream_zip([(name, path) for _, name, path in entries]), media_type="application/zip",
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+@app.get("/files/zip")
+async def download_zip(
+        ids: List[str] = Query(..., min_length=1, max_length=ZIP_MAX_FILES),
+        current_user: User = Depends(get_current_user)
+):
+    """Stream the outputs of several completed files as one ZIP (API clients, with the Authorization header)"""
+    return zip_response(await completed_zip_entries(str(current_user.id), validate_file_ids(ids)))
+
+
+@app.post("/files/zip/link", response_model=DownloadLinkResponse)
+async def create_zip_link(
+        request: FileIdsRequest,
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Short-lived link to the ZIP of several completed files, so a browser can download the stream
+    itself (it cannot send the Authorization header on a plain navigation). The token is only
+    good for GET /files/zip/download with these ids, never as an access token.
+    """
+    if len(request.ids) > ZIP_MAX_FILES:
+        raise HTTPException(400, f"At most {ZIP_MAX_FILES} files per ZIP")
+    entries = await completed_zip_entries(str(current_user.id), validate_file_ids(request.ids))
+    token = jwt.encode({
+        "scope": "zip",
+        "user_id": str(current_user.id),
+        "ids": [file_id for file_id, _, _ in entries],
+        "exp": datetime.utcnow() + timedelta(seconds=DOWNLOAD_LINK_TTL_SECONDS)
+    }, SECRET_KEY, algorithm=ALGORITHM)
+    return DownloadLinkResponse(url=f"/files/zip/download?token={token}", expires_in=DOWNLOAD_LINK_TTL_SECONDS)
+
+
+@app.get("/files/zip/download")
+async def download_zip_link(token: str):
+    """Stream the ZIP of a link made by POST /files/zip/link"""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(410, "Download link expired")
+    except jwt.PyJWTError:
+        raise HTTPException(401, "Invalid download link")
+    if payload.get("scope") != "zip":
+        raise HTTPException(401, "Invalid download link")
+    return zip_response(await completed_zip_entries(payload["user_id"], payload["ids"]))
+
+
+@app.get("/history", response_model=FileHistoryPage)
 async def get_file_history(
-        skip: int = 0,
-        limit: int = 20,
+        before: Optional[str] = None,
+        limit: int = Query(20, ge=1, le=100),
         current_user: User = Depends(get_current_user)
 ):
-    files = await file_repo.get_files_by_user(str(current_user.id), skip, limit)
-    return [ProcessedFileResponse(
+    """The user's files newest first; follow next_cursor with ?before= for older pages"""
+    try:
+        files, next_cursor = await file_repo.get_files_by_user(str(current_user.id), before, limit)
+    except ValueError:
+        raise HTTPException(400, "Invalid cursor")
+    return FileHistoryPage(items=[ProcessedFileResponse(
         id=str(f.id),
         original_filename=f.original_filename,
         processed_filename=f.processed_filename,
@@ -395,9 +938,15 @@ async def get_file_history(
         file_type=f.file_type,
         processing_status=f.processing_status,
         processing_time=f.processing_time,
+        output_size=f.output_size,
         created_at=f.created_at,
         download_count=f.download_count
-    ) for f in files]
+    ) for f in files], next_cursor=next_cursor)
+
+
+@app.get("/history/count", response_model=FileCountResponse)
+async def get_file_count(current_user: User = Depends(get_current_user)):
+    return FileCountResponse(total=await file_repo.get_user_file_count(str(current_user.id)))
 
 
 @app.get("/")
@@ -413,13 +962,61 @@ async def root():
                 "POST /auth/change-password",
                 "POST /auth/change-email"
             ],
-            "files": ["POST /process", "GET /download/{filename}", "GET /history", "DELETE /file/{file_id}"]
+            "files": ["POST /process", "POST /process/batch", "GET /download/{filename}", "GET /files/zip",
+                      "GET /history", "GET /history/count", "DELETE /file/{file_id}", "DELETE /files"],
+            "jobs": ["POST /jobs", "GET /jobs/{job_id}"]
         }
     }
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "database": "connected"}
+    return {
+        "status": "healthy",
+        "database": "connected",
+        "ocr": {
+            "models": ocr_executor.model_state,
+            "in_flight": ocr_executor.in_flight,
+            "queued": ocr_executor.queue_depth,
+            "page_cache": ocr_executor.get_cache_stats()
+        },
+        "cache": result_cache.stats,
+        "user_cache": user_cache.stats,
+        "email": email_service.stats
+    }
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus scrape endpoint: OCR stage histograms, counters and queue gauges"""
+    page_cache = ocr_executor.get_cache_stats()
+    families = [
+        ("ocr_queue_depth", "gauge", "OCR jobs waiting for a worker", [({}, ocr_executor.queue_depth)]),
+        ("ocr_in_flight_jobs", "gauge", "OCR jobs currently running", [({}, ocr_executor.in_flight)]),
+        ("ocr_models_ready", "gauge", "1 once the OCR models are loaded (or load lazily)",
+         [({}, int(ocr_executor.model_state in ("ready", "lazy")))]),
+        ("ocr_background_jobs", "gauge", "Queued or running /jobs tasks", [({}, len(background_jobs))]),
+        ("ocr_page_cache_hits_total", "counter", "Page (det) and line (rec) cache hits",
+         [({"cache": name}, counts["hits"]) for name, counts in page_cache.items()]),
+        ("ocr_page_cache_misses_total", "counter", "Page (det) and line (rec) cache misses",
+         [({"cache": name}, counts["misses"]) for name, counts in page_cache.items()]),
+        ("ocr_result_cache_hits_total", "counter", "Uploads served from the result cache", [({}, result_cache.hits)]),
+        ("ocr_result_cache_misses_total", "counter", "Uploads that needed OCR", [({}, result_cache.misses)]),
+        ("user_cache_lookups_total", "counter", "Authenticated user lookups by outcome",
+         [({"result": result}, getattr(user_cache, result)) for result in ("hits", "misses", "coalesced")]),
+        ("email_queue_depth", "gauge", "Emails waiting to be sent", [({}, email_service.queue_depth)]),
+        ("email_messages_total", "counter", "Emails by outcome (retries are send attempts that failed and were retried)",
+         [({"result": result}, getattr(email_service, result)) for result in ("sent", "failed", "retries")]),
+    ]
+    return PlainTextResponse(render_prometheus(ocr_executor.metrics.snapshot(), families), media_type=CONTENT_TYPE)
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until the OCR models are loaded"""
+    state = ocr_executor.model_state
+    if state in ("loading", "failed"):
+        return JSONResponse({"status": state}, status_code=503)
+    return {"status": "ready"}
 
 
 if __name__ == "__main__":
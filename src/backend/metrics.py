@@ -0,0 +1,58 @@
+from src.app.metrics import BUCKETS
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Descriptions of the counters recorded by Process and OCRExecutor
+COUNTER_HELP = {
+    "pages": "Pages run through OCR",
+    "pages_skipped": "PDF pages kept as-is because they already had a text layer",
+    "lines": "Text lines sent to recognition",
+    "errors": "Pages whose detection or recognition failed",
+    "fallbacks": "Pages written image-only after an error",
+    "jobs_completed": "OCR jobs finished",
+    "jobs_failed": "OCR jobs that raised an error",
+    "jobs_rejected": "OCR jobs refused because the queue was full",
+}
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+def format_family(name: str, kind: str, help_text: str, samples) -> list:
+    """Lines of one metric family; ``samples`` is a list of (labels dict, value)"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{_labels(labels)} {value}" for labels, value in samples)
+    return lines
+
+
+def render_prometheus(snapshot: dict, families=(), prefix: str = "ocr") -> str:
+    """
+    Prometheus text format of a StageMetrics snapshot: one histogram with a
+    ``stage`` label and one ``<prefix>_<name>_total`` counter per counter.
+    ``families`` are extra (name, kind, help, samples) tuples such as gauges.
+    """
+    lines = []
+    stages = snapshot.get("stages", {})
+    if stages:
+        name = f"{prefix}_stage_seconds"
+        lines += [f"# HELP {name} Time per OCR stage run (one run per page, per line for recognition_line)",
+                  f"# TYPE {name} histogram"]
+        for stage, hist in sorted(stages.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS + (float("inf"),), hist["buckets"]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {hist["sum"]:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {hist["count"]}')
+
+    for counter, value in sorted(snapshot.get("counters", {}).items()):
+        lines += format_family(f"{prefix}_{counter}_total", "counter", COUNTER_HELP.get(counter, counter),
+                               [({}, value)])
+
+    for family in families:
+        lines += format_family(*family)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,309 @@
+import os
+import time
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from src.app.metrics import NULL_METRICS, StageMetrics
+
+
+# One Process (OCR models) per worker process, or one shared instance in thread mode
+_worker_process = None
+_worker_lock = threading.Lock()
+
+
+def _get_worker_process(process_kwargs):
+    """Create the OCR models once per worker and reuse them for every job"""
+    global _worker_process
+    if _worker_process is None:
+        with _worker_lock:
+            if _worker_process is None:
+                from src.app.process import Process
+                _worker_process = Process(**process_kwargs)
+    return _worker_process
+
+
+def warm_up_worker(process_kwargs: dict) -> int:
+    """Executor task: load the OCR models in this worker ahead of the first job"""
+    _get_worker_process(process_kwargs)
+    return os.getpid()
+
+
+def run_ocr(process_kwargs: dict, input_path: str, output_path: str, job_id: str = None, progress=None,
+            worker_stats=None, collect_metrics: bool = False) -> dict:
+    """
+    Executor task: run full OCR on one file and return its processing report
+    (output_path, pages_total, skipped_pages, and with ``collect_metrics`` the
+    job's stage timings and counters as a StageMetrics snapshot under "metrics").
+
+    Page progress is published into ``progress[job_id]`` and the worker's
+    page/line cache statistics into ``worker_stats[pid]``.
+    """
+    progress_callback = None
+    if job_id is not None and progress is not None:
+        def progress_callback(pages_done, pages_total):
+            progress[job_id] = {"pages_done": pages_done, "pages_total": pages_total}
+
+    process = _get_worker_process(process_kwargs)
+    report = {}
+    metrics = StageMetrics() if collect_metrics else None
+    try:
+        process.process_file(input_path, final_output_name=output_path,
+                             progress_callback=progress_callback, report=report, metrics=metrics)
+        if metrics is not None:
+            report["metrics"] = metrics.snapshot()
+        return {"output_path": output_path, **report}
+    finally:
+        if worker_stats is not None:
+            worker_stats[os.getpid()] = process.cache_stats()
+
+
+def run_ocr_batch(process_kwargs: dict, files: list, job_ids: list = None, progress=None,
+                  worker_stats=None, collect_metrics: bool = False) -> list:
+    """
+    Executor task: run OCR on several files together (Process.process_files, so
+    detection batches span documents) and return one report per file, in
+    order. A file that failed has "error" in its report instead of output_path.
+
+    ``job_ids[i]`` is the progress key of ``files[i]``; with ``collect_metrics``
+    the stage timings of the whole batch are returned in the first report
+    under "metrics" (the stages of different files overlap in the batches).
+    """
+    progress_callback = None
+    if job_ids is not None and progress is not None:
+        def progress_callback(index, pages_done, pages_total):
+            progress[job_ids[index]] = {"pages_done": pages_done, "pages_total": pages_total}
+
+    process = _get_worker_process(process_kwargs)
+    reports = [{} for _ in files]
+    metrics = StageMetrics() if collect_metrics else None
+    try:
+        outputs = process.process_files(files, progress_callback=progress_callback, reports=reports,
+                                        metrics=metrics)
+        if metrics is not None and reports:
+            reports[0]["metrics"] = metrics.snapshot()
+        return [{"output_path": output, **report} if output else report
+                for output, report in zip(outputs, reports)]
+    finally:
+        if worker_stats is not None:
+            worker_stats[os.getpid()] = process.cache_stats()
+
+
+class QueueFullError(Exception):
+    """Raised when every worker is busy and the admission queue is full"""
+
+
+class OCRExecutor:
+    """
+    Runs blocking OCR jobs outside the asyncio event loop.
+
+    At most ``max_workers`` jobs run at the same time and at most ``max_queue``
+    more may wait for a worker; further submissions are rejected with
+    QueueFullError instead of piling up. Page progress reported by running
+    jobs is readable with get_progress().
+
+    start_warm_up() loads the models in every worker in the background; jobs
+    submitted before that finishes wait on the same shared future.
+
+    With ``metrics`` on, every job returns its stage timings and counters,
+    which are summed into ``self.metrics`` together with job outcome counters.
+    """
+
+    def __init__(self, mode: str = "process", max_workers: int = 1, max_queue: int = 8,
+                 process_kwargs: dict = None, metrics: bool = True):
+        if mode not in ("process", "thread"):
+            raise ValueError("OCR executor mode must be 'process' or 'thread'")
+        self.mode = mode
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.process_kwargs = process_kwargs or {}
+        self._executor = None
+        self._manager = None
+        self._progress = None
+        self._worker_stats = None
+        self._semaphore = asyncio.Semaphore(self.max_workers)
+        self._pending = 0
+        self._running = 0
+        self._ready = None  # warm-up task; None means models load lazily with the first job
+        self.metrics = StageMetrics() if metrics else NULL_METRICS
+
+    @property
+    def in_flight(self) -> int:
+        return self._running
+
+    @property
+    def queue_depth(self) -> int:
+        return self._pending - self._running
+
+    @property
+    def model_state(self) -> str:
+        """Model loading state: lazy (no warm-up requested), loading, ready or failed"""
+        if self._ready is None:
+            return "lazy"
+        if not self._ready.done():
+            return "loading"
+        return "failed" if self._ready.cancelled() or self._ready.exception() else "ready"
+
+    def start_warm_up(self):
+        """Start loading the models in the background (must be called from the event loop)"""
+        if self._ready is None or self.model_state == "failed":
+            self._ready = asyncio.get_running_loop().create_task(self._warm_up())
+
+    async def _warm_up(self):
+        start = time.time()
+        # One task per worker: each blocks its worker while loading, so every worker gets one
+        await asyncio.gather(*(asyncio.wrap_future(self._submit(warm_up_worker, self.process_kwargs))
+                               for _ in range(self.max_workers)))
+        print(f"OCR models ready in {time.time() - start:.1f}s")
+
+    async def wait_ready(self):
+        """Wait for the warm-up started by start_warm_up(); a failed warm-up is retried"""
+        if self._ready is None:
+            return
+        if self.model_state == "failed":
+            self.start_warm_up()
+        # shield: a cancelled request must not cancel the warm-up shared by every waiting job
+        await asyncio.shield(self._ready)
+
+    def _shared_dict(self):
+        """Plain dict in thread mode, manager-backed dict visible to worker processes otherwise"""
+        if self.mode == "thread":
+            return {}
+        if self._manager is None:
+            self._manager = multiprocessing.get_context("spawn").Manager()
+        return self._manager.dict()
+
+    @property
+    def progress(self):
+        """Job id -> page progress"""
+        if self._progress is None:
+            self._progress = self._shared_dict()
+        return self._progress
+
+    @property
+    def worker_stats(self):
+        """Worker pid -> page/line cache statistics of that worker"""
+        if self._worker_stats is None:
+            self._worker_stats = self._shared_dict()
+        return self._worker_stats
+
+    def get_cache_stats(self) -> dict:
+        """Page ("det") and line ("rec") cache hits/misses summed over all workers"""
+        totals = {}
+        for stats in list(self.worker_stats.values()):
+            for namespace, counts in stats.items():
+                if not isinstance(counts, dict):
+                    continue
+                total = totals.setdefault(namespace, {"hits": 0, "misses": 0})
+                total["hits"] += counts["hits"]
+                total["misses"] += counts["misses"]
+        for total in totals.values():
+            lookups = total["hits"] + total["misses"]
+            total["hit_rate"] = total["hits"] / lookups if lookups else 0.0
+        return totals
+
+    def get_progress(self, job_id: str) -> dict:
+        return dict(self.progress.get(job_id) or {})
+
+    def clear_progress(self, job_id: str):
+        self.progress.pop(job_id, None)
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.mode == "thread":
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ocr")
+            else:
+                # spawn: torch/paddle are not fork-safe once initialized
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_get_worker_process,
+                    initargs=(self.process_kwargs,)
+                )
+        return self._executor
+
+    def _submit(self, fn, *args):
+        try:
+            return self._get_executor().submit(fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM); start a fresh pool for this and later jobs
+            self._executor = None
+            return self._get_executor().submit(fn, *args)
+
+    def reserve(self):
+        """Take an admission slot now, raising QueueFullError when none is free"""
+        if self._pending >= self.max_workers + self.max_queue:
+            self.metrics.inc("jobs_rejected")
+            raise QueueFullError("OCR queue is full")
+        self._pending += 1
+
+    def release(self):
+        """Give back a slot taken with reserve() for a job that will not run"""
+        self._pending -= 1
+
+    async def run(self, fn, *args, reserved: bool = False, on_start=None):
+        """
+        Run ``fn(*args)`` in the pool once a worker is free.
+
+        ``reserved`` means the caller already holds a slot from reserve();
+        ``on_start`` is an optional coroutine function awaited when the job
+        leaves the queue and starts running.
+        """
+        if not reserved:
+            self.reserve()
+        try:
+            await self.wait_ready()
+            async with self._semaphore:
+                self._running += 1
+                try:
+                    if on_start is not None:
+                        await on_start()
+                    return await asyncio.wrap_future(self._submit(fn, *args))
+                finally:
+                    self._running -= 1
+        finally:
+            self._pending -= 1
+
+    async def process_file(self, input_path: str, output_path: str, job_id: str = None, **kwargs) -> dict:
+        progress = self.progress if job_id is not None else None
+        try:
+            report = await self.run(run_ocr, self.process_kwargs, input_path, output_path, job_id, progress,
+                                    self.worker_stats, self.metrics.enabled, **kwargs)
+        except QueueFullError:
+            raise
+        except Exception:
+            self.metrics.inc("jobs_failed")
+            raise
+        self.metrics.merge(report.get("metrics"))
+        self.metrics.inc("jobs_completed")
+        return report
+
+    async def process_files(self, files: list, job_ids: list = None, **kwargs) -> list:
+        """Run a batch of (input_path, output_path) as one job; one report per file, see run_ocr_batch"""
+        progress = self.progress if job_ids is not None else None
+        try:
+            reports = await self.run(run_ocr_batch, self.process_kwargs, files, job_ids, progress,
+                                     self.worker_stats, self.metrics.enabled, **kwargs)
+        except QueueFullError:
+            raise
+        except Exception:
+            self.metrics.inc("jobs_failed", len(files))
+            raise
+        failed = sum("error" in report for report in reports)
+        if reports:
+            self.metrics.merge(reports[0].get("metrics"))
+        self.metrics.inc("jobs_completed", len(files) - failed)
+        self.metrics.inc("jobs_failed", failed)
+        return reports
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+            self._progress = None
+            self._worker_stats = None
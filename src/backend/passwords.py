@@ -0,0 +1,38 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+
+class PasswordHasher:
+    """
+    bcrypt hashing and verification off the event loop.
+
+    bcrypt is deliberately slow (~0.25 s per call at the default cost) and
+    releases the GIL, so it runs in a small dedicated thread pool: a burst of
+    logins queues there instead of stalling every other request, and at most
+    ``max_workers`` cores are spent on password checks.
+    """
+
+    def __init__(self, max_workers: int = 2, rounds: int = 12):
+        self.rounds = rounds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self._hash, password)
+
+    async def verify(self, plain: str, hashed: str) -> bool:
+        return await self._run(self._verify, plain, hashed)
+
+    def _hash(self, password: str) -> str:
+        return bcrypt.hashpw(password.encode(), bcrypt.gensalt(self.rounds)).decode()
+
+    @staticmethod
+    def _verify(plain: str, hashed: str) -> bool:
+        return bcrypt.checkpw(plain.encode(), hashed.encode())
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
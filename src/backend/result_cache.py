@@ -0,0 +1,121 @@
+import os
+import json
+import shutil
+import asyncio
+import hashlib
+from datetime import datetime, timedelta
+
+from src.backend.database.repositories import CacheEntryRepository
+
+
+def _link_or_copy(src: str, dst: str):
+    """Hard-link ``src`` to ``dst`` (no extra disk space), copying when linking is not possible"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+class ResultCache:
+    """
+    Content-addressed cache of OCR outputs.
+
+    Outputs are keyed by the SHA-256 of the uploaded file plus a fingerprint of
+    the OCR settings, kept in ``cache_dir`` and indexed in the ``ocr_cache``
+    collection. Entries unused for ``max_age_days`` are evicted, then the least
+    recently used ones until the cache fits in ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir: str = "output_files/cache", max_bytes: int = 5 * 1024 ** 3,
+                 max_age_days: int = 30, settings: dict = None, enabled: bool = True):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = timedelta(days=max_age_days)
+        self.enabled = enabled
+        # Different OCR settings produce different outputs for the same upload
+        self.fingerprint = hashlib.sha256(
+            json.dumps(settings or {}, sort_keys=True, default=str).encode()
+        ).hexdigest()[:12]
+        self.repo = None
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def start(self):
+        """Bind the Mongo repository once the database connection is open"""
+        self.repo = CacheEntryRepository()
+
+    def make_key(self, content_hash: str) -> str:
+        return f"{content_hash}_{self.fingerprint}"
+
+    def _cache_path(self, cache_key: str) -> str:
+        return os.path.join(self.cache_dir, f"{cache_key}.pdf")
+
+    @property
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    async def restore(self, cache_key: str, output_path: str) -> bool:
+        """Place the cached output for ``cache_key`` at ``output_path``; False on a miss"""
+        if not self.enabled:
+            return False
+
+        entry = await self.repo.get_entry(cache_key)
+        cache_path = self._cache_path(cache_key)
+        if entry:
+            try:
+                await asyncio.to_thread(_link_or_copy, cache_path, output_path)
+            except FileNotFoundError:
+                # File was removed behind our back or evicted by a concurrent request: drop the stale entry
+                await self.repo.delete_entries([cache_key])
+            else:
+                await self.repo.touch(cache_key)
+                self.hits += 1
+                return True
+
+        self.misses += 1
+        return False
+
+    async def store(self, cache_key: str, output_path: str):
+        """Add a freshly produced output to the cache, then evict old entries"""
+        if not self.enabled:
+            return
+        try:
+            cache_path = self._cache_path(cache_key)
+            if not os.path.exists(cache_path):
+                await asyncio.to_thread(_link_or_copy, output_path, cache_path)
+            await self.repo.upsert_entry(cache_key, os.path.basename(cache_path), os.path.getsize(cache_path))
+            await self.evict()
+        except Exception as e:
+            print(f"Warning: Could not cache OCR output {output_path}: {e}")
+
+    async def _remove(self, entries):
+        for entry in entries:
+            path = os.path.join(self.cache_dir, entry.filename)
+            if os.path.exists(path):
+                os.remove(path)
+        if entries:
+            await self.repo.delete_entries([entry.cache_key for entry in entries])
+
+    async def evict(self):
+        """Delete entries unused for longer than max_age, then LRU entries above max_bytes"""
+        await self._remove(await self.repo.get_entries_unused_since(datetime.utcnow() - self.max_age))
+
+        total = await self.repo.get_total_size()
+        while total > self.max_bytes:
+            entries = await self.repo.get_least_recently_used()
+            if not entries:
+                break
+            victims = []
+            for entry in entries:
+                if total <= self.max_bytes:
+                    break
+                victims.append(entry)
+                total -= entry.file_size
+            await self._remove(victims)
@@ -0,0 +1,261 @@
+import os
+import uuid
+import asyncio
+import hashlib
+from typing import List, NamedTuple, Optional
+
+from fastapi import Request
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+# Leading bytes of the supported formats -> (extension used for the temp file, MIME type)
+FILE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", ("png", "image/png")),
+    (b"\xff\xd8\xff", ("jpg", "image/jpeg")),
+]
+PDF_SIGNATURE = b"%PDF-"
+PDF_HEADER_WINDOW = 1024  # readers accept the PDF header anywhere in the first 1 KiB
+SUPPORTED_EXTENSIONS = (".pdf", ".png", ".jpg", ".jpeg")
+PART_OVERHEAD = 64 * 1024  # allowance per file for the multipart boundary and part headers
+
+
+class UploadError(Exception):
+    """
+    Upload rejected while it was being received; ``status_code`` is the HTTP
+    status to answer with and ``filename`` the file at fault, if any.
+    """
+
+    def __init__(self, status_code: int, detail: str, filename: str = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.filename = filename
+
+
+class SavedUpload(NamedTuple):
+    filename: str  # name sent by the client
+    path: str
+    size: int
+    sha256: str
+    extension: str
+    content_type: str
+    pages: Optional[int]  # None for images
+
+
+def sniff_type(head: bytes):
+    """(extension, MIME type) of a PDF/PNG/JPEG file from its first bytes, None for anything else"""
+    if PDF_SIGNATURE in head[:PDF_HEADER_WINDOW]:
+        return "pdf", "application/pdf"
+    for signature, kind in FILE_SIGNATURES:
+        if head.startswith(signature):
+            return kind
+    return None
+
+
+def count_pdf_pages(path: str) -> int:
+    """Page count from the PDF cross-reference table, without rendering anything"""
+    import pypdfium2
+
+    pdf = pypdfium2.PdfDocument(path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+class _FilePart:
+    """A file part being written: type sniffed from the first bytes, size counted and content hashed"""
+
+    def __init__(self, filename: str, directory: str, max_bytes: int):
+        self.filename = filename
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.head = b""
+        self.kind = None
+        self.path = None
+        self.buffer = None
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+
+    def error(self, status_code: int, detail: str) -> UploadError:
+        return UploadError(status_code, detail, self.filename)
+
+    def write(self, data: bytes, last: bool = False):
+        self.size += len(data)
+        if self.max_bytes and self.size > self.max_bytes:
+            raise self.error(413, f"File is larger than {self.max_bytes / (1024 * 1024):g} MB")
+        self.sha256.update(data)
+        if self.buffer is None:
+            # Nothing is written before the type is known from the first PDF_HEADER_WINDOW bytes
+            self.head += data
+            if len(self.head) < PDF_HEADER_WINDOW and not last:
+                return
+            self.kind = sniff_type(self.head)
+            if self.kind is None:
+                raise self.error(415, "Only PDF, PNG, JPG, JPEG files supported")
+            self.path = os.path.join(self.directory, f"{uuid.uuid4().hex}.{self.kind[0]}")
+            self.buffer = open(self.path, "wb")
+            data, self.head = self.head, b""
+        self.buffer.write(data)
+
+    async def finish(self, max_pages: int) -> SavedUpload:
+        self.write(b"", last=True)
+        self.buffer.close()
+        extension, content_type = self.kind
+        pages = None
+        if extension == "pdf":
+            try:
+                pages = await asyncio.to_thread(count_pdf_pages, self.path)
+            except Exception:
+                raise self.error(400, "The PDF file is damaged or encrypted")
+            if max_pages and pages > max_pages:
+                raise self.error(413, f"PDF has {pages} pages, the limit is {max_pages}")
+        return SavedUpload(self.filename, self.path, self.size, self.sha256.hexdigest(), extension,
+                           content_type, pages)
+
+    def discard(self):
+        if self.buffer is not None:
+            self.buffer.close()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class _MultipartReceiver:
+    """
+    python-multipart callbacks collecting the parts of a form; the parsed
+    events are applied by ``flush`` after each chunk (callbacks cannot await).
+    """
+
+    def __init__(self, field: str, directory: str, max_files: int, max_bytes: int, max_pages: int):
+        self.field = field
+        self.directory = directory
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.max_pages = max_pages
+        self.events = []
+        self.headers = {}
+        self.header_name = b""
+        self.header_value = b""
+        self.part = None  # _FilePart receiving data, None while skipping other fields
+        self.in_part = False
+        self.uploads = []
+
+    @property
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self):
+        self.headers = {}
+
+    def on_header_field(self, data, start, end):
+        self.header_name += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self.header_value += data[start:end]
+
+    def on_header_end(self):
+        self.headers[self.header_name.lower()] = self.header_value
+        self.header_name, self.header_value = b"", b""
+
+    def on_headers_finished(self):
+        self.events.append(("begin", self.headers.get(b"content-disposition", b"")))
+
+    def on_part_data(self, data, start, end):
+        self.events.append(("data", data[start:end]))
+
+    def on_part_end(self):
+        self.events.append(("end", None))
+
+    def _begin(self, disposition: bytes):
+        self.in_part = True
+        _, options = parse_options_header(disposition)
+        if options.get(b"name", b"").decode("latin-1") != self.field or b"filename" not in options:
+            return  # not one of the files asked for, its data is skipped
+        filename = options[b"filename"].decode("utf-8", "replace")
+        if len(self.uploads) >= self.max_files:
+            raise UploadError(400, f"At most {self.max_files} files per upload")
+        if not filename.lower().endswith(SUPPORTED_EXTENSIONS):
+            raise UploadError(400, "Only PDF, PNG, JPG, JPEG files supported", filename)
+        self.part = _FilePart(filename, self.directory, self.max_bytes)
+
+    async def flush(self):
+        events, self.events = self.events, []
+        for event, value in events:
+            if event == "begin":
+                self._begin(value)
+            elif event == "data":
+                if self.part is not None:
+                    self.part.write(value)
+            else:
+                self.in_part = False
+                if self.part is not None:
+                    part, self.part = self.part, None
+                    try:
+                        self.uploads.append(await part.finish(self.max_pages))
+                    except BaseException:
+                        part.discard()
+                        raise
+
+    def discard(self):
+        if self.part is not None:
+            self.part.discard()
+        for upload in self.uploads:
+            if os.path.exists(upload.path):
+                os.remove(upload.path)
+
+
+async def receive_files(request: Request, directory: str, field: str = "file", max_files: int = 1,
+                        max_bytes: int = 0, max_pages: int = 0) -> List[SavedUpload]:
+    """
+    Stream the files of form field ``field`` of a multipart request to unique
+    files in ``directory``, as the body arrives.
+
+    The body is parsed straight from the connection, so each file is written
+    once (no spooled copy first) and every limit applies while receiving,
+    whether or not the client sent a Content-Length: the type is sniffed from
+    the first bytes (PDF, PNG or JPEG), a file over ``max_bytes`` or a body
+    with more than ``max_files`` files is refused as soon as the limit is
+    crossed, and PDFs are page-counted as soon as their part ends so
+    ``max_pages`` applies before the next file is read. Content is hashed on
+    the way. Raises UploadError at the first violation without reading the
+    rest of the body (nothing is left on disk).
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise UploadError(400, "Expected a multipart/form-data upload")
+
+    receiver = _MultipartReceiver(field, directory, max_files, max_bytes, max_pages)
+    parser = MultipartParser(boundary, receiver.callbacks)
+    body_limit = max_files * (max_bytes + PART_OVERHEAD) if max_bytes else 0
+    received = 0
+    try:
+        try:
+            async for chunk in request.stream():
+                received += len(chunk)
+                if body_limit and received > body_limit:
+                    raise UploadError(413, f"Upload is larger than {max_files} file(s) of "
+                                           f"{max_bytes / (1024 * 1024):g} MB")
+                if chunk:
+                    parser.write(chunk)
+                    await receiver.flush()
+            parser.finalize()
+            await receiver.flush()
+        except FormParserError:
+            raise UploadError(400, "Malformed multipart body")
+        if receiver.in_part:
+            raise UploadError(400, "The upload ended before the last file was complete")
+        if not receiver.uploads:
+            raise UploadError(422, f"No file in form field '{field}'")
+    except BaseException:
+        receiver.discard()
+        raise
+    return receiver.uploads
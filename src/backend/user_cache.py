@@ -0,0 +1,90 @@
+import time
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+
+class UserCache:
+    """
+    Short-lived in-process cache of the users resolved from JWT subjects.
+
+    Entries expire after ``ttl`` seconds and are dropped as soon as the user is
+    written (see UserRepository), so a password or email change is visible on
+    the next request. Concurrent lookups of the same uncached subject share a
+    single database read. Users that do not exist are not cached.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}   # username -> (expires_at, user)
+        self._inflight = {}  # username -> task of the running lookup
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get(self, username: str, loader: Callable[[str], Awaitable]):
+        """The user for ``username``, from the cache or ``await loader(username)``"""
+        if self.ttl > 0:
+            entry = self._entries.get(username)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+
+        task = self._inflight.get(username)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            # Separate task: a cancelled request must not cancel the lookup other requests wait on
+            task = asyncio.ensure_future(self._load(username, loader))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())  # mark a failure as retrieved
+            self._inflight[username] = task
+        return await asyncio.shield(task)
+
+    async def _load(self, username, loader):
+        task = asyncio.current_task()
+        try:
+            user = await loader(username)
+        finally:
+            # Detached by invalidate(): the user may predate a write, return it but do not keep it
+            current = self._inflight.get(username) is task
+            if current:
+                del self._inflight[username]
+        if user is not None and self.ttl > 0 and current:
+            if len(self._entries) >= self.max_entries:
+                self._evict()
+            self._entries[username] = (time.monotonic() + self.ttl, user)
+        return user
+
+    def _evict(self):
+        """Drop expired entries, then the oldest half if still full"""
+        now = time.monotonic()
+        for username in [name for name, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[username]
+        if len(self._entries) >= self.max_entries:
+            for username in list(self._entries)[:len(self._entries) // 2]:
+                del self._entries[username]
+
+    def invalidate(self, user_id: Optional[str] = None, email: Optional[str] = None,
+                   username: Optional[str] = None):
+        """Forget the cached user matching any of the given keys (and ignore a lookup already running for it)"""
+        for name, (_, user) in list(self._entries.items()):
+            if name == username or (user_id is not None and str(user.id) == str(user_id)) \
+                    or (email is not None and user.email == email):
+                del self._entries[name]
+        # A lookup that started before the write could store the old user; detach it so it is not kept
+        if username is not None:
+            self._inflight.pop(username, None)
+        elif self._inflight:
+            self._inflight.clear()
+
+    @property
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0
+        }
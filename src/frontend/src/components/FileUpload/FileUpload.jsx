@@ -1,13 +1,20 @@
 import React, { useRef, useState } from 'react'
 import './FileUpload.scss'
 
-const FileUpload = ({ onFileSelect, accept, disabled }) => {
+const FileUpload = ({ onFileSelect, accept, disabled, multiple = false }) => {
   const fileInputRef = useRef(null)
   const [dragActive, setDragActive] = useState(false)
 
-  // Handle file selection
+  // Handle file selection (an array of the valid files when multiple)
   const handleFileSelect = (files) => {
     if (files && files.length > 0) {
+      if (multiple) {
+        const valid = Array.from(files).filter(validateFile)
+        if (valid.length > 0) {
+          onFileSelect(valid)
+        }
+        return
+      }
       const file = files[0]
       if (validateFile(file)) {
         onFileSelect(file)
@@ -21,12 +28,12 @@ const FileUpload = ({ onFileSelect, accept, disabled }) => {
     const maxSize = 10 * 1024 * 1024 // 10MB
 
     if (!acceptedTypes.includes(file.type)) {
-      alert('Please select a PDF or image file (JPG, PNG)')
+      alert(`${file.name}: please select a PDF or image file (JPG, PNG)`)
       return false
     }
 
     if (file.size > maxSize) {
-      alert('File size must be less than 10MB')
+      alert(`${file.name}: file size must be less than 10MB`)
       return false
     }
 
@@ -74,7 +81,7 @@ const FileUpload = ({ onFileSelect, accept, disabled }) => {
       >
         <div className="upload-content">
           <p className="upload-text">
-            Kéo thả tệp vào đây hoặc <span className="browse-link">bấm để chọn tệp</span>
+            Kéo thả {multiple ? 'một hoặc nhiều tệp' : 'tệp'} vào đây hoặc <span className="browse-link">bấm để chọn tệp</span>
           </p>
           <p className="file-types">Hỗ trợ file PDF, JPG, PNG (kích thước tối đa 10MB)</p>
         </div>
@@ -82,7 +89,11 @@ const FileUpload = ({ onFileSelect, accept, disabled }) => {
           ref={fileInputRef}
           type="file"
           accept={accept}
-          onChange={(e) => handleFileSelect(e.target.files)}
+          multiple={multiple}
+          onChange={(e) => {
+            handleFileSelect(e.target.files)
+            e.target.value = '' // allow selecting the same files again
+          }}
           disabled={disabled}
           style={{ display: 'none' }}
         />
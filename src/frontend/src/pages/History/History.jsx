@@ -1,16 +1,26 @@
 import React, { useState, useEffect } from 'react'
-import { getFileHistory, downloadFile, deleteFile } from '../../services/Api.jsx'
+import { getFileHistory, getFileCount, downloadFile, deleteFile, deleteFiles, downloadZip } from '../../services/Api.jsx'
 import AuthService from '../../services/AuthService'
 import './History.scss'
 
+const PAGE_SIZE = 20
+const MAX_ZIP_FILES = 100 // files per /files/zip request
+const MAX_DELETE_FILES = 500 // ids per DELETE /files request
+
 const History = () => {
   const [history, setHistory] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
+  const [total, setTotal] = useState(null)
   const [loading, setLoading] = useState(true)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [error, setError] = useState(null)
   const [downloading, setDownloading] = useState(null)
   const [deleting, setDeleting] = useState(null)
   const [showDeleteModal, setShowDeleteModal] = useState(false)
   const [fileToDelete, setFileToDelete] = useState(null)
+  const [selected, setSelected] = useState([]) // ids of the checked files
+  const [deleteSelected, setDeleteSelected] = useState(false) // the modal confirms a batch delete
+  const [zipping, setZipping] = useState(false)
 
   // Check if user is authenticated
   useEffect(() => {
@@ -22,13 +32,16 @@ const History = () => {
     fetchHistory()
   }, [])
 
-  // Fetch file history from API
+  // Fetch the first page of file history and the total count from API
   const fetchHistory = async () => {
     try {
       setLoading(true)
       setError(null)
-      const data = await getFileHistory()
-      setHistory(data)
+      const [page, count] = await Promise.all([getFileHistory(null, PAGE_SIZE), getFileCount()])
+      setHistory(page.items)
+      setNextCursor(page.next_cursor)
+      setTotal(count.total)
+      setSelected([])
     } catch (err) {
       setError(err.message)
     } finally {
@@ -36,6 +49,22 @@ const History = () => {
     }
   }
 
+  // Fetch the next (older) page and append it
+  const loadMore = async () => {
+    if (!nextCursor) return
+
+    try {
+      setLoadingMore(true)
+      const page = await getFileHistory(nextCursor, PAGE_SIZE)
+      setHistory(prev => [...prev, ...page.items])
+      setNextCursor(page.next_cursor)
+    } catch (err) {
+      setError(err.message)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   // Handle file download
   const handleDownload = async (filename) => {
     try {
@@ -64,6 +93,8 @@ const History = () => {
 
       // Remove file from history state
       setHistory(prev => prev.filter(file => file.id !== fileToDelete.id))
+      setSelected(prev => prev.filter(id => id !== fileToDelete.id))
+      setTotal(prev => (prev === null ? prev : Math.max(0, prev - 1)))
       setShowDeleteModal(false)
       setFileToDelete(null)
     } catch (err) {
@@ -77,6 +108,59 @@ const History = () => {
   const handleDeleteCancel = () => {
     setShowDeleteModal(false)
     setFileToDelete(null)
+    setDeleteSelected(false)
+  }
+
+  // Check or uncheck one file
+  const toggleSelect = (fileId) => {
+    setSelected(prev => (prev.includes(fileId) ? prev.filter(id => id !== fileId) : [...prev, fileId]))
+  }
+
+  // Check or uncheck every loaded file
+  const toggleSelectAll = () => {
+    setSelected(prev => (prev.length === history.length ? [] : history.map(file => file.id)))
+  }
+
+  const selectedCompleted = history
+    .filter(file => selected.includes(file.id) && file.processing_status === 'completed')
+    .map(file => file.id)
+
+  // Confirm deletion of the checked files
+  const handleDeleteSelectedConfirm = () => {
+    setDeleteSelected(true)
+    setShowDeleteModal(true)
+  }
+
+  // Delete the checked files with one request
+  const handleDeleteSelected = async () => {
+    try {
+      setDeleting('selected')
+      const { deleted, not_found } = await deleteFiles(selected)
+
+      // Files already gone are dropped from the list too
+      const removed = new Set([...selected, ...not_found])
+      setHistory(prev => prev.filter(file => !removed.has(file.id)))
+      setTotal(prev => (prev === null ? prev : Math.max(0, prev - deleted)))
+      setSelected([])
+      setShowDeleteModal(false)
+      setDeleteSelected(false)
+    } catch (err) {
+      setError(err.message)
+    } finally {
+      setDeleting(null)
+    }
+  }
+
+  // Download the checked (completed) files as one ZIP
+  const handleDownloadSelected = async () => {
+    try {
+      setZipping(true)
+      await downloadZip(selectedCompleted)
+    } catch (err) {
+      setError(err.message)
+    } finally {
+      setZipping(false)
+    }
   }
 
   // Format file size
@@ -133,6 +217,7 @@ const History = () => {
           <div className="header-content">
             <h1>LỊCH SỬ</h1>
             <p className="subtitle">Xem tất cả các file đã được xử lý của bạn</p>
+            {total !== null && <p className="subtitle">Tổng cộng: {total} file</p>}
           </div>
         </div>
 
@@ -146,9 +231,42 @@ const History = () => {
           </div>
         ) : (
           <div className="history-list">
+            <div className="bulk-actions">
+              <label className="select-all">
+                <input
+                  type="checkbox"
+                  checked={selected.length > 0 && selected.length === history.length}
+                  onChange={toggleSelectAll}
+                />
+                {selected.length > 0 ? `Đã chọn ${selected.length} file` : 'Chọn tất cả'}
+              </label>
+              <div className="bulk-buttons">
+                <button
+                  className="btn btn-primary"
+                  onClick={handleDownloadSelected}
+                  disabled={zipping || selectedCompleted.length === 0 || selectedCompleted.length > MAX_ZIP_FILES}
+                  title={selectedCompleted.length > MAX_ZIP_FILES ? `At most ${MAX_ZIP_FILES} files per ZIP` : ''}
+                >
+                  {zipping ? 'Downloading...' : 'Download ZIP'}
+                </button>
+                <button
+                  className="btn btn-danger"
+                  onClick={handleDeleteSelectedConfirm}
+                  disabled={deleting === 'selected' || selected.length === 0 || selected.length > MAX_DELETE_FILES}
+                >
+                  {deleting === 'selected' ? 'Deleting...' : 'Delete Selected'}
+                </button>
+              </div>
+            </div>
             {history.map((file) => (
-              <div key={file.id} className="history-item">
+              <div key={file.id} className={`history-item ${selected.includes(file.id) ? 'selected' : ''}`}>
                 <div className="file-info">
+                  <input
+                    type="checkbox"
+                    className="file-select"
+                    checked={selected.includes(file.id)}
+                    onChange={() => toggleSelect(file.id)}
+                  />
                   <div className="file-icon">
                     📄
                   </div>
@@ -169,9 +287,11 @@ const History = () => {
                   <button
                     className="btn btn-primary"
                     onClick={() => handleDownload(file.processed_filename)}
-                    disabled={downloading === file.processed_filename}
+                    disabled={downloading === file.processed_filename || file.processing_status !== 'completed'}
                   >
-                    {downloading === file.processed_filename ? 'Downloading...' : 'Download'}
+                    {downloading === file.processed_filename
+                      ? 'Downloading...'
+                      : file.processing_status === 'completed' ? 'Download' : file.processing_status}
                   </button>
                   <button
                     className="btn btn-danger"
@@ -183,6 +303,13 @@ const History = () => {
                 </div>
               </div>
             ))}
+            {nextCursor && (
+              <div className="load-more">
+                <button className="btn btn-secondary" onClick={loadMore} disabled={loadingMore}>
+                  {loadingMore ? 'Loading...' : 'Tải thêm'}
+                </button>
+              </div>
+            )}
           </div>
         )}
 
@@ -191,7 +318,11 @@ const History = () => {
           <div className="modal-overlay">
             <div className="modal-content">
               <h3>Confirm Delete</h3>
-              <p>Are you sure you want to delete "{fileToDelete?.original_filename}"?</p>
+              {deleteSelected ? (
+                <p>Are you sure you want to delete {selected.length} selected files?</p>
+              ) : (
+                <p>Are you sure you want to delete "{fileToDelete?.original_filename}"?</p>
+              )}
               <p className="warning-text">This action cannot be undone.</p>
               <div className="modal-actions">
                 <button
@@ -203,7 +334,7 @@ const History = () => {
                 </button>
                 <button
                   className="btn btn-danger"
-                  onClick={handleDelete}
+                  onClick={deleteSelected ? handleDeleteSelected : handleDelete}
                   disabled={deleting}
                 >
                   {deleting ? 'Deleting...' : 'Delete'}
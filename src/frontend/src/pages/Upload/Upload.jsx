@@ -1,32 +1,54 @@
 import React, { useState } from 'react'
 import FileUpload from '../../components/FileUpload/FileUpload'
-import { processFile, downloadFile } from '../../services/Api.jsx'
+import { processFile, processFiles, downloadFile, downloadZip } from '../../services/Api.jsx'
 import './Upload.scss'
 
+const MAX_BATCH_FILES = 20 // same as the server's OCR_MAX_BATCH_FILES default
+
 const Upload = () => {
-  const [file, setFile] = useState(null)
+  const [files, setFiles] = useState([])
   const [status, setStatus] = useState('idle') // idle, processing, completed, error
   const [result, setResult] = useState(null)
+  const [batchJobs, setBatchJobs] = useState(null) // one job per file when several files are processed
   const [error, setError] = useState(null)
+  const [progress, setProgress] = useState(null)
+  const [zipping, setZipping] = useState(false)
+
+  const file = files[0]
+  const fileJobs = batchJobs || (Array.isArray(progress) ? progress : null) // per-file status of a batch
 
   // Handle file selection
-  const handleFileSelect = (selectedFile) => {
-    setFile(selectedFile)
+  const handleFileSelect = (selectedFiles) => {
+    if (selectedFiles.length > MAX_BATCH_FILES) {
+      alert(`Please select at most ${MAX_BATCH_FILES} files at once`)
+      return
+    }
+    setFiles(selectedFiles)
     setError(null)
     setStatus('idle')
     setResult(null)
+    setBatchJobs(null)
   }
 
-  // Handle file processing
+  // Handle file processing: one file goes through /jobs, several files through one /process/batch job
   const handleProcess = async () => {
-    if (!file) return
+    if (files.length === 0) return
 
     try {
       setStatus('processing')
       setError(null)
+      setProgress(null)
 
-      const response = await processFile(file)
-      setResult(response)
+      if (files.length === 1) {
+        const response = await processFile(file, setProgress)
+        setResult(response)
+      } else {
+        const jobs = await processFiles(files, setProgress)
+        setBatchJobs(jobs)
+        if (jobs.every(job => job.status === 'failed')) {
+          throw new Error(`Processing failed: ${jobs[0].error || 'unknown error'}`)
+        }
+      }
       setStatus('completed')
 
     } catch (err) {
@@ -36,24 +58,55 @@ const Upload = () => {
   }
 
   // Handle download
-  const handleDownload = async () => {
-    if (!result || !result.download_url) return
+  const handleDownload = async (downloadUrl = result?.download_url) => {
+    if (!downloadUrl) return
 
     try {
       // Extract filename from download_url
-      const filename = result.download_url.split('/').pop()
+      const filename = downloadUrl.split('/').pop()
       await downloadFile(filename)
     } catch (err) {
       setError(err.message)
     }
   }
 
+  // Download every completed file of the batch as one ZIP
+  const handleDownloadZip = async () => {
+    try {
+      setZipping(true)
+      await downloadZip(batchJobs.filter(job => job.status === 'completed').map(job => job.job_id))
+    } catch (err) {
+      setError(err.message)
+    } finally {
+      setZipping(false)
+    }
+  }
+
   // Reset form
   const handleReset = () => {
-    setFile(null)
+    setFiles([])
     setStatus('idle')
     setResult(null)
+    setBatchJobs(null)
     setError(null)
+    setProgress(null)
+  }
+
+  // Describe job progress reported by the server (a list of jobs for a batch)
+  const formatProgress = (job) => {
+    if (Array.isArray(job)) {
+      const done = job.filter(j => j.status === 'completed' || j.status === 'failed').length
+      const pagesDone = job.reduce((sum, j) => sum + (j.pages_done || 0), 0)
+      const pagesTotal = job.reduce((sum, j) => sum + (j.pages_total || 0), 0)
+      let text = `Processed ${done}/${job.length} files`
+      if (pagesTotal) text += ` (${pagesDone}/${pagesTotal} pages)`
+      return text
+    }
+    if (!job || job.status === 'queued') return 'Waiting in queue...'
+    if (!job.pages_total) return 'Processing your file...'
+    let text = `Processed ${job.pages_done}/${job.pages_total} pages`
+    if (job.eta_seconds != null) text += ` - about ${Math.ceil(job.eta_seconds)}s left`
+    return text
   }
 
   // Format file size
@@ -71,11 +124,12 @@ const Upload = () => {
 
         <div className="upload-section">
           {/* Show file upload or unified process area */}
-          {!file ? (
+          {files.length === 0 ? (
             <FileUpload
               onFileSelect={handleFileSelect}
               accept=".pdf,.jpg,.jpeg,.png"
               disabled={status === 'processing'}
+              multiple
             />
           ) : (
             <div className="unified-process-area">
@@ -89,11 +143,45 @@ const Upload = () => {
                   </svg>
                 </div>
                 <div className="file-details">
-                  <div className="file-name">{file.name}</div>
-                  <div className="file-size">{formatFileSize(file.size)} MB</div>
+                  {files.length === 1 ? (
+                    <>
+                      <div className="file-name">{file.name}</div>
+                      <div className="file-size">{formatFileSize(file.size)} MB</div>
+                    </>
+                  ) : (
+                    <>
+                      <div className="file-name">{files.length} files</div>
+                      <div className="file-size">
+                        {formatFileSize(files.reduce((sum, f) => sum + f.size, 0))} MB
+                      </div>
+                      <ul className="file-list">
+                        {files.map((f, index) => (
+                          <li key={index}>
+                            <span className="file-list-name">{f.name}</span>
+                            {fileJobs && (
+                              <span
+                                className={`file-list-status ${fileJobs[index].status}`}
+                                title={fileJobs[index].error || ''}
+                              >
+                                {fileJobs[index].status}
+                              </span>
+                            )}
+                            {fileJobs?.[index].status === 'completed' && (
+                              <button
+                                className="btn btn-secondary btn-small"
+                                onClick={() => handleDownload(fileJobs[index].download_url)}
+                              >
+                                Download
+                              </button>
+                            )}
+                          </li>
+                        ))}
+                      </ul>
+                    </>
+                  )}
                 </div>
                 {status === 'idle' && (
-                  <button className="remove-file" onClick={handleReset} title="Remove file">
+                  <button className="remove-file" onClick={handleReset} title="Remove files">
                     <svg width="20" height="20" viewBox="0 0 20 20" fill="none" xmlns="http://www.w3.org/2000/svg">
                       <path d="M15 5L5 15M5 5L15 15" stroke="#666" strokeWidth="2" strokeLinecap="round" strokeLinejoin="round"/>
                     </svg>
@@ -106,10 +194,10 @@ const Upload = () => {
                 {status === 'idle' && (
                   <div className="upload-actions">
                     <button className="btn btn-primary" onClick={handleProcess}>
-                      Process File
+                      {files.length === 1 ? 'Process File' : `Process ${files.length} Files`}
                     </button>
                     <button className="btn btn-secondary" onClick={handleReset}>
-                      Choose Another File
+                      Choose Other Files
                     </button>
                   </div>
                 )}
@@ -119,17 +207,39 @@ const Upload = () => {
                     <div className="spinner-container">
                       <div className="processing-spinner"></div>
                     </div>
-                    <p className="processing-text">Processing your file...</p>
+                    <p className="processing-text">{formatProgress(progress)}</p>
                     <p className="processing-subtext">Please wait, this may take a few moments</p>
                   </div>
                 )}
 
+                {status === 'completed' && batchJobs && (
+                  <div className="result-content success">
+                    <h3>Processing Complete!</h3>
+                    <p>
+                      {batchJobs.filter(job => job.status === 'completed').length}/{batchJobs.length} files
+                      processed successfully
+                    </p>
+                    {error && <p>{error}</p>}
+                    <div className="result-actions">
+                      <button className="btn btn-primary" onClick={handleDownloadZip} disabled={zipping}>
+                        {zipping ? 'Downloading...' : 'Download All (ZIP)'}
+                      </button>
+                      <button className="btn btn-secondary" onClick={handleReset}>
+                        Process More Files
+                      </button>
+                    </div>
+                  </div>
+                )}
+
                 {status === 'completed' && result && (
                   <div className="result-content success">
                     <h3>Processing Complete!</h3>
                     <p>{result.message}</p>
+                    {result.skipped_pages?.length > 0 && (
+                      <p>Pages kept as-is (already searchable): {result.skipped_pages.join(', ')}</p>
+                    )}
                     <div className="result-actions">
-                      <button className="btn btn-primary" onClick={handleDownload}>
+                      <button className="btn btn-primary" onClick={() => handleDownload()}>
                         Download OCR Result
                       </button>
                       <button className="btn btn-secondary" onClick={handleReset}>
@@ -5,23 +5,114 @@ const handleError = (error) => {
   throw new Error(error.response?.data?.detail || error.message || 'API request failed')
 }
 
-// Process file with OCR (removed progress callback and timeout)
-export const processFile = async (file) => {
+const JOB_POLL_INTERVAL = 2000 // 2 seconds between job status checks
+const JOB_POLL_TIMEOUT = 60 * 60 * 1000 // stop waiting for a job after 1 hour
+const JOB_POLL_MAX_ERRORS = 5 // status checks failing in a row before giving up
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms))
+
+// Call poll() every JOB_POLL_INTERVAL until done(result) is true, returns that result.
+// Throws after JOB_POLL_TIMEOUT, or when JOB_POLL_MAX_ERRORS polls in a row fail.
+const pollUntil = async (poll, done) => {
+  const deadline = Date.now() + JOB_POLL_TIMEOUT
+  let errors = 0
+  for (;;) {
+    try {
+      const result = await poll()
+      errors = 0
+      if (done(result)) return result
+    } catch (error) {
+      errors += 1
+      if (errors >= JOB_POLL_MAX_ERRORS) throw error
+    }
+    if (Date.now() >= deadline) {
+      throw new Error('Processing is taking too long, check the history page later')
+    }
+    await sleep(JOB_POLL_INTERVAL)
+  }
+}
+
+const isFinished = (job) => job.status === 'completed' || job.status === 'failed'
+
+// Queue an OCR job, returns { job_id, status, status_url }
+export const createJob = async (file) => {
   try {
     const formData = new FormData()
     formData.append('file', file)
 
-    const { data } = await axiosInstance.post('/process', formData, {
+    const { data } = await axiosInstance.post('/jobs', formData, {
       headers: { 'Content-Type': 'multipart/form-data' },
-      timeout: 0, // No timeout - let the request complete
+      timeout: 0, // Upload time depends on file size
     })
+    return data
+  } catch (error) {
+    handleError(error)
+  }
+}
 
+// Get job state and page progress
+export const getJobStatus = async (jobId) => {
+  try {
+    const { data } = await axiosInstance.get(`/jobs/${jobId}`)
+    return data
+  } catch (error) {
+    handleError(error)
+  }
+}
+
+// Process file with OCR: queue a job and poll until it finishes
+export const processFile = async (file, onProgress) => {
+  const { job_id } = await createJob(file)
+
+  const job = await pollUntil(async () => {
+    const job = await getJobStatus(job_id)
+    if (onProgress) onProgress(job)
+    return job
+  }, isFinished)
+
+  if (job.status === 'failed') {
+    throw new Error(`Processing failed: ${job.error || 'unknown error'}`)
+  }
+  return {
+    message: 'File processed successfully',
+    download_url: job.download_url,
+    file_id: job.job_id,
+    processing_time: job.processing_time,
+    skipped_pages: job.skipped_pages
+  }
+}
+
+// Queue several files as one OCR job, returns one { job_id, status, status_url } per file
+export const createBatch = async (files) => {
+  try {
+    const formData = new FormData()
+    files.forEach(file => formData.append('files', file))
+
+    const { data } = await axiosInstance.post('/process/batch', formData, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+      timeout: 0, // Upload time depends on file size
+    })
     return data
   } catch (error) {
     handleError(error)
   }
 }
 
+// Process several files with OCR in one batch and poll until every job finishes
+// onProgress receives the list of jobs (same order as files) after each poll
+export const processFiles = async (files, onProgress) => {
+  let jobs = await createBatch(files)
+
+  return pollUntil(async () => {
+    // Finished jobs are not polled again (files served from the cache still need one poll for download_url)
+    jobs = await Promise.all(jobs.map(job =>
+      job.download_url || job.status === 'failed' ? job : getJobStatus(job.job_id)
+    ))
+    if (onProgress) onProgress(jobs)
+    return jobs
+  }, jobs => jobs.every(isFinished))
+}
+
 // Download processed file
 export const downloadFile = async (filename) => {
   try {
@@ -53,11 +144,39 @@ export const deleteFile = async (fileId) => {
   }
 }
 
-// Get file history
-export const getFileHistory = async (skip = 0, limit = 20) => {
+// Download several processed files as one ZIP archive
+// The browser fetches the streamed ZIP itself through a short-lived link, so nothing is held in memory
+export const downloadZip = async (fileIds) => {
+  try {
+    const { data } = await axiosInstance.post('/files/zip/link', { ids: fileIds })
+
+    const a = document.createElement('a')
+    a.href = `${axiosInstance.defaults.baseURL}${data.url}`
+    a.click()
+  } catch (error) {
+    handleError(error)
+  }
+}
+
+// Delete several processed files at once, returns { deleted, not_found }
+export const deleteFiles = async (fileIds) => {
+  try {
+    const { data } = await axiosInstance.delete('/files', {
+      data: { ids: fileIds },
+      timeout: 30000, // 30 seconds timeout for delete
+    })
+    return data
+  } catch (error) {
+    handleError(error)
+  }
+}
+
+// Get one page of file history, newest first: returns { items, next_cursor }
+// Pass the previous page's next_cursor as `before` to get the next (older) page
+export const getFileHistory = async (before = null, limit = 20) => {
   try {
     const { data } = await axiosInstance.get('/history', {
-      params: { skip, limit },
+      params: { limit, ...(before && { before }) },
       timeout: 30000, // 30 seconds timeout for history
     })
     return data
@@ -66,6 +185,18 @@ export const getFileHistory = async (skip = 0, limit = 20) => {
   }
 }
 
+// Get the total number of processed files, returns { total }
+export const getFileCount = async () => {
+  try {
+    const { data } = await axiosInstance.get('/history/count', {
+      timeout: 30000,
+    })
+    return data
+  } catch (error) {
+    handleError(error)
+  }
+}
+
 // Check API health
 export const checkApiHealth = async () => {
   try {
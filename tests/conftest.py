@@ -0,0 +1,7 @@
+import os
+
+# src.backend.main builds its services from the environment at import time
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("SMTP_USERNAME", "test@example.com")
+os.environ.setdefault("SMTP_PASSWORD", "test")
+os.environ.setdefault("OCR_PRELOAD", "false")
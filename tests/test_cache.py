@@ -0,0 +1,22 @@
+"""LRUCache keys: a settings fingerprint separates results of different models on the same image"""
+import numpy as np
+
+from src.app.cache import LRUCache, image_key, settings_fingerprint
+
+
+def test_fingerprint_ignores_key_order_and_tracks_values():
+    settings = {"model": "PP-OCRv5_server_det", "det_max_side": 1600}
+    assert settings_fingerprint(settings) == settings_fingerprint(dict(reversed(list(settings.items()))))
+    assert settings_fingerprint(settings) != settings_fingerprint({**settings, "det_max_side": 800})
+    assert settings_fingerprint(settings) != settings_fingerprint({**settings, "model": "PP-OCRv5_mobile_det"})
+
+
+def test_same_image_under_another_fingerprint_is_a_miss():
+    cache = LRUCache()
+    img = np.zeros((8, 8, 3), dtype=np.uint8)
+    old = settings_fingerprint({"model": "vgg_seq2seq"})
+    new = settings_fingerprint({"model": "vgg_transformer"})
+    cache.put("rec", f"{old}_{image_key(img)}", "old text")
+
+    assert cache.get("rec", f"{old}_{image_key(img)}") == "old text"
+    assert cache.get("rec", f"{new}_{image_key(img)}") is None
@@ -0,0 +1,41 @@
+"""Range header parsing and ETag matching of the download endpoints"""
+import pytest
+
+from src.backend.downloads import etag_matches, parse_range
+
+SIZE = 1000
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=900-5000", (900, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=5-5", (5, 5)),
+])
+def test_satisfiable_range(header, expected):
+    assert parse_range(header, SIZE) == expected
+
+
+@pytest.mark.parametrize("header", [
+    None, "", "items=0-10", "bytes=0-10,20-30", "bytes=abc", "bytes=5", "bytes=1-2-3",
+    "bytes=5-3",  # last byte before the first: invalid, ignored (RFC 7233 section 2.1)
+    "bytes=2000-1000",
+])
+def test_ignored_range_serves_whole_file(header):
+    assert parse_range(header, SIZE) is None
+
+
+@pytest.mark.parametrize("header, size", [("bytes=1000-", SIZE), ("bytes=1000-2000", SIZE), ("bytes=-0", SIZE),
+                                          ("bytes=0-", 0)])
+def test_unsatisfiable_range(header, size):
+    with pytest.raises(ValueError):
+        parse_range(header, size)
+
+
+@pytest.mark.parametrize("header, matches", [
+    ('"abc"', True), ('W/"abc"', True), ('"x", "abc"', True), ("*", True), ('"abd"', False), (None, False),
+])
+def test_etag_matches(header, matches):
+    assert etag_matches(header, '"abc"') == matches
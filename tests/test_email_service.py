@@ -0,0 +1,71 @@
+"""
+EmailService worker: SMTP errors are retried on a fresh connection, and an
+email that fails in any other way is dropped without stopping the worker.
+"""
+import asyncio
+import smtplib
+
+from src.backend.database.email_service import EmailService
+
+
+class FakeSMTP:
+    """smtplib.SMTP stand-in: fails the first ``errors`` sends to each address with the given exception"""
+
+    def __init__(self, outbox, errors):
+        self.outbox = outbox
+        self.errors = errors
+
+    def send_message(self, msg):
+        error = self.errors.get(msg["To"])
+        if error is not None:
+            exception, count = error
+            if count > 0:
+                self.errors[msg["To"]] = (exception, count - 1)
+                raise exception
+        self.outbox.append(msg["To"])
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _service(errors):
+    outbox, connections = [], []
+    service = EmailService(smtp_server="localhost", smtp_port=25, smtp_username="user", smtp_password="password",
+                           starttls=False, retry_delay=0)
+
+    def connect():
+        connections.append(1)
+        return FakeSMTP(outbox, errors)
+
+    service._connect = connect
+    return service, outbox, connections
+
+
+def _send_all(service, recipients):
+    async def scenario():
+        service.start()
+        for to in recipients:
+            assert await service.send_reset_code_email(to, "123456")
+        await service.stop(timeout=5)
+
+    asyncio.run(scenario())
+
+
+def test_unexpected_error_does_not_stop_worker():
+    service, outbox, connections = _service({"bad@example.com": (ValueError("malformed message"), 1)})
+    _send_all(service, ["bad@example.com", "a@example.com", "b@example.com"])
+
+    assert outbox == ["a@example.com", "b@example.com"]
+    assert (service.sent, service.failed, service.retries) == (2, 1, 0)
+    assert len(connections) == 2, "the connection was not reset after the failed send"
+
+
+def test_smtp_error_is_retried():
+    service, outbox, connections = _service({"a@example.com": (smtplib.SMTPDataError(451, b"try again"), 2)})
+    _send_all(service, ["a@example.com", "b@example.com"])
+
+    assert outbox == ["a@example.com", "b@example.com"]
+    assert (service.sent, service.failed, service.retries) == (2, 0, 2)
@@ -0,0 +1,56 @@
+"""
+/health must keep answering while an OCR job occupies the worker pool: the job
+runs in the executor, not on the event loop.
+"""
+import asyncio
+import time
+
+import httpx
+
+import src.backend.main as main
+import src.backend.ocr_executor as ocr_executor_module
+from src.backend.ocr_executor import OCRExecutor
+
+OCR_SECONDS = 1.0
+HEALTH_BUDGET_SECONDS = 0.05
+
+
+def slow_run_ocr(process_kwargs, input_path, output_path, job_id=None, progress=None, worker_stats=None,
+                 collect_metrics=False):
+    """Stand-in for run_ocr: holds its worker like a long OCR job, without loading any model"""
+    time.sleep(OCR_SECONDS)
+    return {"output_path": output_path, "pages_total": 1, "skipped_pages": []}
+
+
+def test_health_answers_while_ocr_job_runs(monkeypatch):
+    executor = OCRExecutor(mode="thread", max_workers=1, max_queue=1)
+    monkeypatch.setattr(ocr_executor_module, "run_ocr", slow_run_ocr)
+    monkeypatch.setattr(main, "ocr_executor", executor)
+
+    async def scenario():
+        job = asyncio.create_task(executor.process_file("input.pdf", "output.pdf"))
+        while executor.in_flight == 0:
+            await asyncio.sleep(0.01)
+
+        latencies, bodies = [], []
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for _ in range(10):
+                start = time.perf_counter()
+                response = await client.get("/health")
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200
+                bodies.append(response.json())
+        still_running = not job.done()
+        report = await job
+        return latencies, bodies, still_running, report
+
+    try:
+        latencies, bodies, still_running, report = asyncio.run(scenario())
+    finally:
+        executor.shutdown(wait=True)
+
+    assert still_running, "the OCR job finished before /health was checked"
+    assert all(body["ocr"]["in_flight"] == 1 for body in bodies)
+    assert max(latencies) < HEALTH_BUDGET_SECONDS, f"/health took {max(latencies) * 1000:.1f} ms during OCR"
+    assert report["output_path"] == "output.pdf"
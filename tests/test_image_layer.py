@@ -0,0 +1,54 @@
+"""Bilevel page images are written as 1-bit XObjects that render back to the thresholded page"""
+import io
+
+import cv2
+import numpy as np
+import pypdfium2
+import pytest
+from reportlab.pdfgen import canvas
+
+import src.app.image_layer as image_layer
+from src.app.image_layer import draw_page_image, encode_page_image
+
+
+def _page(width=333, height=201):
+    img = np.full((height, width, 3), 255, dtype=np.uint8)
+    cv2.putText(img, "Trang 1", (10, 80), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 5)
+    cv2.rectangle(img, (20, 120), (width - 20, 180), (0, 0, 0), 3)
+    return img
+
+
+@pytest.mark.parametrize("libtiff", [True, False], ids=["group4", "flate"])
+def test_bilevel_page_is_one_bit_and_renders_exactly(monkeypatch, libtiff):
+    monkeypatch.setattr(image_layer.features, "check", lambda name: libtiff)
+    img = _page()
+    height, width = img.shape[:2]
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=(width, height))
+    image, mode = encode_page_image(img, "bilevel")
+    draw_page_image(c, image, width, height)
+    c.save()
+    data = buffer.getvalue()
+
+    assert mode == "bilevel"
+    assert b"/BitsPerComponent 1" in data and b"/BitsPerComponent 8" not in data
+    assert (b"/CCITTFaxDecode" in data) == libtiff
+
+    pdf = pypdfium2.PdfDocument(data)
+    rendered = pdf[0].render(scale=1).to_numpy()[..., 0]
+    pdf.close()
+    _, expected = cv2.threshold(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), 0, 255,
+                                cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    assert np.array_equal(rendered, expected)
+
+
+def test_same_bilevel_image_is_stored_once():
+    img = _page()
+    height, width = img.shape[:2]
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=(width, height))
+    for _ in range(2):
+        draw_page_image(c, encode_page_image(img, "bilevel")[0], width, height)
+        c.showPage()
+    c.save()
+    assert buffer.getvalue().count(b"/Subtype /Image") == 1
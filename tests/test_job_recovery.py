@@ -0,0 +1,61 @@
+"""Startup: OCR jobs left queued or running by a previous process are failed and their partial output removed"""
+import asyncio
+import os
+from datetime import datetime
+
+from bson import ObjectId
+
+import src.backend.database.repositories as repositories
+import src.backend.main as main
+from src.backend.database.repositories import ProcessedFileRepository
+
+
+class FakeFilesCollection:
+    """The find/update_many calls fail_unfinished_files makes, on a list of documents"""
+
+    def __init__(self, files):
+        self.files = files
+
+    def _matches(self, doc, query):
+        for key, condition in query.items():
+            values = condition["$in"] if isinstance(condition, dict) else [condition]
+            if doc.get(key) not in values:
+                return False
+        return True
+
+    async def _iterate(self, docs):
+        for doc in docs:
+            yield dict(doc)
+
+    def find(self, query):
+        return self._iterate([doc for doc in self.files if self._matches(doc, query)])
+
+    async def update_many(self, query, update):
+        for doc in self.files:
+            if self._matches(doc, query):
+                doc.update(update["$set"])
+
+
+def _file(status, name):
+    return {"_id": ObjectId(), "user_id": ObjectId(), "original_filename": f"{name}.pdf",
+            "processed_filename": f"ocr_{name}.pdf", "file_size": 10, "file_type": "application/pdf",
+            "processing_status": status, "created_at": datetime.utcnow()}
+
+
+def test_interrupted_jobs_are_failed_and_outputs_removed(tmp_path, monkeypatch):
+    files = [_file("queued", "queued"), _file("running", "running"), _file("completed", "done"),
+             _file("failed", "failed")]
+    monkeypatch.setattr(repositories, "get_database", lambda: {"processed_files": FakeFilesCollection(files)})
+    monkeypatch.setattr(main, "file_repo", ProcessedFileRepository(), raising=False)
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("output_files")
+    for name in ("running", "done"):
+        with open(f"output_files/ocr_{name}.pdf", "wb") as f:
+            f.write(b"%PDF-1.4")
+
+    asyncio.run(main.fail_interrupted_jobs())
+
+    assert [f["processing_status"] for f in files] == ["failed", "failed", "completed", "failed"]
+    assert "restart" in files[0]["error_message"] and "restart" in files[1]["error_message"]
+    assert "error_message" not in files[3]
+    assert os.listdir("output_files") == ["ocr_done.pdf"]
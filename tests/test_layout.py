@@ -0,0 +1,33 @@
+"""text_widths: one pass over the glyph width table gives the widths stringWidth gives line by line"""
+import numpy as np
+import pytest
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfbase.ttfonts import TTFont
+
+from benchmarks.synthetic import FONT_PATH, SAMPLE_LINES
+from src.app.layout import text_widths
+
+FONT_NAME = "TimesNewRoman"
+
+
+@pytest.fixture(scope="module", autouse=True)
+def font():
+    pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+
+
+def test_widths_match_string_width():
+    texts = SAMPLE_LINES + ["", "Đường số 3, Quận 1 — 100%", "中文 \U0001F600"]
+    font_sizes = np.arange(len(texts)) % 30 + 6
+    expected = [stringWidth(text, FONT_NAME, size) for text, size in zip(texts, font_sizes)]
+    assert text_widths(texts, FONT_NAME, font_sizes) == pytest.approx(expected)
+
+
+def test_missing_text_has_zero_width():
+    widths = text_widths([None, "abc", None], FONT_NAME, [12, 12, 12])
+    assert widths[0] == 0 and widths[2] == 0
+    assert widths[1] == pytest.approx(stringWidth("abc", FONT_NAME, 12))
+
+
+def test_no_lines():
+    assert len(text_widths([], FONT_NAME, [])) == 0
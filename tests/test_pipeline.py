@@ -0,0 +1,51 @@
+"""
+StagePipeline: results come back in input order, stage errors are raised at
+their item, and a slow item does not let later results pile up unbounded.
+"""
+import threading
+import time
+
+import pytest
+
+from src.app.pipeline import StagePipeline
+
+
+def test_results_in_input_order():
+    def slow_odd(x):
+        time.sleep(0.01 if x % 2 else 0)
+        return x
+
+    pipeline = StagePipeline([("double", lambda x: x * 2, 2), ("identity", slow_odd, 3)], queue_size=2)
+    assert list(pipeline.run(range(50))) == [x * 2 for x in range(50)]
+
+
+def test_stage_error_raised_at_its_item():
+    def fail_on_three(x):
+        if x == 3:
+            raise ValueError("bad item")
+        return x
+
+    results = []
+    with pytest.raises(ValueError, match="bad item"):
+        for value in StagePipeline([("check", fail_on_three, 2)]).run(range(10)):
+            results.append(value)
+    assert results == [0, 1, 2]
+
+
+def test_slow_item_bounds_finished_results_waiting():
+    lock = threading.Lock()
+    waiting, peak = [0], [0]
+
+    def last_stage(x):
+        time.sleep(0.5 if x == 0 else 0.001)  # item 0 holds up every later result
+        with lock:
+            waiting[0] += 1
+            peak[0] = max(peak[0], waiting[0])
+        return x
+
+    pipeline = StagePipeline([("render", lambda x: x, 1), ("recognize", last_stage, 4)], queue_size=2)
+    for value in pipeline.run(range(200)):
+        with lock:
+            waiting[0] -= 1
+
+    assert peak[0] <= pipeline.window, f"{peak[0]} finished results waited behind the slow item"
@@ -0,0 +1,71 @@
+"""ResultCache.restore: hits link the cached output, a file that disappears is a miss"""
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import src.backend.result_cache as result_cache_module
+from src.backend.result_cache import ResultCache
+
+
+class FakeCacheRepository:
+    """The CacheEntryRepository calls restore() makes, on a dict"""
+
+    def __init__(self):
+        self.entries = {}
+        self.touched = []
+
+    async def get_entry(self, cache_key):
+        return self.entries.get(cache_key)
+
+    async def touch(self, cache_key):
+        self.touched.append(cache_key)
+        return True
+
+    async def delete_entries(self, cache_keys):
+        for key in cache_keys:
+            self.entries.pop(key, None)
+        return len(cache_keys)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResultCache(cache_dir=str(tmp_path / "cache"))
+    cache.repo = FakeCacheRepository()
+    key = cache.make_key("a" * 64)
+    with open(cache._cache_path(key), "wb") as f:
+        f.write(b"%PDF-1.4 cached")
+    cache.repo.entries[key] = SimpleNamespace(cache_key=key, filename=os.path.basename(cache._cache_path(key)))
+    return cache, key
+
+
+def test_restore_hit(cache, tmp_path):
+    cache, key = cache
+    output_path = str(tmp_path / "out.pdf")
+    assert asyncio.run(cache.restore(key, output_path))
+    with open(output_path, "rb") as f:
+        assert f.read() == b"%PDF-1.4 cached"
+    assert cache.repo.touched == [key] and cache.hits == 1
+
+
+def test_restore_after_concurrent_eviction_is_a_miss(cache, tmp_path, monkeypatch):
+    cache, key = cache
+    link_or_copy = result_cache_module._link_or_copy
+
+    def evicted_first(src, dst):
+        os.remove(src)  # another request's evict() wins the race
+        link_or_copy(src, dst)
+
+    monkeypatch.setattr(result_cache_module, "_link_or_copy", evicted_first)
+    output_path = str(tmp_path / "out.pdf")
+    assert not asyncio.run(cache.restore(key, output_path))
+    assert not os.path.exists(output_path)
+    assert key not in cache.repo.entries, "the stale entry was kept"
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_restore_unknown_key_is_a_miss(cache, tmp_path):
+    cache, _ = cache
+    assert not asyncio.run(cache.restore(cache.make_key("b" * 64), str(tmp_path / "out.pdf")))
+    assert cache.misses == 1
@@ -0,0 +1,54 @@
+"""
+fix_text_spacing against stored expected outputs.
+
+data/text_spacing_golden.json holds [input, expected] pairs: hand-written edge
+cases, the synthetic document lines and random strings built from the
+characters the rules react to. The expected outputs come from the original
+chain of re.sub calls the precompiled rule engine replaced (still in
+benchmarks/text_spacing.py), so a change here is a behavior change.
+"""
+import json
+import os
+
+import pytest
+
+from src.app.text_spacing import fix_text_spacing, is_valid_roman_numeral
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "data", "text_spacing_golden.json")
+
+with open(GOLDEN_PATH, encoding="utf-8") as f:
+    GOLDEN = json.load(f)
+
+
+def test_golden_corpus():
+    mismatches = [(text, expected, fix_text_spacing(text)) for text, expected in GOLDEN
+                  if fix_text_spacing(text) != expected]
+    assert not mismatches, "\n".join(f"{text!r}: expected {expected!r}, got {actual!r}"
+                                     for text, expected, actual in mismatches[:20])
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1.a", "1. a"),
+    ("I.Mở đầu", "I. Mở đầu"),
+    ("IIII.x", "IIII.x"),
+    ("(iv)Điều", "(iv) Điều"),
+    # Quirks kept from the original rules: the first leading rule that matches wins,
+    # and re.sub does not rescan text it already matched
+    ("1.2.3.a", "1. 2.3.a"),
+    ("x,y,z", "x, y,z"),
+    ("abc-def-ghi", "abc - def-ghi"),
+    ("Hợp đồng số 12/2024/HĐDV", "Hợp đồng số 12/2024/HĐDV"),
+])
+def test_rules(text, expected):
+    assert fix_text_spacing(text) == expected
+
+
+@pytest.mark.parametrize("text", ["", "   ", None])
+def test_blank_input_unchanged(text):
+    assert fix_text_spacing(text) == text
+
+
+@pytest.mark.parametrize("text, valid", [("IV", True), ("mcmxcix", True), ("IIII", False), ("MMMMM", False),
+                                         ("", True)])
+def test_is_valid_roman_numeral(text, valid):
+    assert is_valid_roman_numeral(text) == valid
@@ -0,0 +1,122 @@
+"""
+receive_files: uploads are parsed and limited as the body streams in, with or
+without Content-Length, and a rejected upload leaves nothing on disk.
+"""
+import asyncio
+import hashlib
+import io
+import os
+
+import httpx
+import pytest
+from reportlab.pdfgen import canvas
+from starlette.requests import Request
+
+import src.backend.main as main
+from src.backend.uploads import UploadError, receive_files
+
+BOUNDARY = "test-boundary"
+CHUNK = 16 * 1024
+
+
+def pdf_bytes(pages=1):
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer)
+    for _ in range(pages):
+        c.drawString(100, 700, "page")
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def multipart(*files, field="file"):
+    body = b""
+    for filename, content in files:
+        body += (f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+                 f"Content-Type: application/octet-stream\r\n\r\n").encode() + content + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+def streamed_request(body):
+    """Request receiving ``body`` in CHUNK pieces without Content-Length; ``sent`` counts the pieces read"""
+    chunks = [body[i:i + CHUNK] for i in range(0, len(body), CHUNK)]
+    sent = [0]
+
+    async def receive():
+        sent[0] += 1
+        return {"type": "http.request", "body": chunks[sent[0] - 1], "more_body": sent[0] < len(chunks)}
+
+    scope = {"type": "http", "method": "POST", "path": "/process", "headers": [
+        (b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]}
+    return Request(scope, receive), sent, len(chunks)
+
+
+def test_file_written_once_with_hash_and_pages(tmp_path):
+    content = pdf_bytes(pages=3)
+    request, _, _ = streamed_request(multipart(("scan.pdf", content)))
+    upload, = asyncio.run(receive_files(request, str(tmp_path), max_bytes=10 * 1024 * 1024))
+
+    assert (upload.filename, upload.extension, upload.pages, upload.size) == ("scan.pdf", "pdf", 3, len(content))
+    assert upload.sha256 == hashlib.sha256(content).hexdigest()
+    assert os.listdir(tmp_path) == [os.path.basename(upload.path)]
+    with open(upload.path, "rb") as f:
+        assert f.read() == content
+
+
+def test_oversized_file_refused_while_streaming(tmp_path):
+    content = b"%PDF-1.4\n" + b"0" * (1024 * 1024)
+    request, sent, total = streamed_request(multipart(("big.pdf", content)))
+    with pytest.raises(UploadError) as e:
+        asyncio.run(receive_files(request, str(tmp_path), max_bytes=100 * 1024))
+
+    assert e.value.status_code == 413
+    assert sent[0] < total // 4, f"read {sent[0]} of {total} chunks before refusing"
+    assert os.listdir(tmp_path) == []
+
+
+def test_unknown_type_refused_from_first_bytes(tmp_path):
+    request, sent, total = streamed_request(multipart(("fake.pdf", b"MZ" + b"\0" * (512 * 1024))))
+    with pytest.raises(UploadError) as e:
+        asyncio.run(receive_files(request, str(tmp_path)))
+
+    assert e.value.status_code == 415 and e.value.filename == "fake.pdf"
+    assert sent[0] == 1
+    assert os.listdir(tmp_path) == []
+
+
+def test_too_many_files_removes_the_ones_received(tmp_path):
+    request, _, _ = streamed_request(multipart(*[(f"{i}.pdf", pdf_bytes()) for i in range(3)], field="files"))
+    with pytest.raises(UploadError) as e:
+        asyncio.run(receive_files(request, str(tmp_path), field="files", max_files=2))
+
+    assert e.value.status_code == 400
+    assert os.listdir(tmp_path) == []
+
+
+def test_chunked_upload_without_content_length_gets_413(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("temp_files")
+    monkeypatch.setattr(main, "OCR_MAX_UPLOAD_MB", 1)
+    main.app.dependency_overrides[main.get_current_user] = lambda: None
+    body = multipart(("big.pdf", b"%PDF-1.4\n" + b"0" * (4 * 1024 * 1024)))
+    sent = [0]
+
+    async def chunks():
+        for i in range(0, len(body), CHUNK):
+            sent[0] += 1
+            yield body[i:i + CHUNK]
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/process", content=chunks(),
+                                     headers={"content-type": f"multipart/form-data; boundary={BOUNDARY}"})
+
+    try:
+        response = asyncio.run(scenario())
+    finally:
+        main.app.dependency_overrides.clear()
+
+    assert response.status_code == 413
+    assert sent[0] < len(body) // CHUNK // 2, "the whole body was read before refusing it"
+    assert os.listdir("temp_files") == []
@@ -0,0 +1,139 @@
+"""
+UserCache: concurrent lookups coalesce into one read, entries expire after the
+TTL, and UserRepository writes invalidate the cached user.
+"""
+import asyncio
+import copy
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+import src.backend.database.repositories as repositories
+from src.backend.database.repositories import UserRepository
+from src.backend.user_cache import UserCache
+
+READ_DELAY = 0.02  # database round trip
+
+
+class FakeUsersCollection:
+    """The part of a Motor collection UserRepository uses, counting find_one reads"""
+
+    def __init__(self, users):
+        self.users = {user["_id"]: user for user in users}
+        self.reads = 0
+
+    def _match(self, query):
+        for user in self.users.values():
+            if all(user.get(key) == value for key, value in query.items()):
+                return user
+        return None
+
+    async def find_one(self, query):
+        self.reads += 1
+        await asyncio.sleep(READ_DELAY)
+        user = self._match(query)
+        return copy.deepcopy(user) if user else None
+
+    async def update_one(self, query, update):
+        user = self._match(query)
+        if user is not None:
+            user.update(update.get("$set", {}))
+            for key in update.get("$unset", {}):
+                user.pop(key, None)
+        return type("UpdateResult", (), {"modified_count": int(user is not None)})()
+
+
+@pytest.fixture
+def users(monkeypatch):
+    collection = FakeUsersCollection([{
+        "_id": ObjectId(), "username": "alice", "email": "alice@example.com", "password": "hashed-password"
+    }])
+    monkeypatch.setattr(repositories, "get_database", lambda: {"users": collection})
+    return collection
+
+
+def test_concurrent_lookups_make_one_read(users):
+    cache = UserCache(ttl=30)
+    repo = UserRepository(cache=cache)
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get("alice", repo.get_user_by_username) for _ in range(50)))
+
+    found = asyncio.run(scenario())
+    assert users.reads == 1
+    assert all(user is found[0] for user in found)
+    assert cache.stats["misses"] == 1 and cache.stats["coalesced"] == 49
+
+
+def test_entry_expires_after_ttl(users):
+    cache = UserCache(ttl=0.1)
+    repo = UserRepository(cache=cache)
+
+    async def scenario():
+        await cache.get("alice", repo.get_user_by_username)
+        await cache.get("alice", repo.get_user_by_username)
+        reads_while_fresh = users.reads
+        await asyncio.sleep(0.15)
+        await cache.get("alice", repo.get_user_by_username)
+        return reads_while_fresh
+
+    assert asyncio.run(scenario()) == 1
+    assert users.reads == 2
+
+
+def test_missing_user_is_not_cached(users):
+    cache = UserCache(ttl=30)
+    repo = UserRepository(cache=cache)
+
+    async def scenario():
+        for _ in range(2):
+            assert await cache.get("bob", repo.get_user_by_username) is None
+
+    asyncio.run(scenario())
+    assert users.reads == 2
+
+
+def test_update_user_invalidates_cached_user(users):
+    cache = UserCache(ttl=30)
+    repo = UserRepository(cache=cache)
+
+    async def scenario():
+        user = await cache.get("alice", repo.get_user_by_username)
+        await repo.update_user(str(user.id), {"email": "new@example.com"})
+        return await cache.get("alice", repo.get_user_by_username)
+
+    user = asyncio.run(scenario())
+    assert users.reads == 2
+    assert user.email == "new@example.com"
+
+
+def test_reset_code_write_invalidates_cached_user(users):
+    cache = UserCache(ttl=30)
+    repo = UserRepository(cache=cache)
+
+    async def scenario():
+        await cache.get("alice", repo.get_user_by_username)
+        await repo.set_reset_code("alice@example.com", "123456", datetime.utcnow() + timedelta(minutes=5))
+        return await cache.get("alice", repo.get_user_by_username)
+
+    user = asyncio.run(scenario())
+    assert users.reads == 2
+    assert user.reset_code == "123456"
+
+
+def test_write_during_lookup_is_not_cached_stale(users):
+    cache = UserCache(ttl=30)
+    repo = UserRepository(cache=cache)
+
+    async def scenario():
+        lookup = asyncio.create_task(cache.get("alice", repo.get_user_by_username))
+        await asyncio.sleep(READ_DELAY / 2)  # the read is in flight
+        user_id = next(iter(users.users))
+        await repo.update_user(str(user_id), {"email": "new@example.com"})
+        await lookup
+        return await cache.get("alice", repo.get_user_by_username)
+
+    user = asyncio.run(scenario())
+    assert users.reads == 2, "the user read before the write was kept in the cache"
+    assert user.email == "new@example.com"
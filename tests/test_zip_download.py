@@ -0,0 +1,90 @@
+"""ZIP download links: the browser downloads the stream with a short-lived token scoped to the files"""
+import asyncio
+import io
+import os
+import zipfile
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import httpx
+import jwt
+import pytest
+from bson import ObjectId
+
+import src.backend.main as main
+
+USER_ID = ObjectId()
+
+
+class FakeFileRepository:
+    def __init__(self, files):
+        self.files = files
+
+    async def get_files_by_ids(self, user_id, file_ids):
+        return [f for f in self.files if str(f.id) in file_ids and str(f.user_id) == user_id]
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("output_files")
+    records = []
+    for name, status, user_id in (("a", "completed", USER_ID), ("b", "running", USER_ID),
+                                  ("c", "completed", ObjectId())):
+        with open(f"output_files/ocr_{name}.pdf", "wb") as f:
+            f.write(f"%PDF {name}".encode())
+        records.append(SimpleNamespace(id=ObjectId(), user_id=user_id, processed_filename=f"ocr_{name}.pdf",
+                                       processing_status=status))
+    monkeypatch.setattr(main, "file_repo", FakeFileRepository(records), raising=False)
+    main.app.dependency_overrides[main.get_current_user] = lambda: SimpleNamespace(id=USER_ID)
+    yield [str(f.id) for f in records]
+    main.app.dependency_overrides.clear()
+
+
+def _run(scenario):
+    async def wrapper():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await scenario(client)
+    return asyncio.run(wrapper())
+
+
+def test_link_streams_only_own_completed_files(files):
+    async def scenario(client):
+        link = await client.post("/files/zip/link", json={"ids": files})
+        main.app.dependency_overrides.clear()  # the download itself carries no Authorization header
+        return link, await client.get(link.json()["url"])
+
+    link, download = _run(scenario)
+    assert link.status_code == 200 and link.json()["expires_in"] == main.DOWNLOAD_LINK_TTL_SECONDS
+    assert download.status_code == 200
+    assert download.headers["content-disposition"].startswith("attachment;")
+    archive = zipfile.ZipFile(io.BytesIO(download.content))
+    assert archive.namelist() == ["ocr_a.pdf"]
+
+
+def test_no_completed_file_fails_before_the_link(files):
+    response = _run(lambda client: client.post("/files/zip/link", json={"ids": files[1:]}))
+    assert response.status_code == 404
+
+
+def _token(**payload):
+    return jwt.encode(payload, main.SECRET_KEY, algorithm=main.ALGORITHM)
+
+
+def test_expired_and_unscoped_tokens_are_refused(files):
+    expired = _token(scope="zip", user_id=str(USER_ID), ids=files[:1], exp=datetime.utcnow() - timedelta(seconds=1))
+    access = main.create_access_token({"sub": "alice"})
+
+    async def scenario(client):
+        return [(await client.get("/files/zip/download", params={"token": token})).status_code
+                for token in (expired, access)]
+
+    assert _run(scenario) == [410, 401]
+
+
+def test_link_token_is_not_an_access_token(files):
+    main.app.dependency_overrides.clear()
+    token = _token(scope="zip", user_id=str(USER_ID), ids=files[:1], exp=datetime.utcnow() + timedelta(minutes=1))
+    response = _run(lambda client: client.get("/history", headers={"Authorization": f"Bearer {token}"}))
+    assert response.status_code == 401